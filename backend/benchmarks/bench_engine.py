@@ -0,0 +1,262 @@
+"""
+Benchmark the poker engine with stub players: hand evaluation, single rounds at 2 to 10 seats,
+long games and the API endpoints under concurrent load. Results are printed and saved as JSON
+so that they can be compared across commits.
+
+Run from the backend directory with: python -m benchmarks.bench_engine --output results.json
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+
+from models.context_builder import ContextBuilder
+from models.evaluator import full_deck, load_tables
+from models.player import Player
+from models.poker_game import PokerGame
+
+
+class RandomModel:
+    """
+    A stub model playing uniformly random moves, including some invalid ones.
+    It never goes all in, so that games with deep stacks last all their rounds.
+    """
+
+    def __init__(self, name: str, seed: int):
+        self.name = name
+        self.rng = random.Random(seed)
+
+    def get_move(self, prompt):
+        return self.rng.choice(['fold', 'check', 'call', 'call', 'raise 20', 'raise 60', 'check'])
+
+
+class ScriptedModel:
+    """
+    A stub model cycling through a fixed script of moves.
+    """
+
+    SCRIPT = ['call', 'check', 'raise 40', 'call', 'check', 'call', 'fold']
+
+    def __init__(self, name: str, seed: int):
+        self.name = name
+        self.position = seed % len(self.SCRIPT)
+
+    def get_move(self, prompt):
+        move = self.SCRIPT[self.position]
+        self.position = (self.position + 1) % len(self.SCRIPT)
+        return move
+
+
+STUB_MODELS = {'random': RandomModel, 'scripted': ScriptedModel}
+
+
+class TimedGame(PokerGame):
+    """
+    A poker game recording how long each decision takes, prompt building included.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.decision_times = []
+
+    def request_move(self, player_id: int, context: str, errors: str):
+        start = time.perf_counter()
+        reply = super().request_move(player_id, context, errors)
+        self.decision_times.append(time.perf_counter() - start)
+        return reply
+
+
+def percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+def latency_summary(seconds) -> dict:
+    return {
+        'p50_ms': percentile(seconds, 50) * 1000,
+        'p99_ms': percentile(seconds, 99) * 1000,
+        'count': len(seconds)
+    }
+
+
+def create_game(num_seats: int, stub: str, num_rounds: int, seed: int, token_budget=4000) -> TimedGame:
+    players = [Player(name=f"{stub} {seat + 1}", model=STUB_MODELS[stub](f"{stub} {seat + 1}", seed * 100 + seat),
+                      context_builder=ContextBuilder(token_budget=token_budget))
+               for seat in range(num_seats)]
+    return TimedGame(players, money=[1e9] * num_seats, num_rounds=num_rounds, seed=seed)
+
+
+def peak_memory(function) -> float:
+    """
+    Run function once more and return its peak traced memory in KiB.
+    """
+
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_hand_evaluation(num_hands: int, num_seats: int = 6, seed: int = 0) -> dict:
+    """
+    get_best_hand for every seat and get_winner, on random deals.
+    """
+
+    load_tables()
+    game = create_game(2, 'scripted', 1, seed)
+    rng = random.Random(seed)
+    deck = full_deck()
+    deals = [rng.sample(deck, 5 + 2 * num_seats) for _ in range(num_hands)]
+
+    start = time.perf_counter()
+    for deal in deals:
+        board = deal[:5]
+        game.get_winner([game.get_best_hand(deal[5 + 2 * seat:7 + 2 * seat] + board) for seat in range(num_seats)])
+    seconds = time.perf_counter() - start
+
+    return {'seats': num_seats, 'hands': num_hands, 'hands_per_second': num_hands / seconds,
+            'evaluations_per_second': num_hands * num_seats / seconds}
+
+
+def bench_rounds(num_rounds: int, seats, seed: int = 0):
+    """
+    Full play_round calls with random and scripted stub models.
+    """
+
+    results = []
+    for stub in STUB_MODELS:
+        for num_seats in seats:
+            def play():
+                game = create_game(num_seats, stub, num_rounds, seed)
+                for _ in range(num_rounds):
+                    game.reset_game()
+                    game.play_round()
+                    game.game_statistics.num_rounds += 1
+                return game
+
+            start = time.perf_counter()
+            game = play()
+            seconds = time.perf_counter() - start
+
+            results.append({'stub': stub, 'seats': num_seats, 'hands': num_rounds,
+                            'hands_per_second': num_rounds / seconds,
+                            'decisions_per_hand': len(game.decision_times) / num_rounds,
+                            'decision_latency': latency_summary(game.decision_times),
+                            'peak_memory_kib': peak_memory(play)})
+    return results
+
+
+def bench_games(lengths, num_seats: int = 6, seed: int = 0):
+    """
+    Long play_game runs, with the default prompt budget and with the whole game in every prompt,
+    to show how prompt sizes grow with the number of rounds.
+    """
+
+    results = []
+    for token_budget in (4000, None):
+        for num_rounds in lengths:
+            game = create_game(num_seats, 'random', num_rounds, seed, token_budget=token_budget)
+            start = time.perf_counter()
+            game.play_game()
+            seconds = time.perf_counter() - start
+
+            hands = game.game_statistics.num_rounds
+            assert hands == num_rounds, f"The game ended after {hands} of {num_rounds} rounds, prompt growth would not be measured"
+            prompt_sizes = [player.context_builder.stats() for player in game.players_dict.values()]
+            results.append({'token_budget': token_budget, 'seats': num_seats, 'hands': hands,
+                            'hands_per_second': hands / seconds,
+                            'decision_latency': latency_summary(game.decision_times),
+                            'mean_prompt_tokens': sum(stats['mean_tokens'] for stats in prompt_sizes) / num_seats,
+                            'max_prompt_tokens': max(stats['max_tokens'] for stats in prompt_sizes),
+                            'description_chars': len(game.game_state_description)})
+    return results
+
+
+def bench_endpoints(num_requests: int, concurrency: int):
+    """
+    The /standings and /random_game endpoints under concurrent requests, through the ASGI test client.
+    """
+
+    from fastapi.testclient import TestClient
+    import main
+
+    client = TestClient(main.app)
+    results = []
+    for path in ('/standings', '/random_game'):
+        def request(_):
+            start = time.perf_counter()
+            response = client.get(path)
+            return time.perf_counter() - start, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(concurrency) as executor:
+            responses = list(executor.map(request, range(num_requests)))
+        seconds = time.perf_counter() - start
+
+        results.append({'path': path, 'requests': num_requests, 'concurrency': concurrency,
+                        'requests_per_second': num_requests / seconds,
+                        'errors': sum(1 for _, status in responses if status != 200),
+                        'latency': latency_summary([latency for latency, _ in responses])})
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--hands', type=int, default=20_000, help="deals for the hand evaluation benchmark")
+    parser.add_argument('--rounds', type=int, default=300, help="rounds per seat count for the play_round benchmark")
+    parser.add_argument('--seats', type=int, nargs='+', default=[2, 4, 6, 8, 10])
+    parser.add_argument('--game-lengths', type=int, nargs='+', default=[50, 200, 1000])
+    parser.add_argument('--requests', type=int, default=200, help="requests per endpoint")
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--skip-endpoints', action='store_true')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'timestamp': time.time(),
+        'hand_evaluation': bench_hand_evaluation(args.hands, seed=args.seed),
+        'rounds': bench_rounds(args.rounds, args.seats, seed=args.seed),
+        'games': bench_games(args.game_lengths, seed=args.seed),
+        'endpoints': [] if args.skip_endpoints else bench_endpoints(args.requests, args.concurrency)
+    }
+
+    evaluation = results['hand_evaluation']
+    print(f"hand evaluation ({evaluation['seats']} seats): {evaluation['hands_per_second']:,.0f} hands/s")
+    for result in results['rounds']:
+        latency = result['decision_latency']
+        print(f"play_round {result['stub']:>8} {result['seats']:>2} seats: {result['hands_per_second']:8,.0f} hands/s, "
+              f"decision p50 {latency['p50_ms']:.3f} ms p99 {latency['p99_ms']:.3f} ms, peak {result['peak_memory_kib']:,.0f} KiB")
+    for result in results['games']:
+        print(f"play_game budget {str(result['token_budget']):>5} {result['hands']:>5} hands: {result['hands_per_second']:8,.0f} hands/s, "
+              f"mean prompt {result['mean_prompt_tokens']:,.0f} tokens, max {result['max_prompt_tokens']:,} tokens")
+    for result in results['endpoints']:
+        latency = result['latency']
+        print(f"{result['path']:>12}: {result['requests_per_second']:8,.0f} requests/s, "
+              f"p50 {latency['p50_ms']:.2f} ms p99 {latency['p99_ms']:.2f} ms, {result['errors']} errors")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""
+Benchmark the scalar and the vectorized hand evaluation against the string based evaluator they replaced.
+
+Run from the backend directory with: python -m benchmarks.bench_evaluator
+"""
+
+import argparse
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from models.batch_evaluator import evaluate_batch, resolve_winners_batch
+from models.evaluator import card_names, evaluate, load_tables
+
+
+def random_hands(num_hands: int, num_cards: int, seed: int = 0):
+    """ 
+    Draw num_hands hands of num_cards distinct cards each. 
+    """
+
+    rng = np.random.default_rng(seed)
+    return np.argsort(rng.random((num_hands, 52)), axis=1)[:, :num_cards]
+
+
+def legacy_best_hand(cards: List[str]):
+    """
+    The string based evaluator that PokerGame.get_best_hand used before evaluator.py, unchanged,
+    kept to measure the speedup of evaluate against it.
+    """
+
+    # Convert cards to (rank, suit) tuples for easier processing
+    processed_cards = []
+    for card in cards:
+        rank, _, suit = card.partition(' of ')
+        # Convert face cards to numbers
+        if rank == 'Jack':
+            rank = 11
+        elif rank == 'Queen':
+            rank = 12
+        elif rank == 'King':
+            rank = 13
+        elif rank == 'Ace':
+            rank = 14
+        else:
+            rank = int(rank)
+        processed_cards.append((rank, suit))
+
+    # Sort cards by rank, highest first
+    processed_cards.sort(reverse=True, key=lambda x: x[0])
+
+    # Check for straight flush
+    for suit in ['Hearts', 'Diamonds', 'Clubs', 'Spades']:
+        suited_cards = [card[0] for card in processed_cards if card[1] == suit]
+        if len(suited_cards) >= 5:
+            suited_cards.sort(reverse=True)
+            for i in range(len(suited_cards) - 4):
+                if suited_cards[i] - suited_cards[i+4] == 4:
+                    return ('straight_flush', suited_cards[i])
+
+    # Check for four of a kind
+    for rank in range(14, 1, -1):
+        if sum(1 for card in processed_cards if card[0] == rank) == 4:
+            return ('four_of_a_kind', rank)
+
+    # Check for full house
+    for three_rank in range(14, 1, -1):
+        if sum(1 for card in processed_cards if card[0] == three_rank) == 3:
+            for two_rank in range(14, 1, -1):
+                if two_rank != three_rank and sum(1 for card in processed_cards if card[0] == two_rank) >= 2:
+                    return ('full_house', (three_rank, two_rank))
+
+    # Check for flush
+    for suit in ['Hearts', 'Diamonds', 'Clubs', 'Spades']:
+        suited_cards = [card[0] for card in processed_cards if card[1] == suit]
+        if len(suited_cards) >= 5:
+            suited_cards.sort(reverse=True)
+            return ('flush', suited_cards[:5])
+
+    # Check for straight
+    ranks = sorted(list(set(card[0] for card in processed_cards)), reverse=True)
+    for i in range(len(ranks) - 4):
+        if ranks[i] - ranks[i+4] == 4:
+            return ('straight', ranks[i])
+
+    # Check for three of a kind
+    for rank in range(14, 1, -1):
+        if sum(1 for card in processed_cards if card[0] == rank) == 3:
+            return ('three_of_a_kind', rank)
+
+    # Check for two pair
+    pairs = []
+    for rank in range(14, 1, -1):
+        if sum(1 for card in processed_cards if card[0] == rank) == 2:
+            pairs.append(rank)
+        if len(pairs) == 2:
+            return ('two_pair', tuple(pairs))
+
+    # Check for one pair
+    for rank in range(14, 1, -1):
+        if sum(1 for card in processed_cards if card[0] == rank) == 2:
+            return ('pair', rank)
+
+    # High card
+    return ('high_card', processed_cards[0][0])
+
+
+def bench(function, *args, repeats: int = 3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--hands', type=int, default=200_000)
+    parser.add_argument('--players', type=int, default=6)
+    parser.add_argument('--legacy-hands', type=int, default=20_000, help="hands for the slow legacy evaluator")
+    parser.add_argument('--min-speedup', type=float, default=0.0, help="fail if evaluate is less than this many times as fast as the legacy evaluator")
+    args = parser.parse_args()
+
+    load_tables()
+    cards = random_hands(args.hands, 7)
+    card_lists = cards.tolist()
+
+    scalar_time, scalar_scores = bench(lambda: [evaluate(hand) for hand in card_lists])
+    batch_time, batch_scores = bench(evaluate_batch, cards)
+    assert np.array_equal(np.asarray(scalar_scores), batch_scores), "Scalar and batch scores differ"
+
+    # The legacy evaluator took card names, parsing them is part of its cost
+    legacy_cards = [card_names(hand) for hand in card_lists[:args.legacy_hands]]
+    legacy_time, _ = bench(lambda: [legacy_best_hand(hand) for hand in legacy_cards])
+    legacy_rate = len(legacy_cards) / legacy_time
+    scalar_speedup = args.hands / scalar_time / legacy_rate
+
+    print(f"legacy get_best_hand: {legacy_rate:14,.0f} hands/s")
+    print(f"scalar evaluate:      {args.hands / scalar_time:14,.0f} hands/s ({scalar_speedup:.1f}x)")
+    print(f"evaluate_batch:       {args.hands / batch_time:14,.0f} hands/s ({args.hands / batch_time / legacy_rate:.1f}x, "
+          f"{scalar_time / batch_time:.1f}x over scalar)")
+
+    # Full showdowns with shared boards
+    num_showdowns = args.hands // args.players
+    deals = random_hands(num_showdowns, 5 + 2 * args.players, seed=1)
+    boards = deals[:, :5]
+    hole_cards = deals[:, 5:].reshape(num_showdowns, args.players, 2)
+
+    showdown_time, _ = bench(resolve_winners_batch, hole_cards, boards)
+    print(f"resolve_winners_batch ({args.players} players): {num_showdowns / showdown_time:,.0f} showdowns/s")
+
+    if scalar_speedup < args.min_speedup:
+        sys.exit(f"evaluate is {scalar_speedup:.1f}x as fast as the legacy evaluator, less than {args.min_speedup}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,46 @@
+"""
+Benchmark the cold start of the API: import main in fresh interpreters and report the time to import it
+and the startup time it measures itself, plus the modules the model registry kept from being imported.
+
+Run from the backend directory with: python -m benchmarks.bench_startup --runs 5 --budget 1.0
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+print(json.dumps({'import_seconds': time.perf_counter() - start, 'startup_seconds': main.startup_seconds,
+                  'modules': [name for name in ('numpy', 'requests') if name in sys.modules]}))
+"""
+
+
+def cold_start() -> dict:
+    output = subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget', type=float, default=1.0, help="fail if the median import takes longer, in seconds")
+    args = parser.parse_args()
+
+    runs = [cold_start() for _ in range(args.runs)]
+    import_seconds = statistics.median(run['import_seconds'] for run in runs)
+    startup_seconds = statistics.median(run['startup_seconds'] for run in runs)
+    print(f"import main: {import_seconds:.3f}s median, startup measured by main: {startup_seconds:.3f}s median")
+    print(f"heavy modules imported at startup: {runs[-1]['modules'] or 'none'}")
+
+    if import_seconds > args.budget:
+        sys.exit(f"Cold start of {import_seconds:.3f}s is over the budget of {args.budget}s")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,119 @@
-from fastapi import FastAPI
+import time
+
+# Startup is timed from the first import, see /ready
+startup_start = time.perf_counter()
+
+import os
+from typing import Optional
+
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from models.async_poker_game import AsyncPokerGame
 from models.poker_game import PokerGame
 from models.model_handler import ModelHandler
+from models.streaming import GameRegistry, to_server_sent_event
 
 app = FastAPI()
-model_handler = ModelHandler()
+model_handler = ModelHandler(hand_store_path=os.environ.get('HAND_STORE_PATH'),
+                             decision_cache_path=os.environ.get('DECISION_CACHE_PATH'),
+                             inference_url=os.environ.get('LLAMA_INFERENCE_URL'),
+                             model_urls=dict(entry.split('=', 1) for entry in os.environ.get('MODEL_URLS', '').split(',') if entry),
+                             enable_metrics=os.environ.get('ENABLE_METRICS', '1') != '0',
+                             baseline_bots=os.environ.get('BASELINE_BOTS', '0') == '1',
+                             model_config=os.environ.get('MODEL_CONFIG'),
+                             warm_up=os.environ.get('WARM_UP_MODELS', '0') == '1')
+# Opponent profiles are always counted, and only added to the prompts if enabled
+show_profiles = os.environ.get('SHOW_PROFILES', '0') == '1'
+game_registry = GameRegistry()
+startup_seconds = time.perf_counter() - startup_start
+model_handler.metrics.set_gauge('poker_startup_seconds', startup_seconds)
+
+@app.get("/ready")
+def get_ready():
+    # Readiness probe, 503 until the models to warm up are loaded or failed, failed models are listed and not played
+    status = dict(model_handler.registry.status(), startup_seconds=startup_seconds)
+    return JSONResponse(status, status_code=200 if status['ready'] else 503)
 
 @app.get("/standings")
-def get_standings():
-    standings = model_handler.get_standings()
+def get_standings(k: int = 10):
+    standings = model_handler.get_standings(k)
     return standings
 
+@app.get("/decision_cache")
+def get_decision_cache_stats():
+    return model_handler.decision_cache.stats()
+
+@app.get("/model_stats")
+def get_model_stats():
+    return model_handler.get_model_stats()
+
+@app.get("/profiles")
+def get_profiles(player: str = None):
+    return model_handler.profiles.to_dict(player)
+
+@app.get("/metrics")
+def get_metrics():
+    # Prometheus text exposition format
+    return PlainTextResponse(model_handler.metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+@app.get("/metrics.json")
+def get_metrics_json():
+    return model_handler.metrics.to_dict()
+
+def game_players():
+    players = model_handler.available_players()
+    if len(players) < 2:
+        raise HTTPException(status_code=503, detail=f"Fewer than 2 models could be loaded, failed: {model_handler.registry.failed()}")
+    return players
+
 @app.get("/random_game")
 def get_random_game():
-    game = PokerGame()
-    game.initialize_game()
+    game = PokerGame(game_players(), hand_store=model_handler.hand_store, metrics=model_handler.metrics,
+                     profiles=model_handler.profiles, show_profiles=show_profiles)
     game.play_game()
+    model_handler.finish_game(game)
     game_state = game.get_game_state()
-    return game_state
\ No newline at end of file
+    return game_state
+
+@app.post("/games")
+async def start_game(num_rounds: int = 1):
+    game = AsyncPokerGame(game_players(), num_rounds=num_rounds, hand_store=model_handler.hand_store,
+                          metrics=model_handler.metrics, profiles=model_handler.profiles, show_profiles=show_profiles)
+    game_registry.start_game(game, on_finish=model_handler.finish_game)
+    return {'game_id': str(game.game_id)}
+
+def get_broadcaster(game_id: int):
+    broadcaster = game_registry.get(game_id)
+    if broadcaster is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return broadcaster
+
+@app.get("/games/{game_id}/events")
+async def stream_game_events(game_id: int, start: int = 0, last_event_id: Optional[str] = Header(None)):
+    broadcaster = get_broadcaster(game_id)
+    # A reconnecting EventSource sends the id of the last event it got, and continues after it
+    if last_event_id is not None and last_event_id.isdigit():
+        start = int(last_event_id)
+
+    async def events():
+        position = start
+        async for event in broadcaster.subscribe(start):
+            position += 1
+            yield to_server_sent_event(event, position)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.websocket("/games/{game_id}/ws")
+async def stream_game_websocket(websocket: WebSocket, game_id: int, start: int = 0):
+    broadcaster = game_registry.get(game_id)
+    if broadcaster is None:
+        await websocket.close(code=4404)
+        return
+
+    await websocket.accept()
+    try:
+        async for event in broadcaster.subscribe(start):
+            await websocket.send_json(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
\ No newline at end of file
@@ -0,0 +1,83 @@
+import asyncio
+from typing import List, Optional
+
+from .events import Note
+from .poker_game import NO_REPLY, GameStatistics, PokerGame
+
+
+class AsyncPokerGame(PokerGame):
+    """
+    A poker game that awaits the players' moves instead of blocking on them,
+    so that many tables can wait on their models at the same time.
+    The rules are those of PokerGame, whose game steps are played here with async model calls.
+    """
+
+    def __init__(self, *args, move_timeout: Optional[float] = 30.0, **kwargs):
+        """
+        Initialize the game like a PokerGame. A model call taking longer than move_timeout seconds folds the player.
+        """
+
+        super().__init__(*args, **kwargs)
+        self.move_timeout = move_timeout
+
+
+    async def request_move_async(self, player_id: int, context: str, errors: str):
+        """
+        Await a player's model for a move like PokerGame.request_move, with a timeout. A model that takes too long gets NO_REPLY.
+        """
+
+        try:
+            return await self.players_dict[player_id].make_move_async(self.player_views[player_id], context + errors, timeout=self.move_timeout,
+                                                                        situation=self.move_situation(player_id, errors))
+        except asyncio.TimeoutError:
+            self.log_event(Note(text=f"Player {self.player_names[player_id]} took too long to move."))
+            self.metrics.increment('poker_timeouts_total', model=self.players_dict[player_id].model.name)
+            return NO_REPLY
+
+
+    async def run_steps_async(self, steps):
+        """
+        Play game steps like PokerGame.run_steps, awaiting request_move_async for every move they yield.
+        """
+
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(await self.request_move_async(*request))
+        except StopIteration as stop:
+            return stop.value
+
+
+    async def betting_round(self, starting_player_id: int):
+        await self.run_steps_async(self.betting_round_steps(starting_player_id))
+
+
+    async def play_round(self):
+        await self.run_steps_async(self.round_steps())
+
+
+    async def play_game(self):
+        return await self.run_steps_async(self.game_steps())
+
+
+async def play_tables(games: List[AsyncPokerGame], max_concurrent_tables: Optional[int] = None) -> List[GameStatistics]:
+    """
+    Play many independent games at once and return their statistics in the same order.
+    At most max_concurrent_tables games run at the same time if it is given.
+    """
+
+    semaphore = asyncio.Semaphore(max_concurrent_tables or len(games) or 1)
+
+    async def play_table(game: AsyncPokerGame):
+        async with semaphore:
+            return await game.play_game()
+
+    return list(await asyncio.gather(*(play_table(game) for game in games)))
+
+
+def run_tables(games: List[AsyncPokerGame], max_concurrent_tables: Optional[int] = None) -> List[GameStatistics]:
+    """
+    Blocking entry point for play_tables.
+    """
+
+    return asyncio.run(play_tables(games, max_concurrent_tables))
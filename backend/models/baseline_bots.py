@@ -0,0 +1,175 @@
+"""
+Fast rule based opponents for calibration games, e.g. to anchor the model ratings without calling any model.
+The bots set reads_situation, so players pass them the situation of PokerGame.get_situation instead of a prompt,
+and they answer with a Move based on the hand's equity from the precomputed tables.
+"""
+
+from typing import List
+
+import numpy as np
+
+from .batch_evaluator import evaluate_batch
+from .equity import calculate_equity
+from .equity_tables import MAX_OPPONENTS, equity_tables_available, hand_strength
+from .evaluator import evaluate
+from .poker_game import Move
+
+
+# Every pair of the 45 cards left on the river
+_RIVER_PAIRS = np.triu_indices(45, 1)
+
+
+def river_equity(hole_cards: List[int], board: List[int]) -> float:
+    """
+    Get the equity of two hole cards on the river against one random hand, enumerating all 990 hands.
+    """
+
+    dead = set(hole_cards) | set(board)
+    deck = np.array([card for card in range(52) if card not in dead], dtype=np.int64)
+    opponents = np.stack([deck[_RIVER_PAIRS[0]], deck[_RIVER_PAIRS[1]]], axis=1)
+    scores = evaluate_batch(np.concatenate([opponents, np.broadcast_to(np.asarray(board, dtype=np.int64), (len(opponents), 5))], axis=1))
+
+    score = evaluate(list(hole_cards) + list(board))
+    return (np.count_nonzero(scores < score) + 0.5 * np.count_nonzero(scores == score)) / len(scores)
+
+
+def estimate_equity(hole_cards: List[int], board: List[int], num_opponents: int) -> float:
+    """
+    Estimate the equity of two hole cards against num_opponents random hands.
+    Before the river it is looked up in the equity tables, on the river it is enumerated against one hand
+    and raised to the power of the number of opponents, as if the opponents' hands were independent.
+    """
+
+    num_opponents = max(1, num_opponents)
+    if len(board) == 5:
+        return river_equity(hole_cards, board) ** num_opponents
+    if equity_tables_available():
+        return hand_strength(hole_cards, board, min(num_opponents, MAX_OPPONENTS))
+    return calculate_equity(hole_cards, board, 1, samples=500, seed=0).equity ** num_opponents
+
+
+class BaselineBot:
+    """
+    A class to represent a rule based opponent. Subclasses decide with decide(situation, equity).
+    Replies the engine rejects are followed by a call, or a check if nothing is to be called.
+    """
+
+    reads_situation = True
+    # Same situation, same move, but there is nothing to gain from caching them
+    deterministic = False
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_move(self, situation: dict) -> Move:
+        if situation['errors']:
+            return self.passive(situation)
+
+        equity = estimate_equity(situation['hole_cards'], situation['board'], situation['active_players'] - 1)
+        return self.decide(situation, equity)
+
+    def decide(self, situation: dict, equity: float) -> Move:
+        raise NotImplementedError
+
+    def passive(self, situation: dict) -> Move:
+        return Move(action='call' if situation['call_amount'] > 0 else 'check', amount=0.0)
+
+    def fold_or_check(self, situation: dict) -> Move:
+        return Move(action='fold' if situation['call_amount'] > 0 else 'check', amount=0.0)
+
+    def bet(self, situation: dict, pot_fraction: float) -> Move:
+        """
+        Raise by a fraction of the pot and at least the big blind, or call if the stack does not allow a raise.
+        """
+
+        call_amount = situation['call_amount']
+        amount = call_amount + max(situation['big_blind'], round(situation['pot'] * pot_fraction))
+        amount = min(amount, situation['stack'])
+        if amount <= call_amount:
+            return self.passive(situation)
+        return Move(action='raise', amount=float(amount))
+
+    def pot_odds(self, situation: dict) -> float:
+        """
+        Get the equity needed to call profitably.
+        """
+
+        call_amount = situation['call_amount']
+        return call_amount / (situation['pot'] + call_amount) if call_amount > 0 else 0.0
+
+    def relative_strength(self, situation: dict, equity: float) -> float:
+        """
+        Get the equity relative to an even share of the pot, 1 for an average hand.
+        """
+
+        return equity * situation['active_players']
+
+
+class TightAggressiveBot(BaselineBot):
+    """
+    Plays few hands and bets them hard: raises strong hands, calls good ones at a fair price and folds the rest.
+    """
+
+    def __init__(self, name: str = 'Tight aggressive bot', raise_strength: float = 1.5, call_strength: float = 1.15):
+        super().__init__(name)
+        self.raise_strength = raise_strength
+        self.call_strength = call_strength
+
+    def decide(self, situation: dict, equity: float) -> Move:
+        strength = self.relative_strength(situation, equity)
+        if strength >= self.raise_strength:
+            return self.bet(situation, 0.75)
+        if strength >= self.call_strength and equity >= self.pot_odds(situation):
+            return self.passive(situation)
+        return self.fold_or_check(situation)
+
+
+class LoosePassiveBot(BaselineBot):
+    """
+    Plays most hands and rarely raises: calls anything but the weakest hands and only raises the very best.
+    """
+
+    def __init__(self, name: str = 'Loose passive bot', raise_strength: float = 2.2, call_strength: float = 0.6):
+        super().__init__(name)
+        self.raise_strength = raise_strength
+        self.call_strength = call_strength
+
+    def decide(self, situation: dict, equity: float) -> Move:
+        strength = self.relative_strength(situation, equity)
+        if strength >= self.raise_strength:
+            return self.bet(situation, 0.33)
+        if strength >= self.call_strength:
+            return self.passive(situation)
+        return self.fold_or_check(situation)
+
+
+class PotOddsCallerBot(BaselineBot):
+    """
+    Never raises, and calls whenever the equity beats the pot odds.
+    """
+
+    def __init__(self, name: str = 'Pot odds caller bot'):
+        super().__init__(name)
+
+    def decide(self, situation: dict, equity: float) -> Move:
+        if equity >= self.pot_odds(situation):
+            return self.passive(situation)
+        return self.fold_or_check(situation)
+
+
+class EquityThresholdBot(BaselineBot):
+    """
+    Raises above one equity threshold, calls above another and folds below, whatever the price.
+    """
+
+    def __init__(self, name: str = 'Equity threshold bot', raise_equity: float = 0.6, call_equity: float = 0.35):
+        super().__init__(name)
+        self.raise_equity = raise_equity
+        self.call_equity = call_equity
+
+    def decide(self, situation: dict, equity: float) -> Move:
+        if equity >= self.raise_equity:
+            return self.bet(situation, 0.5)
+        if equity >= self.call_equity:
+            return self.passive(situation)
+        return self.fold_or_check(situation)
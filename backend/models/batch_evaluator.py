@@ -0,0 +1,81 @@
+import numpy as np
+
+from .evaluator import load_tables
+
+
+# NumPy versions of the evaluator lookup tables, built on first use
+_CARD_KEYS = None
+_FLUSH_SUIT = None
+_FLUSH_SCORES = None
+_RANK_KEYS = None
+_RANK_SCORES = None
+
+
+def _load_arrays():
+    global _CARD_KEYS, _FLUSH_SUIT, _FLUSH_SCORES, _RANK_KEYS, _RANK_SCORES
+    if _RANK_KEYS is None:
+        card_keys, flush_suit, flush_table, rank_table = load_tables()
+        _CARD_KEYS = np.asarray(card_keys, dtype=np.int64)
+        _FLUSH_SUIT = np.asarray(flush_suit, dtype=np.int64)
+        _FLUSH_SCORES = np.asarray(flush_table, dtype=np.int64)
+
+        # The rank table is a dict in the scalar evaluator, here it is a sorted key array searched with searchsorted
+        keys = np.fromiter(rank_table.keys(), dtype=np.int64, count=len(rank_table))
+        scores = np.fromiter(rank_table.values(), dtype=np.int64, count=len(rank_table))
+        order = np.argsort(keys)
+        _RANK_KEYS = keys[order]
+        _RANK_SCORES = scores[order]
+
+
+def evaluate_batch(cards: np.ndarray) -> np.ndarray:
+    """
+    Score an (N, 7) array of encoded cards, see evaluator.py. Returns an (N,) array of scores
+    that compare exactly like the scores of evaluator.evaluate. 5 or 6 card hands work as well.
+    """
+
+    _load_arrays()
+    cards = np.asarray(cards, dtype=np.int64)
+
+    # Same packed rank and suit key as the scalar evaluator
+    keys = _CARD_KEYS[cards].sum(axis=1)
+
+    # Non-flush hands are looked up by their base 5 rank count key
+    scores = _RANK_SCORES[np.searchsorted(_RANK_KEYS, keys >> 12)]
+
+    # Hands with 5 or more cards of one suit are looked up by the rank bitmask of that suit
+    flush_suit = _FLUSH_SUIT[keys & 0xFFF]
+    is_flush = flush_suit >= 0
+    if is_flush.any():
+        flush_cards = cards[is_flush]
+        in_suit = (flush_cards & 3) == flush_suit[is_flush, None]
+        masks = np.where(in_suit, 1 << (flush_cards >> 2), 0).sum(axis=1)
+        scores[is_flush] = _FLUSH_SCORES[masks]
+
+    return scores
+
+
+def resolve_winners_batch(hole_cards: np.ndarray, boards: np.ndarray, active: np.ndarray = None):
+    """
+    Resolve N showdowns at once from (N, players, 2) hole cards and (N, 5) shared boards.
+    Players that are not active (an optional (N, players) boolean mask) cannot win, showdowns without active players have no winners.
+    Returns the (N, players) scores, a boolean mask of the winners and the share of the pot each player gets,
+    which is split evenly between tied winners.
+    """
+
+    hole_cards = np.asarray(hole_cards, dtype=np.int64)
+    boards = np.asarray(boards, dtype=np.int64)
+    num_hands, num_players, _ = hole_cards.shape
+
+    # Combine every player's hole cards with the board of their hand
+    shared = np.broadcast_to(boards[:, None, :], (num_hands, num_players, boards.shape[1]))
+    cards = np.concatenate([hole_cards, shared], axis=2).reshape(num_hands * num_players, -1)
+    scores = evaluate_batch(cards).reshape(num_hands, num_players)
+
+    winners = scores == scores.max(axis=1, keepdims=True)
+    if active is not None:
+        active = np.asarray(active, dtype=bool)
+        scores = np.where(active, scores, -1)
+        winners = active & (scores == scores.max(axis=1, keepdims=True))
+
+    shares = winners / np.maximum(winners.sum(axis=1, keepdims=True), 1)
+    return scores, winners, shares
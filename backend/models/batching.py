@@ -0,0 +1,115 @@
+import asyncio
+import time
+from typing import List
+
+from .metrics import Histogram
+from .model_client import get_session
+
+
+class BatchingModel:
+    """
+    A model adapter that coalesces the pending move requests of all running games into micro-batches,
+    each sent as one request to an inference server. A batch is sent once max_batch_size prompts are
+    waiting or max_wait seconds after its first prompt arrived, and every caller gets its own reply back.
+
+    The server is sent {"prompts": [...]} at POST {url}/generate and answers {"moves": [...]} in the same order,
+    see stub_inference_server for a local stand-in.
+    """
+
+    def __init__(self, name: str, url: str, max_batch_size: int = 16, max_wait: float = 0.01, timeout: float = 30.0):
+        assert max_batch_size >= 1, "Batches must hold at least one prompt"
+
+        self.name = name
+        self.url = url.rstrip('/')
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.timeout = timeout
+        self.session = get_session(self.url)
+
+        # Prompts waiting for the next batch as (prompt, future, time queued)
+        self._pending = []
+        self._timer = None
+        # Batches being sent, referenced until they are done so that they are not garbage collected
+        self._tasks = set()
+
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_waits = Histogram([0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0])
+
+    def get_move(self, prompt: str):
+        # Blocking callers send a batch of one
+        return self.generate([prompt])[0]
+
+    async def get_move_async(self, prompt: str):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((prompt, future, time.perf_counter()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            task = asyncio.ensure_future(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def close(self):
+        """
+        Send the prompts still waiting and wait until every batch has been answered.
+        """
+
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+
+    async def _send(self, batch):
+        sent = time.perf_counter()
+        self.batch_sizes.observe(len(batch))
+        for _, _, queued in batch:
+            self.queue_waits.observe(sent - queued)
+
+        try:
+            moves = await asyncio.to_thread(self.generate, [prompt for prompt, _, _ in batch])
+        except Exception as e:
+            moves = [e] * len(batch)
+
+        # Callers that timed out in the meantime have cancelled their futures
+        for (_, future, _), move in zip(batch, moves):
+            if future.done():
+                continue
+            if isinstance(move, Exception):
+                future.set_exception(move)
+            else:
+                future.set_result(move)
+
+    def generate(self, prompts: List[str]) -> List[str]:
+        """
+        Send one batch of prompts to the inference server and return the moves in the same order.
+        """
+
+        response = self.session.post(f"{self.url}/generate", json={'model': self.name, 'prompts': prompts}, timeout=self.timeout)
+        response.raise_for_status()
+        moves = response.json()['moves']
+        if len(moves) != len(prompts):
+            raise ValueError(f"The inference server returned {len(moves)} moves for {len(prompts)} prompts")
+        return moves
+
+    def stats(self):
+        """
+        Get the batch size and queue wait histograms.
+        """
+
+        return {
+            'batch_sizes': self.batch_sizes.to_dict(),
+            'queue_waits': self.queue_waits.to_dict()
+        }
@@ -0,0 +1,252 @@
+import base64
+import json
+import os
+import queue
+import struct
+import threading
+from typing import List, Optional
+
+from .events import event_from_dict
+from .player import Player
+from .poker_game import PokerGame
+
+
+CHECKPOINT_VERSION = 1
+SNAPSHOT_FILE = 'snapshot.json'
+JOURNAL_FILE = 'journal.jsonl'
+
+# Game parameters stored in the snapshot and passed to the game again on resume
+GAME_PARAMETERS = ('small_blind', 'big_blind', 'raises_per_round', 'tries_per_move', 'num_rounds', 'num_eliminations',
+                   'show_equity', 'equity_samples', 'show_profiles')
+
+
+def encode_rng_state(state) -> dict:
+    version, internal, gauss_next = state
+    return {'version': version, 'internal': base64.b64encode(struct.pack(f'<{len(internal)}I', *internal)).decode(), 'gauss_next': gauss_next}
+
+
+def decode_rng_state(data: dict):
+    internal = base64.b64decode(data['internal'])
+    return data['version'], struct.unpack(f'<{len(internal) // 4}I', internal), data['gauss_next']
+
+
+class Checkpointer:
+    """
+    A class to checkpoint a game into a directory at round boundaries, written by a background thread.
+    The journal (journal.jsonl) gets one line per checkpoint with the events and statistics of the rounds since
+    the previous one, so that checkpoints do not grow with the game. The snapshot (snapshot.json) holds the rest of
+    the state: money, blinds, random number generators and prompt sizes, plus the length of the journal it covers.
+    It is replaced atomically, so a crash leaves the previous snapshot, and journal lines it does not cover are ignored.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        # Written by the game loop: the game checkpointed and how much of it the journal holds
+        self._game = None
+        self._events = 0
+        self._rounds = 0
+
+        # Written by the writer thread
+        self._journal_size = 0
+        self._error = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self.num_checkpoints = 0
+
+    def begin(self, game: PokerGame, journal_size: int = 0):
+        """
+        Start checkpointing a game. A new game starts an empty journal, a resumed game keeps the first
+        journal_size bytes that its events and statistics were restored from.
+        """
+
+        self._game = game
+        self._events = len(game.event_log.events) if journal_size else 0
+        self._rounds = len(game.game_statistics.winners) if journal_size else 0
+        self._put(('truncate', journal_size))
+
+    def checkpoint(self, game: PokerGame, finished: bool = False):
+        """
+        Queue a checkpoint of a game between two rounds. Only references to the new events and statistics
+        and a copy of the small state are taken here, the writer thread does the rest.
+        """
+
+        if game is not self._game:
+            self.begin(game)
+
+        statistics = game.game_statistics
+        entry = {
+            'events': game.event_log.events[self._events:],
+            'winners': statistics.winners[self._rounds:],
+            'money_gained': [statistics.money_gained[seat][self._rounds:] for seat in range(game.num_players)],
+            'all_in_adjusted_money': [statistics.all_in_adjusted_money[seat][self._rounds:] for seat in range(game.num_players)]
+        }
+        self._events = len(game.event_log.events)
+        self._rounds = len(statistics.winners)
+
+        self._put(('checkpoint', (entry, snapshot_state(game, finished))))
+
+    def _put(self, task):
+        if self._error is not None:
+            raise RuntimeError("Writing a checkpoint failed") from self._error
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='checkpointer', daemon=True)
+            self._thread.start()
+        self._queue.put(task)
+
+    def _run(self):
+        while True:
+            # Checkpoints queued while the previous ones were written are written together, with one snapshot
+            tasks = [self._queue.get()]
+            while True:
+                try:
+                    tasks.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            checkpoints = []
+            try:
+                for task in tasks:
+                    if task is not None and task[0] == 'checkpoint':
+                        checkpoints.append(task[1])
+                        continue
+                    if checkpoints:
+                        self._write(checkpoints)
+                        checkpoints = []
+                    if task is None:
+                        return
+                    self._truncate(task[1])
+                if checkpoints:
+                    self._write(checkpoints)
+            except Exception as e:
+                self._error = e
+            finally:
+                for _ in tasks:
+                    self._queue.task_done()
+
+    def _truncate(self, journal_size: int):
+        with open(self.journal_path, 'ab') as f:
+            f.truncate(journal_size)
+        self._journal_size = journal_size
+
+    def _write(self, checkpoints):
+        lines = []
+        for entry, _ in checkpoints:
+            entry['events'] = [event.to_dict() for event in entry['events']]
+            lines.append(json.dumps(entry, separators=(',', ':')) + '\n')
+        data = ''.join(lines).encode()
+        with open(self.journal_path, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_size += len(data)
+
+        # The snapshot is replaced only once the journal lines it covers are on disk
+        state = checkpoints[-1][1]
+        state['journal_size'] = self._journal_size
+        state['rng'] = encode_rng_state(state['rng'])
+        state['equity_rng'] = encode_rng_state(state['equity_rng'])
+        temporary = f"{self.snapshot_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(state, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self.snapshot_path)
+        self.num_checkpoints += len(checkpoints)
+
+    def flush(self):
+        """
+        Wait until all queued checkpoints are written.
+        """
+
+        self._queue.join()
+        if self._error is not None:
+            raise RuntimeError("Writing a checkpoint failed") from self._error
+
+    def close(self):
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            raise RuntimeError("Writing a checkpoint failed") from self._error
+
+
+def snapshot_state(game: PokerGame, finished: bool = False) -> dict:
+    """
+    Get the state of a game between two rounds that is not in the journal.
+    The random number generator states are encoded by the writer thread.
+    """
+
+    return {
+        'version': CHECKPOINT_VERSION,
+        'game_id': game.game_id,
+        'seed': game.seed,
+        'rounds': game.game_statistics.num_rounds,
+        'finished': finished,
+        'players': [game.player_names[seat] for seat in range(game.num_players)],
+        'parameters': {name: getattr(game, name) for name in GAME_PARAMETERS},
+        'small_blind_id': game.small_blind_id,
+        'big_blind_id': game.big_blind_id,
+        'money': list(game.table.money),
+        'rng': game.rng.getstate(),
+        'equity_rng': game.equity_rng.getstate(),
+        'prompt_sizes': [[builder.num_prompts, builder.total_tokens, builder.max_tokens, builder.last_tokens]
+                         for builder in (game.players_dict[seat].context_builder for seat in range(game.num_players))]
+    }
+
+
+def load_snapshot(directory: str) -> dict:
+    with open(os.path.join(directory, SNAPSHOT_FILE)) as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version {snapshot.get('version')}, expected {CHECKPOINT_VERSION}")
+    return snapshot
+
+
+def resume_game(directory: str, players: List[Player], game_class=PokerGame, checkpointer: Optional[Checkpointer] = None, **game_kwargs) -> PokerGame:
+    """
+    Restore a game from its last checkpoint, ready to continue with play_game where it stopped.
+    The players must have the names of the checkpointed seats. Arguments that are not checkpointed, like the hand_store
+    or metrics, are passed on to the game. Rounds played after the last checkpoint are played again.
+    If a checkpointer is given, it keeps checkpointing the resumed game.
+    """
+
+    snapshot = load_snapshot(directory)
+    if snapshot['finished']:
+        raise ValueError(f"Game {snapshot['game_id']} is already finished")
+    if [player.name for player in players] != snapshot['players']:
+        raise ValueError(f"The players must be {snapshot['players']}")
+
+    game = game_class(players, money=snapshot['money'], seed=snapshot['seed'], game_id=snapshot['game_id'],
+                      **snapshot['parameters'], **game_kwargs)
+    game.small_blind_id = snapshot['small_blind_id']
+    game.big_blind_id = snapshot['big_blind_id']
+    game.rng.setstate(decode_rng_state(snapshot['rng']))
+    game.equity_rng.setstate(decode_rng_state(snapshot['equity_rng']))
+
+    # Events and statistics of the covered journal lines, events are not sent to the listeners again
+    statistics = game.game_statistics
+    with open(os.path.join(directory, JOURNAL_FILE), 'rb') as f:
+        journal = f.read(snapshot['journal_size'])
+    for line in journal.splitlines():
+        entry = json.loads(line)
+        for event in entry['events']:
+            game.event_log.append(event_from_dict(event))
+        statistics.winners.extend(entry['winners'])
+        for seat in range(game.num_players):
+            statistics.money_gained[seat].extend(entry['money_gained'][seat])
+            statistics.all_in_adjusted_money[seat].extend(entry['all_in_adjusted_money'][seat])
+    statistics.num_rounds = snapshot['rounds']
+
+    for player, sizes in zip(players, snapshot['prompt_sizes']):
+        builder = player.context_builder
+        builder.num_prompts, builder.total_tokens, builder.max_tokens, builder.last_tokens = sizes
+
+    if checkpointer is not None:
+        game.checkpointer = checkpointer
+        checkpointer.begin(game, snapshot['journal_size'])
+    return game
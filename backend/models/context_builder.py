@@ -0,0 +1,76 @@
+from typing import Optional
+
+from .events import EventView
+
+
+def estimate_tokens(text: str, chars_per_token: float = 4.0) -> int:
+    """
+    Roughly estimate the number of tokens of a text without a tokenizer.
+    """
+
+    return int(len(text) / chars_per_token) + 1
+
+
+class ContextBuilder:
+    """
+    A class to build a player's prompt context within a token budget.
+    The current round is kept verbatim, earlier rounds are replaced by their cached one line summaries
+    and the opponents' tendencies, dropping the oldest summaries first when the budget is exceeded.
+    A token_budget of None keeps the whole game verbatim.
+    """
+
+    def __init__(self, token_budget: Optional[int] = 4000, chars_per_token: float = 4.0):
+        self.token_budget = token_budget
+        self.chars_per_token = chars_per_token
+
+        # Prompt size statistics in estimated tokens
+        self.num_prompts = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.last_tokens = 0
+
+    def estimate(self, text: str) -> int:
+        return estimate_tokens(text, self.chars_per_token)
+
+    def build(self, view: EventView, additional_context: str = "", reserved_tokens: int = 0) -> str:
+        """
+        Build the context from a player's view of the game. reserved_tokens are taken by the rest of the prompt.
+        """
+
+        if self.token_budget is None:
+            context = view.text() + additional_context
+            self.record(self.estimate(context) + reserved_tokens)
+            return context
+
+        current = view.current_round_text()
+        tendencies = view.tendencies()
+        num_rounds = len(view.round_summaries())
+
+        # Fill the budget left by the verbatim parts and the omitted rounds note with the most recent summaries
+        fixed_chars = len(current) + len(additional_context) + len(tendencies) + len(f"\n{num_rounds} earlier rounds are not shown.")
+        max_chars = int((self.token_budget - reserved_tokens - 1) * self.chars_per_token) - fixed_chars
+        summaries, omitted = view.recent_summaries(max_chars)
+
+        context = f"\n{omitted} earlier rounds are not shown." if omitted else ""
+        context += tendencies + summaries + current + additional_context
+
+        self.record(self.estimate(context) + reserved_tokens)
+        return context
+
+    def record(self, tokens: int):
+        self.num_prompts += 1
+        self.total_tokens += tokens
+        self.max_tokens = max(self.max_tokens, tokens)
+        self.last_tokens = tokens
+
+    def stats(self):
+        """
+        Get the prompt size statistics in estimated tokens.
+        """
+
+        return {
+            'prompts': self.num_prompts,
+            'mean_tokens': self.total_tokens / self.num_prompts if self.num_prompts else 0.0,
+            'max_tokens': self.max_tokens,
+            'last_tokens': self.last_tokens
+        }
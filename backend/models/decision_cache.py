@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+
+def situation_key(model_name: str, situation: dict) -> str:
+    """
+    Get the cache key of a model deciding in a situation, a hash of its canonical JSON form.
+    """
+
+    canonical = json.dumps([model_name, situation], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class DecisionCache:
+    """
+    A class to cache model replies by game situation, so that repeated situations do not call the model again.
+    Replies are kept in an in-memory LRU tier of at most max_entries, and optionally in an on-disk
+    SQLite tier at path that survives restarts and is shared between processes.
+    Entries older than ttl seconds are treated as missing.
+    Only models that decide deterministically (temperature 0) should be cached, see Player.
+    """
+
+    def __init__(self, max_entries: int = 10000, ttl: Optional[float] = None, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._db = None
+        if path is not None:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS decisions (key TEXT PRIMARY KEY, reply TEXT, created REAL)")
+            self._db.commit()
+
+        # Metrics
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Get the cached reply for a key, or None.
+        """
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                reply, created = entry
+                if not self._expired(created):
+                    self._entries.move_to_end(key)
+                    self.memory_hits += 1
+                    return reply
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute("SELECT reply, created FROM decisions WHERE key = ?", (key,)).fetchone()
+                if row is not None and not self._expired(row[1]):
+                    self._remember(key, row[0], row[1])
+                    self.disk_hits += 1
+                    return row[0]
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, reply: str):
+        """
+        Cache the reply for a key in both tiers.
+        """
+
+        created = time.time()
+        with self._lock:
+            self._remember(key, reply, created)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO decisions VALUES (?, ?, ?)", (key, reply, created))
+                self._db.commit()
+
+    def _remember(self, key: str, reply: str, created: float):
+        self._entries[key] = (reply, created)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM decisions")
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def stats(self):
+        """
+        Get the cache metrics.
+        """
+
+        return {
+            'entries': len(self._entries),
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate
+        }
@@ -0,0 +1,181 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from itertools import combinations
+from math import comb, factorial
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from .batch_evaluator import resolve_winners_batch
+
+
+@dataclass
+class Equity:
+    """
+    The result of an equity calculation.
+    win and tie are the probabilities of winning alone and of splitting the pot,
+    equity is the expected share of the pot.
+    """
+
+    win: float
+    tie: float
+    equity: float
+    samples: int
+    exact: bool
+
+
+def _remaining_cards(dead_cards: List[int]) -> np.ndarray:
+    dead = set(dead_cards)
+    assert len(dead) == len(dead_cards), "Cards must not be dealt twice"
+    return np.array([card for card in range(52) if card not in dead], dtype=np.int64)
+
+
+def _sample_draws(rng: np.random.Generator, num_cards: int, num_draws: int, num_samples: int) -> np.ndarray:
+    """
+    Draw num_samples random ordered subsets of num_draws indices out of range(num_cards).
+    """
+
+    values = rng.random((num_samples, num_cards))
+    draws = np.argpartition(values, num_draws - 1, axis=1)[:, :num_draws]
+
+    # argpartition does not order the drawn indices randomly, so order them by their random values
+    order = np.argsort(np.take_along_axis(values, draws, axis=1), axis=1)
+    return np.take_along_axis(draws, order, axis=1)
+
+
+def _tally(hole_cards: List[int], board: List[int], num_opponents: int, deck: np.ndarray, draws: np.ndarray):
+    """
+    Count wins, ties and pot shares of the hero over the drawn completions.
+    Each row of draws holds the missing board cards followed by the opponents' hole cards.
+    """
+
+    num_samples = draws.shape[0]
+    missing = 5 - len(board)
+    cards = deck[draws]
+
+    boards = np.concatenate([np.broadcast_to(np.asarray(board, dtype=np.int64), (num_samples, len(board))), cards[:, :missing]], axis=1)
+    hero = np.broadcast_to(np.asarray(hole_cards, dtype=np.int64), (num_samples, 1, 2))
+    opponents = cards[:, missing:].reshape(num_samples, num_opponents, 2)
+
+    _, winners, shares = resolve_winners_batch(np.concatenate([hero, opponents], axis=1), boards)
+    split = winners.sum(axis=1) > 1
+    return int((winners[:, 0] & ~split).sum()), int((winners[:, 0] & split).sum()), float(shares[:, 0].sum())
+
+
+def _simulate(hole_cards: List[int], board: List[int], num_opponents: int, num_samples: int, seed):
+    """
+    Monte Carlo worker, also used by the process pool.
+    """
+
+    deck = _remaining_cards(hole_cards + board)
+    rng = np.random.default_rng(seed)
+    draws = _sample_draws(rng, len(deck), 5 - len(board) + 2 * num_opponents, num_samples)
+    return _tally(hole_cards, board, num_opponents, deck, draws)
+
+
+def _enumerate_draws(num_cards: int, num_board: int, num_opponents: int) -> np.ndarray:
+    """
+    Enumerate every completion of the board and every assignment of hole cards to the opponents.
+    """
+
+    rows = []
+    for board_draw in combinations(range(num_cards), num_board):
+        rest = [i for i in range(num_cards) if i not in board_draw]
+        for opponents in combinations(combinations(rest, 2), num_opponents):
+            if len(set(card for hand in opponents for card in hand)) == 2 * num_opponents:
+                rows.append(board_draw + sum(opponents, ()))
+    return np.array(rows, dtype=np.int64).reshape(len(rows), num_board + 2 * num_opponents)
+
+
+def count_outcomes(num_cards: int, num_board: int, num_opponents: int) -> int:
+    """
+    Count the outcomes an exact enumeration has to evaluate.
+    """
+
+    outcomes = comb(num_cards, num_board)
+    remaining = num_cards - num_board
+    for i in range(num_opponents):
+        outcomes *= comb(remaining - 2 * i, 2)
+    # The order of the opponents does not matter
+    return outcomes // factorial(num_opponents)
+
+
+def calculate_equity(hole_cards: List[int],
+                     board: List[int],
+                     num_opponents: int = 1,
+                     samples: int = 5000,
+                     time_budget: Optional[float] = None,
+                     seed: Optional[int] = None,
+                     exact_limit: int = 5000,
+                     executor: Optional[Executor] = None,
+                     chunks: int = 4
+    ) -> Equity:
+    """
+    Calculate the equity of two hole cards against num_opponents random hands given a partial board of 0, 3, 4 or 5 cards.
+    The outcomes are enumerated exactly if there are at most exact_limit of them, otherwise up to samples
+    seeded Monte Carlo samples are drawn, stopping early once time_budget seconds have passed.
+    If an executor (e.g. a ProcessPoolExecutor) is given, the samples are split into chunks that run on it.
+    """
+
+    assert len(hole_cards) == 2, "A player must have exactly 2 hole cards"
+    assert len(board) <= 5, "The board has at most 5 cards"
+    assert num_opponents >= 1, "There must be at least 1 opponent"
+
+    hole_cards = [int(card) for card in hole_cards]
+    board = [int(card) for card in board]
+    deck = _remaining_cards(hole_cards + board)
+    missing = 5 - len(board)
+
+    # Exact enumeration when few cards remain
+    if count_outcomes(len(deck), missing, num_opponents) <= exact_limit:
+        draws = _enumerate_draws(len(deck), missing, num_opponents)
+        wins, ties, shares = _tally(hole_cards, board, num_opponents, deck, draws)
+        total = len(draws)
+        return Equity(win=wins / total, tie=ties / total, equity=shares / total, samples=total, exact=True)
+
+    seeds = np.random.SeedSequence(seed).spawn(chunks)
+    chunk_sizes = [samples // chunks + (i < samples % chunks) for i in range(chunks)]
+
+    # Fan out the chunks to the executor, the time budget is left to the caller waiting on it
+    if executor is not None:
+        futures = [executor.submit(_simulate, hole_cards, board, num_opponents, size, chunk_seed) for size, chunk_seed in zip(chunk_sizes, seeds)]
+        results = [future.result() for future in futures]
+        total = samples
+
+    # Otherwise run the chunks in process until the samples or the time budget are used up
+    else:
+        start = time.perf_counter()
+        results = []
+        total = 0
+        for size, chunk_seed in zip(chunk_sizes, seeds):
+            results.append(_simulate(hole_cards, board, num_opponents, size, chunk_seed))
+            total += size
+            if time_budget is not None and time.perf_counter() - start > time_budget:
+                break
+
+    wins, ties, shares = (sum(values) for values in zip(*results))
+    return Equity(win=wins / total, tie=ties / total, equity=shares / total, samples=total, exact=False)
+
+
+def calculate_showdown_equity(hands: List[List[int]], board: List[int], samples: int = 5000, seed: Optional[int] = None, exact_limit: int = 5000) -> List[float]:
+    """
+    Calculate every player's expected share of the pot when all hole cards are known, e.g. after an all-in.
+    """
+
+    hands = [[int(card) for card in hand] for hand in hands]
+    board = [int(card) for card in board]
+    deck = _remaining_cards(sum(hands, []) + board)
+    missing = 5 - len(board)
+
+    if comb(len(deck), missing) <= exact_limit:
+        draws = np.array(list(combinations(range(len(deck)), missing)), dtype=np.int64).reshape(-1, missing)
+    else:
+        draws = _sample_draws(np.random.default_rng(seed), len(deck), missing, samples)
+
+    num_outcomes = draws.shape[0]
+    boards = np.concatenate([np.broadcast_to(np.asarray(board, dtype=np.int64), (num_outcomes, len(board))), deck[draws]], axis=1)
+    hole_cards = np.broadcast_to(np.asarray(hands, dtype=np.int64), (num_outcomes, len(hands), 2))
+
+    _, _, shares = resolve_winners_batch(hole_cards, boards)
+    return shares.mean(axis=0).tolist()
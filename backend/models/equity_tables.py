@@ -0,0 +1,330 @@
+"""
+Precomputed equity tables: the preflop equity of the 169 canonical starting hands and the flop and turn
+hand strength of coarse buckets of similar hands, each against 1 to MAX_OPPONENTS random hands.
+
+The tables are stored in one little endian binary file:
+    header      magic b'PKEQ', then version, max opponents, preflop hands and buckets per street as uint16
+    preflop     uint16[169][max opponents]
+    flop        uint16[buckets][max opponents]
+    turn        uint16[buckets][max opponents]
+Equities are scaled to 0-65535. The file is memory-mapped on first use, so importing this module is cheap
+and lookups only read the pages they need.
+
+Generate the tables from the backend directory with: python -m models.equity_tables --output models/data/equity_tables.bin
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import time
+from typing import List, Optional
+
+from .evaluator import CATEGORY_SHIFT, evaluate
+
+
+MAGIC = b'PKEQ'
+VERSION = 1
+HEADER = struct.Struct('<4s4H')
+SCALE = 65535
+MAX_OPPONENTS = 9
+DEFAULT_PATH = os.path.join(os.path.dirname(__file__), 'data', 'equity_tables.bin')
+
+RANK_CHARS = '23456789TJQKA'
+NUM_PREFLOP_HANDS = 169
+
+# Postflop buckets: hand category, its highest rank, flush draw, straight draw outs, board pairing and board flush
+BUCKET_SIZES = (9, 13, 2, 3, 3, 2)
+NUM_BUCKETS = 9 * 13 * 2 * 3 * 3 * 2
+
+
+def preflop_index(hole_cards: List[int]) -> int:
+    """
+    Get the index of the canonical starting hand of two hole cards in a 13 x 13 grid:
+    pairs on the diagonal, suited hands with the higher rank as the row and offsuit hands with the lower rank as the row.
+    """
+
+    high, low = sorted((hole_cards[0] >> 2, hole_cards[1] >> 2), reverse=True)
+    if hole_cards[0] & 3 == hole_cards[1] & 3:
+        return high * 13 + low
+    return low * 13 + high
+
+
+def preflop_hand_name(index: int) -> str:
+    """
+    Get the name of a canonical starting hand, e.g. 'AA', 'AKs' or 'T9o'.
+    """
+
+    row, column = divmod(index, 13)
+    if row == column:
+        return RANK_CHARS[row] * 2
+    if row > column:
+        return f"{RANK_CHARS[row]}{RANK_CHARS[column]}s"
+    return f"{RANK_CHARS[column]}{RANK_CHARS[row]}o"
+
+
+def _straight_outs(rank_mask: int) -> int:
+    """
+    Count the ranks that would complete a straight, including the wheel.
+    """
+
+    outs = 0
+    for rank in range(13):
+        if rank_mask >> rank & 1:
+            continue
+        mask = rank_mask | 1 << rank
+        # Ace also counts as the lowest card
+        mask = mask << 1 | mask >> 12
+        for low in range(10):
+            if (mask >> low) & 0x1F == 0x1F:
+                outs += 1
+                break
+    return outs
+
+
+def postflop_bucket(hole_cards: List[int], board: List[int]) -> int:
+    """
+    Get the bucket of two hole cards on a flop or turn board.
+    Hands in the same bucket have the same made hand category and highest rank of it, the same draws and a similar board.
+    """
+
+    cards = list(hole_cards) + list(board)
+    score = evaluate(cards)
+    category = score >> CATEGORY_SHIFT
+    primary = (score >> 16) & 0xF
+
+    suit_counts = [0] * 4
+    rank_mask = 0
+    for card in cards:
+        suit_counts[card & 3] += 1
+        rank_mask |= 1 << (card >> 2)
+
+    # Four to a flush that uses a hole card, or an open ended or gutshot straight draw, unless already made
+    flush_draw = int(category < 5 and any(suit_counts[card & 3] == 4 for card in hole_cards))
+    straight_outs = min(2, _straight_outs(rank_mask)) if category < 4 else 0
+
+    board_ranks = [0] * 13
+    board_suits = [0] * 4
+    for card in board:
+        board_ranks[card >> 2] += 1
+        board_suits[card & 3] += 1
+    board_pairing = min(2, max(board_ranks) - 1)
+    board_flush = int(max(board_suits) >= 3)
+
+    bucket = 0
+    for value, size in zip((category, primary, flush_draw, straight_outs, board_pairing, board_flush), BUCKET_SIZES):
+        bucket = bucket * size + value
+    return bucket
+
+
+class EquityTables:
+    """
+    A class to look up precomputed equities in a memory-mapped table file.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH):
+        import numpy as np
+
+        with open(path, 'rb') as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, max_opponents, num_preflop, num_buckets = HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} equity table file")
+        if num_preflop != NUM_PREFLOP_HANDS or num_buckets != NUM_BUCKETS:
+            raise ValueError(f"{path} does not match the hand buckets of this version")
+
+        self.max_opponents = max_opponents
+        tables = np.frombuffer(self.buffer, dtype='<u2', offset=HEADER.size).reshape(-1, max_opponents)
+        self.preflop = tables[:num_preflop]
+        self.streets = {3: tables[num_preflop:num_preflop + num_buckets],
+                        4: tables[num_preflop + num_buckets:num_preflop + 2 * num_buckets]}
+
+    def preflop_equity(self, hole_cards: List[int], num_opponents: int = 1) -> float:
+        """
+        Get the equity of two hole cards against num_opponents random hands before the flop.
+        """
+
+        assert 1 <= num_opponents <= self.max_opponents, f"There must be 1 to {self.max_opponents} opponents"
+        return int(self.preflop[preflop_index(hole_cards), num_opponents - 1]) / SCALE
+
+    def hand_strength(self, hole_cards: List[int], board: List[int], num_opponents: int = 1) -> float:
+        """
+        Get the equity of two hole cards against num_opponents random hands before the flop,
+        or the average equity of their bucket on a flop or turn board.
+        """
+
+        if not board:
+            return self.preflop_equity(hole_cards, num_opponents)
+
+        assert len(board) in self.streets, "Hand strength is tabulated before the flop, on the flop and on the turn"
+        assert 1 <= num_opponents <= self.max_opponents, f"There must be 1 to {self.max_opponents} opponents"
+        return int(self.streets[len(board)][postflop_bucket(hole_cards, board), num_opponents - 1]) / SCALE
+
+    def close(self):
+        # The arrays are views of the buffer and must be released first
+        self.preflop = self.streets = None
+        self.buffer.close()
+
+
+# The tables are loaded on first use so that importing the engine or starting the app stays cheap
+_TABLES = None
+
+
+def load_equity_tables(path: Optional[str] = None) -> EquityTables:
+    """
+    Load the default table file if it has not been loaded yet and return it, or load the given file.
+    """
+
+    global _TABLES
+    if path is not None:
+        return EquityTables(path)
+    if _TABLES is None:
+        _TABLES = EquityTables(DEFAULT_PATH)
+    return _TABLES
+
+
+def equity_tables_available() -> bool:
+    return _TABLES is not None or os.path.exists(DEFAULT_PATH)
+
+
+def preflop_equity(hole_cards: List[int], num_opponents: int = 1) -> float:
+    return load_equity_tables().preflop_equity(hole_cards, num_opponents)
+
+
+def hand_strength(hole_cards: List[int], board: List[int], num_opponents: int = 1) -> float:
+    return load_equity_tables().hand_strength(hole_cards, board, num_opponents)
+
+
+def _showdown_shares(hero, opponents, boards):
+    """
+    Get the hero's share of the pot against the first 1 to MAX_OPPONENTS opponents of each deal.
+    hero is (N, 2), opponents (N, MAX_OPPONENTS, 2) and boards (N, 5), the result is (N, MAX_OPPONENTS).
+    """
+
+    import numpy as np
+    from .batch_evaluator import evaluate_batch
+
+    num_deals = hero.shape[0]
+    hands = np.concatenate([hero[:, None, :], opponents], axis=1)
+    cards = np.concatenate([hands, np.broadcast_to(boards[:, None, :], (num_deals, MAX_OPPONENTS + 1, 5))], axis=2)
+    scores = evaluate_batch(cards.reshape(-1, 7)).reshape(num_deals, MAX_OPPONENTS + 1)
+
+    hero_scores = scores[:, :1]
+    best = np.maximum.accumulate(scores[:, 1:], axis=1)
+    ties = np.cumsum(scores[:, 1:] == hero_scores, axis=1)
+    return np.where(hero_scores > best, 1.0, np.where(hero_scores == best, 1.0 / (1 + ties), 0.0))
+
+
+def _deal_rest(rng, dead, num_rows: int, num_cards: int):
+    """
+    Draw num_rows rows of num_cards distinct cards that are not in the dead cards of each row.
+    dead is an (N, D) array, the result is (N, num_rows, num_cards).
+    """
+
+    import numpy as np
+
+    num_deals = dead.shape[0]
+    keys = rng.random((num_deals, num_rows, 52))
+    # Dead cards sort last
+    np.put_along_axis(keys, np.broadcast_to(dead[:, None, :], (num_deals, num_rows, dead.shape[1])), 2.0, axis=2)
+    return np.argpartition(keys, num_cards - 1, axis=2)[:, :, :num_cards]
+
+
+def generate_preflop(samples: int, seed: int = 0):
+    """
+    Simulate the equity of every canonical starting hand against 1 to MAX_OPPONENTS random hands.
+    """
+
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    table = np.zeros((NUM_PREFLOP_HANDS, MAX_OPPONENTS))
+    for index in range(NUM_PREFLOP_HANDS):
+        row, column = divmod(index, 13)
+        high, low = max(row, column), min(row, column)
+        hole_cards = [high << 2, low << 2 | (0 if row > column else 1)]
+
+        hero = np.broadcast_to(np.asarray(hole_cards, dtype=np.int64), (samples, 2))
+        rest = _deal_rest(rng, hero, 1, 2 * MAX_OPPONENTS + 5)[:, 0]
+        shares = _showdown_shares(hero, rest[:, 5:].reshape(samples, MAX_OPPONENTS, 2), rest[:, :5])
+        table[index] = shares.mean(axis=0)
+    return table
+
+
+def generate_street(num_board: int, situations: int, rollouts: int, seed: int = 0, prior: float = 20.0, chunk: int = 4096):
+    """
+    Estimate the average equity of every postflop bucket on boards of num_board cards from random situations,
+    each played out rollouts times. Buckets with few situations are shrunk towards the average of their hand category.
+    """
+
+    import numpy as np
+
+    rng = np.random.default_rng(seed)
+    sums = np.zeros((NUM_BUCKETS, MAX_OPPONENTS))
+    counts = np.zeros(NUM_BUCKETS)
+    missing = 5 - num_board
+
+    for start in range(0, situations, chunk):
+        num_deals = min(chunk, situations - start)
+        dealt = np.argsort(rng.random((num_deals, 52)), axis=1)[:, :2 + num_board]
+        buckets = np.array([postflop_bucket(row[:2].tolist(), row[2:].tolist()) for row in dealt])
+
+        rest = _deal_rest(rng, dealt, rollouts, missing + 2 * MAX_OPPONENTS).reshape(-1, missing + 2 * MAX_OPPONENTS)
+        hero = np.repeat(dealt[:, :2], rollouts, axis=0)
+        boards = np.concatenate([np.repeat(dealt[:, 2:], rollouts, axis=0), rest[:, :missing]], axis=1)
+        shares = _showdown_shares(hero, rest[:, missing:].reshape(-1, MAX_OPPONENTS, 2), boards)
+
+        np.add.at(sums, buckets, shares.reshape(num_deals, rollouts, MAX_OPPONENTS).mean(axis=1))
+        np.add.at(counts, buckets, 1)
+
+    # Average per hand category, or over all situations for categories that never came up
+    per_category = NUM_BUCKETS // BUCKET_SIZES[0]
+    category_sums = sums.reshape(BUCKET_SIZES[0], per_category, MAX_OPPONENTS).sum(axis=1)
+    category_counts = counts.reshape(BUCKET_SIZES[0], per_category).sum(axis=1)
+    overall = sums.sum(axis=0) / counts.sum()
+    category_means = np.where(category_counts[:, None] > 0, category_sums / np.maximum(category_counts, 1)[:, None], overall)
+    parents = np.repeat(category_means, per_category, axis=0)
+
+    return (sums + prior * parents) / (counts + prior)[:, None]
+
+
+def write_tables(path: str, preflop, flop, turn):
+    import numpy as np
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    # Written to a temporary file first so that readers never map a half written table
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, MAX_OPPONENTS, NUM_PREFLOP_HANDS, NUM_BUCKETS))
+        for table in (preflop, flop, turn):
+            f.write(np.round(np.clip(table, 0, 1) * SCALE).astype('<u2').tobytes())
+    os.replace(temporary, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--output', default=DEFAULT_PATH)
+    parser.add_argument('--preflop-samples', type=int, default=50_000, help="deals per starting hand")
+    parser.add_argument('--situations', type=int, default=200_000, help="random situations per street")
+    parser.add_argument('--rollouts', type=int, default=16, help="deals played out per situation")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    preflop = generate_preflop(args.preflop_samples, seed=args.seed)
+    print(f"preflop: {time.perf_counter() - start:.1f} s")
+    flop = generate_street(3, args.situations, args.rollouts, seed=args.seed + 1)
+    print(f"flop: {time.perf_counter() - start:.1f} s")
+    turn = generate_street(4, args.situations, args.rollouts, seed=args.seed + 2)
+    print(f"turn: {time.perf_counter() - start:.1f} s")
+
+    write_tables(args.output, preflop, flop, turn)
+    print(f"wrote {os.path.getsize(args.output):,} bytes to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
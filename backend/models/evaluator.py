@@ -0,0 +1,260 @@
+from itertools import combinations
+from typing import Iterable, List
+
+
+# Cards are encoded as small integers: the upper bits hold the rank index (0 = '2', ..., 12 = 'Ace')
+# and the lowest two bits hold the suit index, i.e. card = rank << 2 | suit.
+SUITS = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
+RANKS = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
+
+HAND_CATEGORIES = [
+    'high_card',
+    'pair',
+    'two_pair',
+    'three_of_a_kind',
+    'straight',
+    'flush',
+    'full_house',
+    'four_of_a_kind',
+    'straight_flush'
+]
+
+# A hand score is category << 20 followed by up to five 4 bit rank nibbles, so that a higher score is a better hand.
+CATEGORY_SHIFT = 20
+
+
+def make_card(rank: int, suit: int) -> int:
+    """
+    Encode a card from its rank index (0-12) and suit index (0-3).
+    """
+
+    return rank << 2 | suit
+
+
+def card_rank(card: int) -> int:
+    return card >> 2
+
+
+def card_suit(card: int) -> int:
+    return card & 3
+
+
+def card_name(card: int) -> str:
+    """
+    Get the human readable name of a card, e.g. 'Ace of Spades'.
+    """
+
+    return f"{RANKS[card >> 2]} of {SUITS[card & 3]}"
+
+
+def card_names(cards: Iterable[int]) -> List[str]:
+    return [card_name(card) for card in cards]
+
+
+def parse_card(name: str) -> int:
+    """
+    Encode a card from its human readable name, e.g. 'Ace of Spades'.
+    """
+
+    rank, _, suit = name.partition(' of ')
+    return make_card(RANKS.index(rank), SUITS.index(suit))
+
+
+def full_deck() -> List[int]:
+    return list(range(52))
+
+
+def hand_category(score: int) -> str:
+    """
+    Get the name of the hand category of a score, e.g. 'full_house'.
+    """
+
+    return HAND_CATEGORIES[score >> CATEGORY_SHIFT]
+
+
+def describe_hand(score: int) -> str:
+    """
+    Get a short human readable description of a score, e.g. 'full house (King, 10)'.
+    """
+
+    category = score >> CATEGORY_SHIFT
+    nibbles = [(score >> shift) & 0xF for shift in (16, 12, 8, 4, 0)]
+
+    # Only the ranks that define the category are shown, kickers are left out
+    shown = {0: 1, 1: 1, 2: 2, 3: 1, 4: 1, 5: 5, 6: 2, 7: 1, 8: 1}[category]
+    ranks = ', '.join(RANKS[rank] for rank in nibbles[:shown])
+    return f"{HAND_CATEGORIES[category].replace('_', ' ')} ({ranks})"
+
+
+def _score(category: int, ranks: List[int]) -> int:
+    score = category
+    for i in range(5):
+        score = (score << 4) | (ranks[i] if i < len(ranks) else 0)
+    return score
+
+
+def _straight_high(mask: int) -> int:
+    """
+    Get the rank index of the highest card of the best straight in a rank bitmask, or -1 if there is none.
+    """
+
+    for high in range(12, 3, -1):
+        if (mask >> (high - 4)) & 0x1F == 0x1F:
+            return high
+
+    # Wheel: Ace, 2, 3, 4, 5
+    if mask & 0x100F == 0x100F:
+        return 3
+
+    return -1
+
+
+def _score_rank_counts(counts: List[int]) -> int:
+    """
+    Score the best 5 card hand that can be made from rank counts when no flush is possible.
+    """
+
+    mask = 0
+    for rank in range(13):
+        if counts[rank]:
+            mask |= 1 << rank
+
+    # Ranks ordered by multiplicity first and rank second, highest first
+    ordered = sorted((rank for rank in range(13) if counts[rank]), key=lambda rank: (counts[rank], rank), reverse=True)
+    by_rank = sorted(ordered, reverse=True)
+
+    top = ordered[0]
+    if counts[top] == 4:
+        kicker = max(rank for rank in by_rank if rank != top)
+        return _score(7, [top, kicker])
+
+    if counts[top] == 3:
+        pairs = [rank for rank in ordered[1:] if counts[rank] >= 2]
+        if pairs:
+            return _score(6, [top, max(pairs)])
+
+    straight = _straight_high(mask)
+    if straight >= 0:
+        return _score(4, [straight])
+
+    if counts[top] == 3:
+        return _score(3, [top] + [rank for rank in by_rank if rank != top][:2])
+
+    if counts[top] == 2:
+        pairs = sorted((rank for rank in ordered if counts[rank] == 2), reverse=True)
+        if len(pairs) >= 2:
+            kicker = max(rank for rank in by_rank if rank not in pairs[:2])
+            return _score(2, pairs[:2] + [kicker])
+        return _score(1, [top] + [rank for rank in by_rank if rank != top][:3])
+
+    return _score(0, by_rank[:5])
+
+
+def _score_flush_mask(mask: int) -> int:
+    """
+    Score the best 5 card hand that can be made from the ranks of a single suit.
+    """
+
+    straight = _straight_high(mask)
+    if straight >= 0:
+        return _score(8, [straight])
+
+    return _score(5, [rank for rank in range(12, -1, -1) if mask >> rank & 1][:5])
+
+
+def _build_tables():
+    """
+    Precompute the lookup tables used by evaluate.
+    """
+
+    # Each card contributes 5 ** rank to the rank key (a base 5 digit count per rank)
+    # and 1 << (3 * suit) to the suit key (a 3 bit count per suit), packed into one integer.
+    card_keys = [(5 ** (card >> 2)) << 12 | 1 << (3 * (card & 3)) for card in range(52)]
+
+    # Suit of the flush for every possible suit key, -1 if there is no flush
+    flush_suit = [-1] * 4096
+    for key in range(4096):
+        for suit in range(4):
+            if (key >> (3 * suit)) & 7 >= 5:
+                flush_suit[key] = suit
+
+    flush_table = [0] * 8192
+    for mask in range(8192):
+        if bin(mask).count('1') >= 5:
+            flush_table[mask] = _score_flush_mask(mask)
+
+    # All rank multisets of 5 to 7 cards with at most 4 cards per rank
+    rank_table = {}
+    counts = [0] * 13
+
+    def fill(rank: int, remaining: int, key: int, size: int):
+        if rank == 13:
+            if size >= 5:
+                rank_table[key] = _score_rank_counts(counts)
+            return
+        for count in range(min(4, remaining) + 1):
+            counts[rank] = count
+            fill(rank + 1, remaining - count, key + count * 5 ** rank, size + count)
+        counts[rank] = 0
+
+    fill(0, 7, 0, 0)
+
+    return card_keys, flush_suit, flush_table, rank_table
+
+
+# The tables are built on first use so that importing the engine stays cheap
+_CARD_KEYS = _FLUSH_SUIT = _FLUSH_TABLE = _RANK_TABLE = None
+
+
+def load_tables():
+    """
+    Build the lookup tables if they have not been built yet and return them.
+    """
+
+    global _CARD_KEYS, _FLUSH_SUIT, _FLUSH_TABLE, _RANK_TABLE
+    if _RANK_TABLE is None:
+        _CARD_KEYS, _FLUSH_SUIT, _FLUSH_TABLE, _RANK_TABLE = _build_tables()
+
+    return _CARD_KEYS, _FLUSH_SUIT, _FLUSH_TABLE, _RANK_TABLE
+
+
+def evaluate(cards: List[int]) -> int:
+    """
+    Score the best 5 card hand that can be made from 5 to 7 encoded cards.
+    Higher scores are better hands and equal scores are ties.
+    """
+
+    if _RANK_TABLE is None:
+        load_tables()
+
+    key = 0
+    for card in cards:
+        key += _CARD_KEYS[card]
+
+    suit = _FLUSH_SUIT[key & 0xFFF]
+    if suit < 0:
+        return _RANK_TABLE[key >> 12]
+
+    mask = 0
+    for card in cards:
+        if card & 3 == suit:
+            mask |= 1 << (card >> 2)
+    return _FLUSH_TABLE[mask]
+
+
+def evaluate_slow(cards: List[int]) -> int:
+    """
+    Score a hand by scoring every 5 card subset without the lookup tables. Used to cross-check evaluate.
+    """
+
+    best = 0
+    for hand in combinations(cards, 5):
+        counts = [0] * 13
+        for card in hand:
+            counts[card >> 2] += 1
+        score = _score_rank_counts(counts)
+        if len(set(card & 3 for card in hand)) == 1:
+            mask = sum(1 << (card >> 2) for card in hand)
+            score = max(score, _score_flush_mask(mask))
+        best = max(best, score)
+    return best
@@ -0,0 +1,312 @@
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import ClassVar, List, Optional
+
+
+def _player(name: str, viewer: Optional[str]) -> str:
+    return f"{name} (you)" if name == viewer else name
+
+
+@dataclass
+class GameEvent:
+    """
+    Base class of the typed game events. render returns the event as prompt text for a viewer
+    (a player name, or None for a spectator).
+    """
+
+    type: ClassVar[str] = 'event'
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        return ""
+
+    def to_dict(self):
+        # Events are not changed once logged, so a shallow copy of their fields is enough
+        return {'type': self.type, **vars(self)}
+
+
+@dataclass
+class RoundStart(GameEvent):
+    type: ClassVar[str] = 'round_start'
+
+    round: int
+    eliminations: int
+    small_blind: float
+    big_blind: float
+    money: dict[str, float] = field(default_factory=dict)
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        text = f"\nA new round of poker is starting."
+        text += f"\n{self.eliminations} players have been eliminated."
+        text += f"\nThe small blind is {self.small_blind}."
+        text += f"\nThe big blind is {self.big_blind}."
+        for name, money in self.money.items():
+            text += f"\nPlayer {_player(name, viewer)} has {money} dollars at the start of the round."
+        return text
+
+
+@dataclass
+class ForcedBet(GameEvent):
+    type: ClassVar[str] = 'forced_bet'
+
+    player: str
+    blind: str
+    amount: float
+    all_in: bool = False
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        text = f"\nPlayer {_player(self.player, viewer)} is forced to bet {self.amount} as {self.blind} blind. "
+        if self.all_in:
+            text += f"Player {_player(self.player, viewer)} is thus all in."
+        return text
+
+
+@dataclass
+class Deal(GameEvent):
+    type: ClassVar[str] = 'deal'
+
+    hands: dict[str, List[str]] = field(default_factory=dict)
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        # Players only see their own cards, spectators see nothing
+        if viewer in self.hands:
+            return f"\nYour cards are {self.hands[viewer]}."
+        return ""
+
+
+@dataclass
+class CommunityCards(GameEvent):
+    type: ClassVar[str] = 'community_cards'
+
+    street: str
+    cards: List[str] = field(default_factory=list)
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        if self.street == 'flop':
+            return f"\nThe flop cards are {self.cards}."
+        return f"\nThe {self.street} card is {self.cards[-1]}."
+
+
+@dataclass
+class Action(GameEvent):
+    type: ClassVar[str] = 'action'
+
+    player: str
+    action: str
+    amount: float
+    pot: float
+    all_in: bool = False
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        player = _player(self.player, viewer)
+        if self.action == 'call':
+            return f"\nPlayer {player} calls by betting {self.amount}{' and is thus all in' if self.all_in else ''}."
+        if self.action == 'raise':
+            return f"\nPlayer {player} raises by betting {self.amount}."
+        if self.action == 'check':
+            return f"\nPlayer {player} checks."
+        return f"\nPlayer {player} folds."
+
+
+@dataclass
+class Showdown(GameEvent):
+    type: ClassVar[str] = 'showdown'
+
+    winners: List[str]
+    pot: float
+    hand: str
+    hands: dict[str, List[str]] = field(default_factory=dict)
+    side_pot: int = 0
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        pot = f"side pot {self.side_pot} of {self.pot}" if self.side_pot else f"pot of {self.pot}"
+        hand = f" with {self.hand}!" if self.hand else " as all other players folded."
+        if len(self.winners) == 1:
+            return f"\nPlayer {_player(self.winners[0], viewer)} wins the {pot}{hand}"
+        return f"\nPlayers {', '.join(_player(winner, viewer) for winner in self.winners)} split the {pot}{hand}"
+
+
+@dataclass
+class Note(GameEvent):
+    type: ClassVar[str] = 'note'
+
+    text: str
+
+    def render(self, viewer: Optional[str] = None) -> str:
+        return f"\n{self.text}"
+
+
+@dataclass
+class GameEnd(GameEvent):
+    type: ClassVar[str] = 'game_end'
+
+    money: dict[str, float] = field(default_factory=dict)
+
+
+EVENT_TYPES = {event.type: event for event in (RoundStart, ForcedBet, Deal, CommunityCards, Action, Showdown, Note, GameEnd)}
+
+
+def event_from_dict(data: dict) -> GameEvent:
+    """
+    Create an event from its to_dict form.
+    """
+
+    fields = {key: value for key, value in data.items() if key != 'type'}
+    return EVENT_TYPES[data['type']](**fields)
+
+
+class EventLog:
+    """
+    A class to hold the append-only list of events of a game, split into rounds.
+    """
+
+    def __init__(self):
+        self.events = []
+        self.round_starts = []
+        self._round_digests = []
+
+    def append(self, event: GameEvent):
+        if isinstance(event, RoundStart):
+            self.round_starts.append(len(self.events))
+        self.events.append(event)
+
+    def __len__(self):
+        return len(self.events)
+
+    def round_digest(self, index: int):
+        """
+        Get the action counts by player and action, and the showdowns, of a finished round.
+        They are the same for every viewer, so each round is only gone through once.
+        """
+
+        while len(self._round_digests) <= index:
+            start = self.round_starts[len(self._round_digests)]
+            end = self.round_starts[len(self._round_digests) + 1]
+            counts = {}
+            showdowns = []
+            for event in self.events[start:end]:
+                if isinstance(event, Action):
+                    player_counts = counts.setdefault(event.player, {})
+                    player_counts[event.action] = player_counts.get(event.action, 0) + 1
+                elif isinstance(event, Showdown):
+                    showdowns.append(event)
+            self._round_digests.append((self.events[start], counts, showdowns))
+        return self._round_digests[index]
+
+
+class EventView:
+    """
+    A class to render an event log as seen by one viewer. Only events added since the last call are rendered,
+    so building the text costs O(new events) rendering work. The finished rounds are joined into one cached
+    string only when the whole text is asked for, prompts within a token budget never need it.
+    """
+
+    def __init__(self, log: EventLog, viewer: Optional[str] = None):
+        self.log = log
+        self.viewer = viewer
+        self._cursor = 0
+        self._past_rounds = []
+        self._past_text = ""
+        self._past_text_rounds = 0
+        self._current = []
+
+        # Summaries of the finished rounds and the opponents' action counts over them, built on demand
+        self._summaries = []
+        self._summary_chars = [0]
+        self._tendencies = {}
+        self._tendencies_text = ""
+
+    def _update(self):
+        events = self.log.events
+        if self._cursor == len(events):
+            return
+
+        for event in events[self._cursor:]:
+            if isinstance(event, RoundStart) and self._current:
+                round_text = ''.join(self._current)
+                self._past_rounds.append(round_text)
+                self._current = []
+            self._current.append(event.render(self.viewer))
+        self._cursor = len(events)
+
+    def text(self) -> str:
+        """
+        Get the text of the whole game so far.
+        """
+
+        self._update()
+        if self._past_text_rounds < len(self._past_rounds):
+            self._past_text += ''.join(self._past_rounds[self._past_text_rounds:])
+            self._past_text_rounds = len(self._past_rounds)
+        return self._past_text + ''.join(self._current)
+
+    def current_round_text(self) -> str:
+        self._update()
+        return ''.join(self._current)
+
+    def past_rounds(self) -> List[str]:
+        """
+        Get the text of each finished round.
+        """
+
+        self._update()
+        return self._past_rounds
+
+    def round_summaries(self) -> List[str]:
+        """
+        Get a one line summary of each finished round. Summaries are cached, only new rounds are summarized.
+        """
+
+        self._update()
+        while len(self._summaries) < len(self._past_rounds):
+            summary = self._summarize(len(self._summaries))
+            self._summaries.append(summary)
+            self._summary_chars.append(self._summary_chars[-1] + len(summary))
+            self._tendencies_text = None
+        return self._summaries
+
+    def recent_summaries(self, max_chars: int):
+        """
+        Get the text of the most recent round summaries that fit in max_chars characters,
+        and the number of earlier rounds left out.
+        """
+
+        summaries = self.round_summaries()
+        total = self._summary_chars[-1]
+
+        # A budget used up by the rest of the prompt leaves out every round, not one more
+        max_chars = max(0, max_chars)
+
+        # The first summary to keep is the first one whose suffix fits
+        first = bisect_left(self._summary_chars, total - max_chars)
+        return ''.join(summaries[first:]), first
+
+    def tendencies(self) -> str:
+        """
+        Describe how often each opponent called, checked, raised and folded in the finished rounds.
+        """
+
+        self.round_summaries()
+        if self._tendencies_text is None:
+            lines = []
+            for player, counts in self._tendencies.items():
+                actions = ', '.join(f"{action} {counts.get(action, 0)}" for action in ('raise', 'call', 'check', 'fold'))
+                lines.append(f"\nPlayer {player} actions in the earlier rounds: {actions}.")
+            self._tendencies_text = ''.join(lines)
+        return self._tendencies_text
+
+    def _summarize(self, index: int) -> str:
+        start, counts, showdowns = self.log.round_digest(index)
+        chips = ', '.join(f"{_player(name, self.viewer)} {money}" for name, money in start.money.items())
+        text = f"\nRound {index + 1}: chips at the start were {chips}."
+
+        for player, player_counts in counts.items():
+            if player != self.viewer:
+                totals = self._tendencies.setdefault(player, {})
+                for action, count in player_counts.items():
+                    totals[action] = totals.get(action, 0) + count
+
+        for event in showdowns:
+            winners = ' and '.join(_player(winner, self.viewer) for winner in event.winners)
+            text += f" {winners} won {event.pot}{f' with {event.hand}' if event.hand else ''}."
+
+        return text
@@ -0,0 +1,294 @@
+from dataclasses import dataclass, field
+import mmap
+import os
+import struct
+import time
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+
+# Actions are stored as small integer codes
+ACTIONS = ['fold', 'check', 'call', 'raise', 'small_blind', 'big_blind']
+ACTION_CODES = {action: code for code, action in enumerate(ACTIONS)}
+
+MAX_SEATS = 10
+NO_CARD = 0xFF
+NO_MODEL = 0xFFFF
+
+LOG_MAGIC = b'LLMPHH02'
+
+# Money is stored in whole chips as 64 bit integers, 32 bit floats would lose chips above 2 ** 24
+# Fixed size part of a log record: record length, timestamp, game id, hand number, players, board cards, actions, pot
+_HEADER = struct.Struct('<IdQIBBHq')
+_BOARD = struct.Struct('<5B')
+# Per player: model id, two hole cards, money gained
+_SEAT = struct.Struct('<HBBq')
+# Per action: seat, action code, amount
+_ACTION = struct.Struct('<BBq')
+
+# One fixed size index entry per hand, memory mapped as a NumPy structured array
+INDEX_DTYPE = np.dtype([
+    ('offset', '<u8'),
+    ('timestamp', '<f8'),
+    ('game_id', '<u8'),
+    ('hand', '<u4'),
+    ('num_players', 'u1'),
+    ('models', '<u2', (MAX_SEATS,)),
+    ('deltas', '<i8', (MAX_SEATS,)),
+])
+
+
+@dataclass
+class HandRecord:
+    """
+    A class to represent one finished hand in the hand history.
+    actions holds (seat, action, amount) tuples in the order they happened.
+    """
+
+    game_id: int
+    hand: int
+    model_names: List[str]
+    hole_cards: List[List[int]]
+    board: List[int]
+    pot: float
+    deltas: List[float]
+    actions: List[Tuple[int, str, float]] = field(default_factory=list)
+    timestamp: float = 0.0
+
+
+class HandStore:
+    """
+    A class to store the hand history in a directory as an append-only binary log (hands.log),
+    a fixed size index entry per hand (hands.idx) and the list of model names (models.txt).
+    Hands are written in batches and read back through memory mapped files.
+    """
+
+    def __init__(self, path: str, batch_size: int = 1000):
+        self.path = path
+        self.batch_size = batch_size
+        os.makedirs(path, exist_ok=True)
+
+        self.log_path = os.path.join(path, 'hands.log')
+        self.index_path = os.path.join(path, 'hands.idx')
+        self.models_path = os.path.join(path, 'models.txt')
+
+        if not os.path.exists(self.log_path):
+            with open(self.log_path, 'wb') as f:
+                f.write(LOG_MAGIC)
+
+        with open(self.log_path, 'rb') as f:
+            assert f.read(len(LOG_MAGIC)) == LOG_MAGIC, f"{self.log_path} is not a hand history log"
+
+        self.model_names = []
+        if os.path.exists(self.models_path):
+            with open(self.models_path) as f:
+                self.model_names = [line.rstrip('\n') for line in f]
+        self.model_ids = {name: i for i, name in enumerate(self.model_names)}
+
+        self._pending = []
+        self._last_timestamp = 0.0
+        self._index = None
+        self._index_size = -1
+        self._log = None
+        self._log_size = -1
+
+    def model_id(self, name: str) -> int:
+        if name not in self.model_ids:
+            self.model_ids[name] = len(self.model_names)
+            self.model_names.append(name)
+            with open(self.models_path, 'a') as f:
+                f.write(name + '\n')
+        return self.model_ids[name]
+
+    def append(self, record: HandRecord):
+        """
+        Queue a hand to be written, the queue is written once batch_size hands are pending.
+        """
+
+        assert len(record.model_names) <= MAX_SEATS, f"At most {MAX_SEATS} seats can be stored"
+
+        # Timestamps never decrease so that time ranges can be found by binary search
+        record.timestamp = max(record.timestamp or time.time(), self._last_timestamp)
+        self._last_timestamp = record.timestamp
+
+        self._pending.append(record)
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all pending hands to the log and the index.
+        """
+
+        if not self._pending:
+            return
+
+        index = np.zeros(len(self._pending), dtype=INDEX_DTYPE)
+        index['models'] = NO_MODEL
+
+        with open(self.log_path, 'ab') as log:
+            offset = log.tell()
+            chunks = []
+            for i, record in enumerate(self._pending):
+                data = self._encode(record)
+                chunks.append(data)
+
+                entry = index[i]
+                entry['offset'] = offset
+                entry['timestamp'] = record.timestamp
+                entry['game_id'] = record.game_id
+                entry['hand'] = record.hand
+                entry['num_players'] = len(record.model_names)
+                entry['models'][:len(record.model_names)] = [self.model_id(name) for name in record.model_names]
+                entry['deltas'][:len(record.deltas)] = [round(delta) for delta in record.deltas]
+                offset += len(data)
+
+            log.write(b''.join(chunks))
+
+        with open(self.index_path, 'ab') as f:
+            f.write(index.tobytes())
+
+        self._pending = []
+
+    def close(self):
+        self.flush()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        self._index = None
+
+    def _encode(self, record: HandRecord) -> bytes:
+        board = list(record.board) + [NO_CARD] * (5 - len(record.board))
+        parts = [b'', _BOARD.pack(*board)]
+        for seat, name in enumerate(record.model_names):
+            hole_cards = list(record.hole_cards[seat]) + [NO_CARD] * (2 - len(record.hole_cards[seat]))
+            parts.append(_SEAT.pack(self.model_id(name), hole_cards[0], hole_cards[1], round(record.deltas[seat])))
+        for seat, action, amount in record.actions:
+            parts.append(_ACTION.pack(seat, ACTION_CODES[action], round(amount)))
+
+        body = b''.join(parts)
+        header = _HEADER.pack(_HEADER.size + len(body), record.timestamp, record.game_id, record.hand,
+                              len(record.model_names), len(record.board), len(record.actions), round(record.pot))
+        return header + body
+
+    def _decode(self, data, offset: int) -> HandRecord:
+        _, timestamp, game_id, hand, num_players, num_board, num_actions, pot = _HEADER.unpack_from(data, offset)
+        offset += _HEADER.size
+
+        board = list(_BOARD.unpack_from(data, offset))[:num_board]
+        offset += _BOARD.size
+
+        model_names, hole_cards, deltas = [], [], []
+        for _ in range(num_players):
+            model, first, second, delta = _SEAT.unpack_from(data, offset)
+            offset += _SEAT.size
+            model_names.append(self.model_names[model])
+            hole_cards.append([card for card in (first, second) if card != NO_CARD])
+            deltas.append(delta)
+
+        actions = []
+        for _ in range(num_actions):
+            seat, action, amount = _ACTION.unpack_from(data, offset)
+            offset += _ACTION.size
+            actions.append((seat, ACTIONS[action], amount))
+
+        return HandRecord(game_id=game_id, hand=hand, model_names=model_names, hole_cards=hole_cards, board=board,
+                          pot=pot, deltas=deltas, actions=actions, timestamp=timestamp)
+
+    def index(self) -> np.ndarray:
+        """
+        Get the memory mapped index, one entry per written hand.
+        """
+
+        size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+        if size != self._index_size:
+            count = size // INDEX_DTYPE.itemsize
+            self._index = np.memmap(self.index_path, dtype=INDEX_DTYPE, mode='r', shape=(count,)) if count else np.zeros(0, dtype=INDEX_DTYPE)
+            self._index_size = size
+        return self._index
+
+    def _log_map(self):
+        size = os.path.getsize(self.log_path)
+        if size != self._log_size:
+            if self._log is not None:
+                self._log.close()
+            with open(self.log_path, 'rb') as f:
+                self._log = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._log_size = size
+        return self._log
+
+    def query(self, model: Optional[str] = None, game_id: Optional[int] = None,
+              start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+        """
+        Get the positions of the written hands played by a model, at a game, and/or in the time range [start, end).
+        """
+
+        index = self.index()
+
+        # Timestamps are sorted, so the time range is a contiguous slice
+        low = 0 if start is None else int(np.searchsorted(index['timestamp'], start, side='left'))
+        high = len(index) if end is None else int(np.searchsorted(index['timestamp'], end, side='left'))
+        positions = np.arange(low, high)
+        entries = index[low:high]
+
+        mask = np.ones(len(entries), dtype=bool)
+        if model is not None:
+            if model not in self.model_ids:
+                return positions[:0]
+            mask &= (entries['models'] == self.model_ids[model]).any(axis=1)
+        if game_id is not None:
+            mask &= entries['game_id'] == game_id
+
+        return positions[mask]
+
+    def read(self, positions) -> Iterator[HandRecord]:
+        """
+        Lazily decode the hands at the given index positions.
+        """
+
+        index = self.index()
+        log = self._log_map()
+        for position in positions:
+            yield self._decode(log, int(index['offset'][position]))
+
+    def last_hands(self, model: str, count: int) -> Iterator[HandRecord]:
+        return self.read(self.query(model=model)[-count:])
+
+    def model_totals(self, positions=None):
+        """
+        Sum the hands played, money gained and squared money gained per model over the given
+        index positions (all hands by default), without decoding the log.
+        """
+
+        index = self.index() if positions is None else self.index()[positions]
+        models = index['models'].ravel()
+        deltas = index['deltas'].ravel().astype(np.float64)
+        seated = models != NO_MODEL
+
+        num_models = len(self.model_names)
+        hands = np.bincount(models[seated], minlength=num_models)
+        chips = np.bincount(models[seated], weights=deltas[seated], minlength=num_models)
+        chips_squared = np.bincount(models[seated], weights=deltas[seated] ** 2, minlength=num_models)
+
+        return {name: (int(hands[i]), float(chips[i]), float(chips_squared[i])) for i, name in enumerate(self.model_names)}
+
+    def game_totals(self):
+        """
+        Get every game in the order it started as (model names per seat, money gained per seat over the game).
+        """
+
+        index = self.index()
+        if len(index) == 0:
+            return []
+
+        game_ids, first, inverse = np.unique(index['game_id'], return_index=True, return_inverse=True)
+        totals = np.zeros((len(game_ids), MAX_SEATS))
+        np.add.at(totals, inverse, index['deltas'])
+
+        games = []
+        for game in np.argsort(first, kind='stable'):
+            entry = index[first[game]]
+            seats = int(entry['num_players'])
+            games.append(([self.model_names[model] for model in entry['models'][:seats]], totals[game, :seats].tolist()))
+        return games
@@ -0,0 +1,182 @@
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+import threading
+import time
+from typing import List
+
+
+# Bucket bounds in seconds for timers
+DURATION_BOUNDS = [0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0]
+
+
+class Histogram:
+    """
+    A class to count observations in fixed buckets, bucket i counting the values up to bounds[i]
+    and the last bucket the values above all bounds.
+    """
+
+    def __init__(self, bounds: List[float]):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        return {
+            'bounds': self.bounds,
+            'counts': self.counts,
+            'count': self.count,
+            'mean': self.sum / self.count if self.count else 0.0
+        }
+
+
+def _labels_key(labels: dict):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(key, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in key]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+class Metrics:
+    """
+    A class to collect counters, gauges and timers of the game loop, each identified by a name and labels.
+    Read them in process with to_dict, or export them in the Prometheus text format with to_prometheus.
+    """
+
+    enabled = True
+
+    def __init__(self):
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set_gauge(self, name: str, value: float, **labels):
+        self.gauges[(name, _labels_key(labels))] = value
+
+    def get_counter(self, name: str, **labels) -> float:
+        """
+        Get the total of a counter over all label values that match the given labels.
+        """
+
+        wanted = set(labels.items())
+        with self._lock:
+            return sum(value for (other, key), value in self.counters.items() if other == name and wanted <= set(key))
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = (name, _labels_key(labels))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(DURATION_BOUNDS)
+            histogram.observe(seconds)
+
+    @contextmanager
+    def _timer(self, name: str, labels: dict):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def timer(self, name: str, **labels):
+        """
+        Time a block of code: with metrics.timer('poker_showdown_seconds'): ...
+        """
+
+        return self._timer(name, labels)
+
+    def to_dict(self):
+        """
+        Get all metrics as a JSON serializable dict of name -> list of {labels, value}.
+        """
+
+        stats = {}
+        with self._lock:
+            for (name, key), value in self.counters.items():
+                stats.setdefault(name, []).append({'labels': dict(key), 'value': value})
+            for (name, key), value in self.gauges.items():
+                stats.setdefault(name, []).append({'labels': dict(key), 'value': value})
+            for (name, key), histogram in self.histograms.items():
+                stats.setdefault(name, []).append({'labels': dict(key), **histogram.to_dict()})
+        return stats
+
+    def to_prometheus(self) -> str:
+        """
+        Export all metrics in the Prometheus text exposition format.
+        """
+
+        lines = []
+        with self._lock:
+            for kind, metrics in (('counter', self.counters), ('gauge', self.gauges)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# TYPE {name} {kind}")
+                    for (other, key), value in metrics.items():
+                        if other == name:
+                            lines.append(f"{name}{_format_labels(key)} {value}")
+
+            for name in sorted({name for name, _ in self.histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (other, key), histogram in self.histograms.items():
+                    if other != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(histogram.bounds + ['+Inf'], histogram.counts):
+                        cumulative += count
+                        le = f'le="{bound}"'
+                        lines.append(f"{name}_bucket{_format_labels(key, le)} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.sum}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+
+        return '\n'.join(lines) + '\n'
+
+
+class NullMetrics:
+    """
+    Metrics that record nothing, used when instrumentation is disabled so that the hooks cost a no-op call.
+    """
+
+    enabled = False
+
+    def increment(self, name: str, amount: float = 1, **labels):
+        pass
+
+    def set_gauge(self, name: str, value: float, **labels):
+        pass
+
+    def get_counter(self, name: str, **labels) -> float:
+        return 0
+
+    def observe(self, name: str, seconds: float, **labels):
+        pass
+
+    def timer(self, name: str, **labels):
+        return _NULL_TIMER
+
+    def to_dict(self):
+        return {}
+
+    def to_prometheus(self) -> str:
+        return ""
+
+
+_NULL_TIMER = nullcontext()
+NULL_METRICS = NullMetrics()
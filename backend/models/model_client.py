@@ -0,0 +1,205 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+# One connection pool per backend host, shared by all clients of that backend
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def get_session(url: str, pool_size: int = 16) -> requests.Session:
+    """
+    Get the shared session holding the persistent connections to the backend of a url.
+    """
+
+    parts = urlsplit(url)
+    backend = f"{parts.scheme}://{parts.netloc}"
+    with _sessions_lock:
+        if backend not in _sessions:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount(backend, adapter)
+            _sessions[backend] = session
+        return _sessions[backend]
+
+
+class TokenBucket:
+    """
+    A class to limit a request rate: tokens refill at rate per second up to capacity and each request takes one.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take a token and return how many seconds to wait before it may be used.
+        """
+
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def acquire(self):
+        time.sleep(self.reserve())
+
+
+class CircuitBreaker:
+    """
+    A class to stop calling a failing backend. After failure_threshold consecutive failures the circuit opens
+    and calls are refused for reset_timeout seconds, then one trial call is let through (half open)
+    which closes the circuit on success and opens it again on failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class ModelClient:
+    """
+    A model that asks a backend for moves over HTTP: POST url with {"model": name, "prompt": prompt},
+    answered with {"move": move}.
+    Requests go through a persistent connection pool per backend, a token bucket limiting the requests
+    per second of this model and a cap on concurrent requests. Failed requests (connection errors,
+    429 and 5xx responses) are retried with jittered exponential backoff until the deadline, and a
+    circuit breaker stops calling a failing backend. Whenever no move can be obtained the default action
+    is played instead, so a game never stalls on a broken backend.
+    """
+
+    def __init__(self, name: str, url: str, rate: float = 10.0, burst: Optional[float] = None, max_concurrency: int = 8,
+                 max_retries: int = 3, backoff: float = 0.1, max_backoff: float = 5.0, deadline: float = 30.0,
+                 request_timeout: float = 10.0, failure_threshold: int = 5, reset_timeout: float = 30.0,
+                 default_action: str = 'fold'):
+        self.name = name
+        self.url = url
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.request_timeout = request_timeout
+        self.default_action = default_action
+
+        self.session = get_session(url, pool_size=max_concurrency)
+        self.bucket = TokenBucket(rate, burst)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        # Jitter has its own random stream, the module's is seeded by tournaments and replays to deal the same cards
+        self._jitter = random.Random()
+
+        # Metrics
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.fallbacks = 0
+
+    def get_move(self, prompt: str):
+        if not self.breaker.allow():
+            self.fallbacks += 1
+            return self.default_action
+
+        try:
+            move = self.request(prompt)
+        except (requests.RequestException, KeyError, ValueError):
+            self.failures += 1
+            self.fallbacks += 1
+            self.breaker.record_failure()
+            return self.default_action
+
+        self.breaker.record_success()
+        return move
+
+    async def get_move_async(self, prompt: str):
+        return await asyncio.to_thread(self.get_move, prompt)
+
+    def request(self, prompt: str) -> str:
+        """
+        Ask the backend for a move, retrying until max_retries or the deadline is reached.
+        """
+
+        deadline = time.monotonic() + self.deadline
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            try:
+                with self.semaphore:
+                    self.requests += 1
+                    timeout = min(self.request_timeout, max(0.001, deadline - time.monotonic()))
+                    response = self.session.post(self.url, json={'model': self.name, 'prompt': prompt}, timeout=timeout)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    response.raise_for_status()
+                    return response.json()['move']
+                error = requests.HTTPError(f"{response.status_code} from {self.url}", response=response)
+                retry_after = response.headers.get('Retry-After')
+            except (requests.ConnectionError, requests.Timeout) as e:
+                error, retry_after = e, None
+
+            # Full jitter backoff, or the server's Retry-After if it sent one
+            delay = float(retry_after) if retry_after and retry_after.replace('.', '', 1).isdigit() else \
+                self._jitter.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+            attempt += 1
+            if attempt > self.max_retries or time.monotonic() + delay >= deadline:
+                raise error
+
+            self.retries += 1
+            time.sleep(delay)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'failures': self.failures,
+            'fallbacks': self.fallbacks,
+            'circuit': self.breaker.state
+        }
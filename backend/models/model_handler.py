@@ -1,47 +1,138 @@
+from .decision_cache import DecisionCache
+from .metrics import Metrics, NULL_METRICS
 from .player import Player
+from .profiles import OpponentProfiles
+from .ratings import Leaderboard
+from .registry import ModelRegistry, ModelSpec, load_specs
 import random
 
+# The rule based bots by name, declared by factory so that baseline_bots (and NumPy) is only imported if they play
+BASELINE_BOT_SPECS = {
+    'TAG bot': '.baseline_bots:TightAggressiveBot',
+    'Loose passive bot': '.baseline_bots:LoosePassiveBot',
+    'Pot odds bot': '.baseline_bots:PotOddsCallerBot',
+    'Equity threshold bot': '.baseline_bots:EquityThresholdBot'
+}
+
 class ModelHandler:
-    def __init__(self):
-        self.models = self.load_models()
+    def __init__(self, hand_store_path: str = None, decision_cache_path: str = None, inference_url: str = None, model_urls: dict = None, enable_metrics: bool = True,
+                 baseline_bots: bool = False, model_config: str = None, warm_up: bool = False):
+        # LLaMA moves are batched across tables and sent to a local inference server, if one is configured
+        self.inference_url = inference_url
+        # Models with a url get their moves from that backend through a pooled, rate limited client
+        self.model_urls = model_urls or {}
+        # Rule based bots join the games to anchor the ratings of the models, if enabled
+        self.baseline_bots = baseline_bots
+        # More models, or other backends for the built in ones, can be declared in a JSON file, see registry.py
+        self.model_config = model_config
+        # Replies of deterministic models are cached in memory, and on disk if a path is configured
+        self.decision_cache = DecisionCache(path=decision_cache_path)
+        # Timers, counters and gauges of the players and the games they play, exported at /metrics
+        self.metrics = Metrics() if enable_metrics else NULL_METRICS
+        # VPIP, PFR, aggression and more of each model over all games, streamed in by the games
+        self.profiles = OpponentProfiles()
+        # Models are built on their first move, or in the background if warm_up is set
+        self.registry = ModelRegistry(self.declare_models(warm_up), metrics=self.metrics)
+        self.models = self.registry.lazy_models()
         self.players = self.initialize_players()
+        self.leaderboard = Leaderboard()
+        for name in self.models:
+            self.leaderboard.get_rating(name)
+
+        # Hands are persisted to and standings rebuilt from the hand history store, if one is configured
+        self.hand_store = None
+        if hand_store_path:
+            from .hand_store import HandStore
+            self.hand_store = HandStore(hand_store_path)
+            self.leaderboard.load_hand_store(self.hand_store)
 
-    def load_models(self):
-        # Initialize models based on available LLMs
-        return {
-            'GPT-4': GPT4Model(),
-            'LLaMA': LLaMAModel(),
+        self.registry.warm_up()
+
+    def declare_models(self, warm_up: bool = False):
+        # Declare the models based on available LLMs, none of them is imported or built here
+        specs = [
+            ModelSpec('GPT-4', '.model_handler:GPT4Model', warm_up=warm_up),
+            ModelSpec('LLaMA', '.batching:BatchingModel', {'name': 'LLaMA', 'url': self.inference_url}, warm_up=warm_up) if self.inference_url
+            else ModelSpec('LLaMA', '.model_handler:LLaMAModel', warm_up=warm_up),
             # Add more models as needed
-        }
+        ]
+        for name, url in self.model_urls.items():
+            specs.append(ModelSpec(name, '.model_client:ModelClient', {'name': name, 'url': url}, warm_up=warm_up))
+        if self.baseline_bots:
+            specs.extend(ModelSpec(name, factory, {'name': name}, warm_up=warm_up) for name, factory in BASELINE_BOT_SPECS.items())
+        if self.model_config:
+            specs.extend(load_specs(self.model_config))
+        return specs
 
     def initialize_players(self):
         players = []
         for name, model in self.models.items():
-            players.append(Player(name=name, model=model))
+            players.append(Player(name=name, model=model, decision_cache=self.decision_cache, metrics=self.metrics))
         return players
 
-    def get_standings(self):
-        # Calculate standings based on game results
-        standings = {}
-        for player in self.players:
-            standings[player.name] = len(player.history)  # Example metric
-        sorted_standings = dict(sorted(standings.items(), key=lambda item: item[1], reverse=True))
-        return sorted_standings
+    def available_players(self):
+        # Players whose model failed to load are left out of new games, /ready lists them
+        failed = set(self.registry.failed())
+        return [player for player in self.players if player.name not in failed]
+
+    def get_standings(self, k: int = 10):
+        # Ratings are updated incrementally after each game, so this only reads the top k
+        return {rating['name']: rating for rating in self.leaderboard.top(k)}
+
+    def record_game(self, model_names, statistics):
+        # Update the ratings with a finished game whose seats were played by model_names
+        self.leaderboard.update(model_names, statistics)
+
+    def finish_game(self, game):
+        # Rate a game played through the API and persist its hands
+        self.record_game([game.player_names[seat] for seat in range(game.num_players)], game.game_statistics)
+        if self.hand_store is not None:
+            self.hand_store.flush()
+
+    def get_model_stats(self):
+        # Batching and client statistics of the models that report them
+        stats = {name: model.stats() for name, model in self.registry.loaded.items() if hasattr(model, 'stats')}
+
+        # Model calls per decision from the game metrics, 1 if no move had to be asked for again
+        for name in self.models:
+            decisions = self.metrics.get_counter('poker_decisions_total', model=name)
+            if decisions:
+                retries = self.metrics.get_counter('poker_retries_total', model=name)
+                stats.setdefault(name, {})['moves'] = {
+                    'decisions': decisions,
+                    'retry_rate': retries / decisions,
+                    'calls_per_decision': 1 + retries / decisions,
+                    'corrected': self.metrics.get_counter('poker_corrected_moves_total', model=name),
+                    'forced_folds': self.metrics.get_counter('poker_forced_folds_total', model=name)
+                }
+        return stats
 
 class GPT4Model:
     def __init__(self):
         self.name = 'GPT-4'
+        # Set for temperature 0 backends, whose replies to the same situation are cached
+        self.deterministic = False
 
-    def get_move(self, history):
+    def get_move(self, prompt):
         # Integrate with OpenAI API to get move
         # For example purposes, return a random move
         return random.choice(['fold', 'check', 'call', 'raise'])
 
+    async def get_move_async(self, prompt):
+        # Integrate with the async OpenAI client to get move
+        return self.get_move(prompt)
+
 class LLaMAModel:
     def __init__(self):
         self.name = 'LLaMA'
+        # Set for temperature 0 backends, whose replies to the same situation are cached
+        self.deterministic = False
 
-    def get_move(self, history):
+    def get_move(self, prompt):
         # Integrate with LLaMA API to get move
         # For example purposes, return a random move
-        return random.choice(['fold', 'check', 'call', 'raise'])
\ No newline at end of file
+        return random.choice(['fold', 'check', 'call', 'raise'])
+
+    async def get_move_async(self, prompt):
+        # Integrate with an async LLaMA client to get move
+        return self.get_move(prompt)
\ No newline at end of file
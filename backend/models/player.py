@@ -1,36 +1,134 @@
+import asyncio
+import inspect
+from typing import Optional, Union
+
+from .context_builder import ContextBuilder
+from .decision_cache import DecisionCache, situation_key
+from .events import EventView
+from .metrics import NULL_METRICS
+
+
 class Player:
-    def __init__(self, name, model):
+    def __init__(self, name, model, context_builder: Optional[ContextBuilder] = None, decision_cache: Optional[DecisionCache] = None,
+                 metrics = None):
         self.name = name
         self.model = model
         self.history = []
         self.context = ""
+        # Keeps the prompt within a token budget when the game state is passed as an EventView
+        self.context_builder = context_builder or ContextBuilder()
+        # Replies are only cached for models marked as deterministic, e.g. temperature 0 backends
+        self.decision_cache = decision_cache
+        # Prompt building and model call durations and prompt sizes, per model
+        self.metrics = metrics or NULL_METRICS
         self.base_prompt = """You are a poker player playing texas holdem poker against other players.
         You're goal is to win the game consisting of multiple rounds by any strategy you can devise.
         """
 
 
-    def make_move(self, game_state: str, additional_context: str = ""):
+    def make_move(self, game_state: Union[str, EventView], additional_context: str = "", situation: Optional[dict] = None):
+        move, key = self._cached_move(situation)
+        if move is None:
+            prompt = self._build_prompt(game_state, additional_context)
 
-        # Fetch current game state and update history
-        self.update_context(game_state, additional_context)
+            # Get move from LLM
+            with self.metrics.timer('poker_model_call_seconds', model=self.model.name):
+                move = self.model.get_move(prompt)
+            self._remember(key, move)
 
-        # Get move from LLM
-        move = self.model.get_move(self.history, raise_allowed)
         # Record move in history
         self.history.append(move)
         return move
 
-    def update_context(self, game_state: str, additional_context: str = ""):
-        # Add '(you)' after player's name
-        self.context = game_state.replace(self.name, f"{self.name} (you)")
+    async def make_move_async(self, game_state: Union[str, EventView], additional_context: str = "", timeout: float = None, situation: Optional[dict] = None):
+        move, key = self._cached_move(situation)
+        if move is None:
+            prompt = self._build_prompt(game_state, additional_context)
+
+            # Async models are awaited directly, blocking models run in a worker thread
+            if hasattr(self.model, 'get_move_async'):
+                call = self.model.get_move_async(prompt)
+            elif inspect.iscoroutinefunction(self.model.get_move):
+                call = self.model.get_move(prompt)
+            else:
+                call = asyncio.to_thread(self.model.get_move, prompt)
+
+            # Raises asyncio.TimeoutError if the model takes longer than timeout seconds
+            with self.metrics.timer('poker_model_call_seconds', model=self.model.name):
+                move = await asyncio.wait_for(call, timeout)
+            self._remember(key, move)
+
+        self.history.append(move)
+        return move
+
+    def _cached_move(self, situation: Optional[dict]):
+        """
+        Get the move of a rule based model, which decides from the situation and needs no prompt,
+        or the cached reply to the same situation. Returns the move, None if the model must be asked,
+        and the decision cache key to remember its reply under.
+        """
+
+        if situation is not None and getattr(self.model, 'reads_situation', False):
+            return self.model.get_move(situation), None
+
+        key = self.cache_key(situation)
+        return (self.decision_cache.get(key) if key else None), key
+
+    def _remember(self, key: Optional[str], move):
+        if key and isinstance(move, str):
+            self.decision_cache.put(key, move)
+
+    def _build_prompt(self, game_state: Union[str, EventView], additional_context: str = "") -> str:
+        # The prompt is built locally since the same player can sit at several tables at once, self.context is the latest
+        with self.metrics.timer('poker_prompt_build_seconds', model=self.model.name):
+            context = self.build_context(game_state, additional_context)
+            self.context = context
+            prompt = self.base_prompt + context
+        self._record_prompt(prompt)
+        return prompt
+
+    def _record_prompt(self, prompt: str):
+        if self.metrics.enabled:
+            self.metrics.set_gauge('poker_prompt_tokens', self.context_builder.estimate(prompt), player=self.name)
+
+    def uses_situation(self) -> bool:
+        """
+        Whether the model decides from the situation or its replies are cached by it, otherwise none needs to be built.
+        """
+
+        return getattr(self.model, 'reads_situation', False) or (self.decision_cache is not None and getattr(self.model, 'deterministic', False))
+
+    def cache_key(self, situation: Optional[dict]) -> Optional[str]:
+        """
+        Get the decision cache key of a situation, or None if the move should not be cached.
+        """
+
+        if self.decision_cache is None or situation is None or not getattr(self.model, 'deterministic', False):
+            return None
+        return situation_key(self.model.name, situation)
+
+    def update_context(self, game_state: Union[str, EventView], additional_context: str = ""):
+        self.context = self.build_context(game_state, additional_context)
+
+    def build_context(self, game_state: Union[str, EventView], additional_context: str = ""):
+        # A view of the game is shortened to fit the token budget
+        if isinstance(game_state, EventView):
+            reserved_tokens = self.context_builder.estimate(self.base_prompt)
+            return self.context_builder.build(game_state, additional_context, reserved_tokens=reserved_tokens)
+
+        # The game state is the game as seen by this player, already marked with '(you)'
+        context = game_state
 
         # Add any additional context
         if additional_context:
-            self.context += additional_context
+            context += additional_context
+
+        return context
 
     def to_dict(self):
         return {
             'name': self.name,
             'model': self.model.name,
-            'history': self.history
-        }
\ No newline at end of file
+            'history': self.history,
+            'prompt_sizes': self.context_builder.stats()
+        }
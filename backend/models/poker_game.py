@@ -1,8 +1,31 @@
-from dataclasses import dataclass, field
+from array import array
+from collections import deque
+from dataclasses import asdict, dataclass, field
+import hashlib
+import json
 import random
-from typing import List
+import re
+import uuid
+from typing import List, Tuple
 
+from .evaluator import card_names, describe_hand, evaluate, full_deck
+from .events import Action, CommunityCards, Deal, EventLog, EventView, ForcedBet, GameEnd, GameEvent, RoundStart, Showdown
+from .metrics import NULL_METRICS
 from .player import Player
+from .pots import Pot, build_pots, settle_pots
+from .profiles import ProfileTracker
+from .table_state import TableState
+
+
+# Street names by the number of community cards
+STREET_NAMES = {0: 'preflop', 3: 'flop', 4: 'turn', 5: 'river'}
+
+# Words models use for moves, and the first amount after them within a few characters, e.g. 'I raise to $40'
+MOVE_WORDS = {'fold': 'fold', 'check': 'check', 'call': 'call', 'raise': 'raise', 'bet': 'raise', 'all in': 'all in', 'allin': 'all in', 'shove': 'all in'}
+# Sent to the game steps instead of a reply if a model gave none, e.g. in time, the player then folds
+NO_REPLY = object()
+
+MOVE_PATTERN = re.compile(r"\b(fold|check|call|raise|bet|all[\s_-]?in|shove)\b(?:[^\d\n]{0,12}?(\d+(?:\.\d+)?))?")
 
 
 @dataclass
@@ -22,6 +45,82 @@ class Move:
         if self.amount < 0:
             raise ValueError("Amount must be positive")
 
+    @classmethod
+    def parse(cls, reply):
+        """ 
+        Create a move from a model reply: a Move, a JSON object like {"action": "raise", "amount": 40},
+        or text like 'raise 40' or 'I will raise to $40', of which the first move word counts.
+        'all in' and 'shove' are raises of an infinite amount, to be clamped to the player's money.
+        """
+
+        if isinstance(reply, Move):
+            return reply
+
+        text = str(reply).strip().lower()
+        if not text:
+            raise ValueError("Empty move")
+
+        if text.startswith('{'):
+            try:
+                data = json.loads(text)
+                action = MOVE_WORDS.get(re.sub(r"[\s_-]+", ' ', str(data.get('action', ''))))
+                # A negative amount is raised to the smallest raise like other amounts out of range
+                amount = max(float(data.get('amount') or 0.0), 0.0)
+            except (ValueError, TypeError, AttributeError) as e:
+                raise ValueError(f"Invalid JSON move {text}") from e
+        else:
+            match = MOVE_PATTERN.search(text)
+            action = MOVE_WORDS.get(re.sub(r"[\s_-]+", ' ', match.group(1))) if match else None
+            amount = float(match.group(2)) if match and match.group(2) else 0.0
+
+        if action is None:
+            raise ValueError(f"No move in {text[:50]}")
+        if action == 'all in':
+            return cls(action='raise', amount=float('inf'))
+        return cls(action=action, amount=amount if action == 'raise' else 0.0)
+
+
+@dataclass
+class LegalActions:
+    """ 
+    A class to represent the moves a player can make: the allowed actions, the amount to call
+    and the smallest and largest raise, each the money put in with the move. 
+    """
+
+    actions: List[str]
+    call_amount: float
+    min_raise: float = 0.0
+    max_raise: float = 0.0
+
+    def describe(self):
+        """ 
+        Describe the legal moves for a prompt, as JSON that models can answer in kind. 
+        """
+
+        # asdict deep copies the fields, the prompt is built for every decision
+        schema = json.dumps({'actions': self.actions, 'call_amount': self.call_amount, 'min_raise': self.min_raise, 'max_raise': self.max_raise})
+        return (f"\nYour legal moves are {schema}. Answer with a move like {{\"action\": \"call\"}} or {{\"action\": \"raise\", \"amount\": 40}}, "
+                f"or in words like 'call' or 'raise 40'. A raise amount is all the money you put in, the call included.")
+
+    def correct(self, move: Move) -> Tuple[Move, str]:
+        """ 
+        Snap a near miss to the closest legal move instead of rejecting it: raise amounts are clamped to the
+        allowed range, and a raise that is not allowed becomes a call or a check.
+        Return the move and the reason it was corrected, or an empty string if it was not.
+        Other illegal moves are returned as they are, for the engine to reject.
+        """
+
+        if move.action == 'raise':
+            if 'raise' not in self.actions:
+                passive = 'call' if 'call' in self.actions else 'check'
+                return Move(action=passive, amount=0.0), 'raise_not_allowed'
+            if move.amount < self.min_raise:
+                return Move(action='raise', amount=self.min_raise), 'raise_below_min'
+            if move.amount > self.max_raise:
+                return Move(action='raise', amount=self.max_raise), 'raise_above_max'
+
+        return move, ""
+
 
 @dataclass
 class GameStatistics:
@@ -33,6 +132,12 @@ class GameStatistics:
     num_rounds: int = 0
     winners: List[int] = field(default_factory=list)
     money_gained: dict[int, List[float]] = field(default_factory=dict)
+    all_in_adjusted_money: dict[int, List[float]] = field(default_factory=dict)
+
+    def __post_init__(self):
+        for player_id in self.player_names:
+            self.money_gained.setdefault(player_id, [])
+            self.all_in_adjusted_money.setdefault(player_id, [])
 
 
 class PokerGame:
@@ -40,6 +145,12 @@ class PokerGame:
     A class to represent a poker game with multiple players and multiple rounds.
     """
 
+    # Community cards dealt after the pre-flop betting round: (number of cards, is river)
+    STREETS = [(3, False), (1, False), (1, True)]
+
+    # Smallest unit of money, split pots are divided in whole chips
+    CHIP = 1
+
     def __init__(self,
                 players: List[Player],
                 money: List[float] = [],
@@ -48,10 +159,24 @@ class PokerGame:
                 raises_per_round: int = 3,
                 tries_per_move: int = 3,
                 num_rounds: int = 1,
-                num_eliminations: int = 0
+                num_eliminations: int = 0,
+                show_equity: bool = False,
+                equity_samples: int = 1000,
+                seed: int = None,
+                hand_store = None,
+                game_id: int = None,
+                metrics = None,
+                checkpointer = None,
+                profiles = None,
+                show_profiles: bool = False
     ):
         """ 
         Initialize a poker game with a list of players and a list of starting money for each player.
+        Games with the same seed deal the same cards, a game without a seed draws one and keeps it in self.seed.
+        If a hand_store is given, every hand is appended to it under game_id.
+        If metrics are given, street and showdown durations and retries, invalid moves and forced folds are recorded in them.
+        If a checkpointer is given, the game is checkpointed after every round, see checkpoint.py.
+        If opponent profiles are given, every hand is counted in them, and show_profiles adds the opponents' profiles to the move context.
         """
 
         # Initialize players
@@ -78,27 +203,33 @@ class PokerGame:
         self.tries_per_move = tries_per_move
         self.num_rounds = num_rounds
         self.num_eliminations = num_eliminations
+        self.show_equity = show_equity
+        self.equity_samples = equity_samples
+        self.hand_store = hand_store
+        self.game_id = game_id if game_id is not None else uuid.uuid4().int >> 65
+        self.metrics = metrics or NULL_METRICS
+        self.checkpointer = checkpointer
+        self.show_profiles = show_profiles
+        self.profile_tracker = ProfileTracker(profiles) if profiles is not None else None
+
+        # Callables that receive every game event as a dict, e.g. to stream the game to viewers
+        self.event_listeners = []
 
         # Initialize game state
-        self.game_state = {}
-        self.game_state_description = ""
+        self.event_log = EventLog()
+        self.description_view = EventView(self.event_log)
+        self.player_views = {i: EventView(self.event_log, player.name) for i, player in enumerate(players)}
         self.game_statistics = GameStatistics(player_names=self.player_names)
 
-        self.deck = self.create_deck()
-        random.shuffle(self.deck)
+        # Separate random streams for dealing and for equity sampling, so that showing equity does not change the cards
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(64)
+        self.rng = random.Random(f"{self.seed}:deck")
+        self.equity_rng = random.Random(f"{self.seed}:equity")
+        self.sorted_deck = array('B', self.create_deck())
 
-        # Initialize game parameters
-        self.game_state = {
-            'deck': self.deck,
-            'pot': 0,
-            'cards': [],
-            'call_amount': self.big_blind
-        }
-
-        # Initialize player states
-        self.player_states = {}
-        for i in range(len(self.players_dict)):
-            self.player_states[i] = {'hand': [], 'bet': 0.0, 'money': money[i], 'is_active': True, 'is_all_in': False}
+        # Money, bets, hole cards and flags of all seats, plus the pot, community cards and deck of the round
+        self.table = TableState(money)
+        self.table.reset(self.shuffled_deck(), self.big_blind)
 
 
     def reset_game(self):
@@ -107,35 +238,25 @@ class PokerGame:
         Returns the amount of eliminated players.
         """
 
-        # Reset game state
-        self.deck = self.create_deck()
-        random.shuffle(self.deck)
-        self.game_state = {'deck': self.deck, 'pot': 0, 'cards': [], 'call_amount': self.big_blind}
+        return self.table.reset(self.shuffled_deck(), self.big_blind)
 
-        # Reset player states
-        eliminations = 0
-        for i in range(len(self.players_dict)):
-            self.player_states[i]['hand'] = []
-            self.player_states[i]['bet'] = 0.0
-            if self.player_states[i]['money'] > 0:
-                self.player_states[i]['is_active'] = True
-            else:
-                self.player_states[i]['is_active'] = False
-                eliminations += 1
 
-            self.player_states[i]['is_all_in'] = False
+    def create_deck(self):
+        """ 
+        Create a full deck of integer encoded cards, see evaluator.py. 
+        """
 
-        return eliminations
+        return full_deck()
 
 
-    def create_deck(self):
+    def shuffled_deck(self):
         """ 
-        Create a full deck of cards. 
+        Get a shuffled copy of the deck for a new round, the cards are then drawn in order. 
         """
 
-        suits = ['Hearts', 'Diamonds', 'Clubs', 'Spades']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'Jack', 'Queen', 'King', 'Ace']
-        return [f"{rank} of {suit}" for suit in suits for rank in ranks]
+        deck = self.sorted_deck[:]
+        self.rng.shuffle(deck)
+        return deck
 
 
     def deal_cards(self):
@@ -143,8 +264,11 @@ class PokerGame:
         Deal 2 cards to each player. 
         """
 
+        table = self.table
         for i in range(self.num_players):
-            self.player_states[i]['hand'] = [self.deck.pop(0), self.deck.pop(0)]
+            table.hands[i] = [table.draw(), table.draw()]
+
+        self.log_event(Deal(hands={self.player_names[i]: card_names(table.hands[i]) for i in self.get_active_players()}))
 
 
     def deal_community_cards(self, num_cards: int, river: bool = False):
@@ -153,20 +277,31 @@ class PokerGame:
         """
 
         for _ in range(num_cards):
-            self.game_state['cards'].append(self.deck.pop(0))
+            self.table.cards.append(self.table.draw())
 
-        if num_cards == 3:
-            self.game_state_description += f"\nThe flop cards are {self.game_state['cards']}."
-        elif num_cards == 1:
-            self.game_state_description += f"\nThe {['turn', 'river'][river]} card is {self.game_state['cards'][-1]}."
+        street = 'flop' if num_cards == 3 else ['turn', 'river'][river]
+        self.log_event(CommunityCards(street=street, cards=card_names(self.table.cards)))
 
 
     def get_active_players(self, starting_player_id: int = 0):
         """ 
-        Get a list of all active players starting from a given player. 
+        Get all active players in playing order starting from a given player. 
         """
 
-        return [(i % self.num_players) for i in range(starting_player_id, self.num_players + starting_player_id) if self.player_states[(i % self.num_players)]['is_active']]
+        return self.table.active_seats(starting_player_id)
+
+
+    def run_steps(self, steps):
+        """
+        Play game steps, see betting_round_steps, asking request_move for every move they yield. Returns what the steps return.
+        """
+
+        try:
+            request = next(steps)
+            while True:
+                request = steps.send(self.request_move(*request))
+        except StopIteration as stop:
+            return stop.value
 
 
     def betting_round(self, starting_player_id: int):
@@ -174,203 +309,316 @@ class PokerGame:
         Handle a betting round by getting moves from each active player until a raise is made or the raise count is reached. 
         """
 
+        self.run_steps(self.betting_round_steps(starting_player_id))
+
+
+    def betting_round_steps(self, starting_player_id: int):
+        """
+        Generator of the steps of a betting round: yields (player id, context, errors) whenever a model must be asked
+        for a move and is sent the reply, or NO_REPLY. Blocking and async games only differ in how they ask.
+        """
+
         # keep track of raise count
         raise_count = 0
 
         # queue of players to move before round is over
-        players_to_move = self.get_active_players(starting_player_id)
+        players_to_move = deque(self.get_active_players(starting_player_id))
 
         # while there are still players to move
-        while len(players_to_move) > 0:
+        while players_to_move:
+
+            # the round is over once everyone else folded
+            if self.table.num_active() <= 1:
+                break
 
             # get current player
-            player_id = players_to_move.pop(0)
+            player_id = players_to_move.popleft()
 
             # skip if player is all in
-            if self.player_states[player_id]['is_all_in']:
+            if self.table.is_all_in(player_id):
                 continue
             
-            for _ in range(self.tries_per_move):
-                errors = ""
-                #TODO write make move
-                move = self.players_dict[player_id].make_move(self.game_state_description, errors)
-                valid, error = self.handle_player_move(player_id, move, raise_allowed=raise_count < self.raises_per_round)
-                errors += error
+            legal_actions = self.get_legal_actions(player_id, raise_allowed=raise_count < self.raises_per_round)
+            context = self.get_move_context(player_id) + legal_actions.describe()
+            errors = ""
+            valid = False
+            model_name = self.players_dict[player_id].model.name
+            self.metrics.increment('poker_decisions_total', model=model_name)
+            for attempt in range(self.tries_per_move):
+                if attempt:
+                    self.metrics.increment('poker_retries_total', model=model_name)
+                reply = yield player_id, context, errors
+                if reply is NO_REPLY:
+                    break
+                move, valid, error = self.apply_move(player_id, reply, raise_allowed=raise_count < self.raises_per_round)
+                errors += f"\n{error}" if error else ""
 
                 if valid:
                     break
+                self.metrics.increment('poker_invalid_moves_total', model=model_name)
             
+            # Fall back to folding without a reply or after too many invalid moves
             if not valid:
+                self.metrics.increment('poker_forced_folds_total', model=model_name)
                 move = Move(action='fold', amount=0)
                 self.handle_player_move(player_id, move)
             
             # if player raises, add all other players to the list of players to move
             if move.action == 'raise':
                 raise_count += 1
-                reactivated_players = self.get_active_players((player_id + 1) % self.num_players)
-                for player_id in reactivated_players:
-                    if player_id not in players_to_move:
-                        players_to_move.append(player_id)
+                self.queue_players_after_raise(player_id, players_to_move)
+
+        self.update_all_in_cards()
+
+
+    def request_move(self, player_id: int, context: str, errors: str):
+        """ 
+        Ask a player's model for a move, given the extra context and the errors of the previous tries. 
+        """
+
+        return self.players_dict[player_id].make_move(self.player_views[player_id], context + errors, situation=self.move_situation(player_id, errors))
+
+
+    def move_situation(self, player_id: int, errors: str):
+        """ 
+        Get the situation of a player's decision if their model decides or is cached by it, otherwise None. 
+        """
+
+        return self.get_situation(player_id, errors) if self.players_dict[player_id].uses_situation() else None
+
+
+    def apply_move(self, player_id: int, reply, raise_allowed: bool = True):
+        """ 
+        Turn a model reply into a move and handle it. 
+        Return the move, whether it is valid and an error message otherwise. 
+        """
+
+        try:
+            move = Move.parse(reply)
+        except ValueError as e:
+            return None, False, f"Your move could not be understood: {e}."
+
+        # Near misses are corrected instead of asking the model again
+        move, correction = self.get_legal_actions(player_id, raise_allowed=raise_allowed).correct(move)
+        if correction:
+            self.metrics.increment('poker_corrected_moves_total', model=self.players_dict[player_id].model.name, reason=correction)
+
+        valid, error = self.handle_player_move(player_id, move, raise_allowed=raise_allowed)
+        return move, valid, error
+
+
+    def get_legal_actions(self, player_id: int, raise_allowed: bool = True) -> LegalActions:
+        """ 
+        Get the moves a player can make, following the rules of handle_player_move. 
+        """
+
+        table = self.table
+        call_amount = table.call_amount - table.bets[player_id]
+        money = table.money[player_id]
+
+        actions = ['fold', 'call' if call_amount > 0 else 'check']
+        if raise_allowed and money > call_amount:
+            actions.append('raise')
+            return LegalActions(actions=actions, call_amount=call_amount, min_raise=min(call_amount + self.CHIP, money), max_raise=money)
+        return LegalActions(actions=actions, call_amount=call_amount)
+
+
+    def queue_players_after_raise(self, player_id: int, players_to_move: deque):
+        """ 
+        Add all other active players to the queue of players to move after a raise. 
+        """
+
+        reactivated_players = self.get_active_players((player_id + 1) % self.num_players)
+        for reactivated_id in reactivated_players:
+            if reactivated_id != player_id and reactivated_id not in players_to_move:
+                players_to_move.append(reactivated_id)
+
+
+    def update_all_in_cards(self):
+        """ 
+        Remember how many community cards were out when betting ended because all but one player are all in. 
+        """
+
+        table = self.table
+        players_left_to_bet = bin(table.active & ~table.all_in).count('1')
+        if table.all_in_cards is None and table.num_active() > 1 and players_left_to_bet <= 1:
+            table.all_in_cards = len(table.cards)
+
+
+    def get_move_context(self, player_id: int):
+        """ 
+        Get the opponents' profiles and the pot odds and equity of a player as additional context for their move, if enabled. 
+        """
+
+        context = self.get_profile_context(player_id) if self.show_profiles else ""
+        if not self.show_equity:
+            return context
+
+        from .equity import calculate_equity
+        from .equity_tables import MAX_OPPONENTS, equity_tables_available, preflop_equity
+
+        table = self.table
+        call_amount = table.call_amount - table.bets[player_id]
+        num_opponents = table.num_active() - 1
+        context += f"\nThe pot is {table.pot} and calling costs you {call_amount}."
+        if call_amount > 0:
+            context += f" The pot odds require {call_amount / (table.pot + call_amount):.1%} equity to call."
+
+        if num_opponents > 0:
+            # Preflop equity is looked up in the precomputed tables if they were generated, otherwise simulated
+            if not table.cards and num_opponents <= MAX_OPPONENTS and equity_tables_available():
+                equity = preflop_equity(table.hands[player_id], num_opponents)
+            else:
+                equity = calculate_equity(table.hands[player_id], table.cards, num_opponents, samples=self.equity_samples, seed=self.equity_rng.getrandbits(64)).equity
+            context += f" Your hand {card_names(table.hands[player_id])} has {equity:.1%} equity against {num_opponents} random hands."
+
+        return context
+
+
+    def get_profile_context(self, player_id: int):
+        """
+        Describe the tendencies of the player's active opponents, over all games counted in the opponent profiles.
+        """
+
+        if self.profile_tracker is None:
+            return ""
+
+        opponents = [self.player_names[opponent_id] for opponent_id in self.get_active_players() if opponent_id != player_id]
+        return self.profile_tracker.profiles.describe(self.player_names[player_id], opponents)
+
+
+    def get_situation(self, player_id: int, errors: str = ""):
+        """ 
+        Get the canonical situation of a player's decision, used as the decision cache key and by rule based models. 
+        Errors of previous tries are part of the situation, so that retries are not answered with the rejected reply. 
+        """
+
+        table = self.table
+        actions = hashlib.sha256(repr(table.actions).encode()).hexdigest()
+        return {
+            'street': STREET_NAMES[len(table.cards)],
+            'position': (player_id - self.small_blind_id) % self.num_players,
+            'players': self.num_players,
+            'active_players': table.num_active(),
+            'big_blind': self.big_blind,
+            'stack': table.money[player_id],
+            'hole_cards': sorted(table.hands[player_id]),
+            'board': list(table.cards),
+            'pot': table.pot,
+            'call_amount': table.call_amount - table.bets[player_id],
+            'actions': actions,
+            'errors': errors
+        }
 
 
     def showdown(self):
         """ 
-        Handle the showdown by determining the winner of the pot. 
+        Handle the showdown by splitting the money bet into the main pot and side pots and settling each of them, 
+        see pots.py. If only one player is left, they win without showing their cards. 
         """
 
+        table = self.table
         players_to_show = self.get_active_players()
-        best_hands = []
 
-        for player_id in players_to_show:
-            best_hands.append(self.get_best_hand(self.player_states[player_id]['hand'] + self.game_state['cards']))
+        if len(players_to_show) > 1:
+            scores = {player_id: self.get_best_hand(table.hands[player_id] + table.cards) for player_id in players_to_show}
+            hands = {self.player_names[player_id]: card_names(table.hands[player_id]) for player_id in players_to_show}
+        else:
+            scores = {player_id: 0 for player_id in players_to_show}
+            hands = {}
 
-        # Determine winner
-        winner_id = self.get_winner(best_hands)
+        # Odd chips go to the first winners left of the button
+        pots = build_pots(table.bets, players_to_show)
+        payouts, pot_winners = settle_pots(pots, scores, self.get_active_players(self.small_blind_id), chip=self.CHIP)
 
         # Update game state description
-        self.game_state_description += f"\nPlayer {self.player_names[winner_id]} wins the pot of {self.game_state['pot']}!"
+        for side_pot, (pot, winners) in enumerate(zip(pots, pot_winners)):
+            self.log_event(Showdown(winners=[self.player_names[player_id] for player_id in winners], pot=pot.amount, side_pot=side_pot,
+                                    hand=describe_hand(scores[winners[0]]) if hands else "", hands=hands if side_pot == 0 else {}))
 
-        # Winner gets the pot
-        self.player_states[winner_id]['money'] += self.game_state['pot']  
-        
-        # Update game statistics
-        self.game_statistics.winners.append(winner_id)
-        self.game_statistics.money_gained[winner_id].append(self.game_state['pot'] - self.player_states[winner_id]['bet'])
+        # Winners get the pots
+        for player_id, amount in payouts.items():
+            table.money[player_id] += amount
+
+        if self.profile_tracker is not None:
+            self.profile_tracker.end_hand({self.player_names[player_id]: scores[player_id] for player_id in players_to_show} if hands else {},
+                                          {self.player_names[player_id] for winners in pot_winners for player_id in winners})
+
+        # Update game statistics, the round's winner is the player who won the most
+        self.game_statistics.winners.append(max(payouts, key=lambda player_id: payouts[player_id] - table.bets[player_id]))
         for player_id in range(self.num_players):
-            if player_id != winner_id:
-                self.game_statistics.money_gained[player_id].append(-self.player_states[player_id]['bet'])
+            self.game_statistics.money_gained[player_id].append(payouts.get(player_id, 0.0) - table.bets[player_id])
+
+        self.update_all_in_adjusted_money(players_to_show, pots)
+
+        if self.hand_store is not None:
+            self.hand_store.append(self.get_hand_record())
 
 
-    def get_best_hand(self, cards: List[str]):
+    def update_all_in_adjusted_money(self, players_to_show: List[int], pots: List[Pot]):
         """ 
-        Get the best hand from a list of 5 cards; the two cards in the player's hand and the three community cards. 
+        Update the all in adjusted money of each player. If the remaining players were all in before the river,
+        each pot is shared by the equity of its eligible players at that point instead of by the actual run out.
         """
 
-        # Convert cards to (rank, suit) tuples for easier processing
-        processed_cards = []
-        for card in cards:
-            rank, _, suit = card.partition(' of ')
-            # Convert face cards to numbers
-            if rank == 'Jack':
-                rank = 11
-            elif rank == 'Queen':
-                rank = 12
-            elif rank == 'King':
-                rank = 13
-            elif rank == 'Ace':
-                rank = 14
-            else:
-                rank = int(rank)
-            processed_cards.append((rank, suit))
-
-        # Sort cards by rank, highest first
-        processed_cards.sort(reverse=True, key=lambda x: x[0])
-
-        # Check for straight flush
-        for suit in ['Hearts', 'Diamonds', 'Clubs', 'Spades']:
-            suited_cards = [card[0] for card in processed_cards if card[1] == suit]
-            if len(suited_cards) >= 5:
-                suited_cards.sort(reverse=True)
-                for i in range(len(suited_cards) - 4):
-                    if suited_cards[i] - suited_cards[i+4] == 4:
-                        return ('straight_flush', suited_cards[i])
-
-        # Check for four of a kind
-        for rank in range(14, 1, -1):
-            if sum(1 for card in processed_cards if card[0] == rank) == 4:
-                return ('four_of_a_kind', rank)
-
-        # Check for full house
-        for three_rank in range(14, 1, -1):
-            if sum(1 for card in processed_cards if card[0] == three_rank) == 3:
-                for two_rank in range(14, 1, -1):
-                    if two_rank != three_rank and sum(1 for card in processed_cards if card[0] == two_rank) >= 2:
-                        return ('full_house', (three_rank, two_rank))
-
-        # Check for flush
-        for suit in ['Hearts', 'Diamonds', 'Clubs', 'Spades']:
-            suited_cards = [card[0] for card in processed_cards if card[1] == suit]
-            if len(suited_cards) >= 5:
-                suited_cards.sort(reverse=True)
-                return ('flush', suited_cards[:5])
-
-        # Check for straight
-        ranks = sorted(list(set(card[0] for card in processed_cards)), reverse=True)
-        for i in range(len(ranks) - 4):
-            if ranks[i] - ranks[i+4] == 4:
-                return ('straight', ranks[i])
-
-        # Check for three of a kind
-        for rank in range(14, 1, -1):
-            if sum(1 for card in processed_cards if card[0] == rank) == 3:
-                return ('three_of_a_kind', rank)
-
-        # Check for two pair
-        pairs = []
-        for rank in range(14, 1, -1):
-            if sum(1 for card in processed_cards if card[0] == rank) == 2:
-                pairs.append(rank)
-            if len(pairs) == 2:
-                return ('two_pair', tuple(pairs))
-
-        # Check for one pair
-        for rank in range(14, 1, -1):
-            if sum(1 for card in processed_cards if card[0] == rank) == 2:
-                return ('pair', rank)
-
-        # High card
-        return ('high_card', processed_cards[0][0])
-
-
-    def get_winner(self, best_hands: List[tuple]):
-        """ 
-        Get the winner of the pot from a list of each player's best hand. 
-        """
-
-        # Define hand rankings
-        hand_rankings = {
-            'straight_flush': 8,
-            'four_of_a_kind': 7,
-            'full_house': 6,
-            'flush': 5,
-            'straight': 4,
-            'three_of_a_kind': 3,
-            'two_pair': 2,
-            'pair': 1,
-            'high_card': 0
-        }
-        
-        # Find the highest hand type among all players
-        max_hand_rank = max(hand_rankings[hand[0]] for hand in best_hands)
-        
-        # Filter to only hands of the highest type
-        best_indices = [i for i, hand in enumerate(best_hands) 
-                    if hand_rankings[hand[0]] == max_hand_rank]
-        
-        if len(best_indices) == 1:
-            return best_indices[0]
-        
-        # If multiple players have the same hand type, compare their values
-        hand_type = best_hands[best_indices[0]][0]
-        values = [best_hands[i][1] for i in best_indices]
-        
-        if hand_type in ['straight_flush', 'four_of_a_kind', 'straight', 'three_of_a_kind', 'pair', 'high_card']:
-            # Simple comparison of single values
-            max_value = max(values)
-            winners = [i for i, v in zip(best_indices, values) if v == max_value]
-        
-        elif hand_type == 'full_house' or hand_type == 'two_pair':
-            # Compare tuples (primary rank, secondary rank)
-            max_value = max(values)
-            winners = [i for i, v in zip(best_indices, values) if v == max_value]
-        
-        elif hand_type == 'flush':
-            # Compare lists of 5 cards
-            max_value = max(values)
-            winners = [i for i, v in zip(best_indices, values) if v == max_value]
-        
-        # If still tied, it's a split pot
-        return winners[0] if len(winners) == 1 else winners
+        table = self.table
+        all_in_cards = table.all_in_cards
+        if all_in_cards is None or all_in_cards == 5 or len(players_to_show) < 2:
+            for player_id in range(self.num_players):
+                self.game_statistics.all_in_adjusted_money[player_id].append(self.game_statistics.money_gained[player_id][-1])
+            return
+
+        from .equity import calculate_showdown_equity
+
+        expected = dict.fromkeys(range(self.num_players), 0.0)
+        for pot in pots:
+            if len(pot.eligible) == 1:
+                expected[pot.eligible[0]] += pot.amount
+                continue
+
+            hands = [table.hands[player_id] for player_id in pot.eligible]
+            equities = calculate_showdown_equity(hands, table.cards[:all_in_cards], samples=self.equity_samples, seed=self.equity_rng.getrandbits(64))
+            for player_id, equity in zip(pot.eligible, equities):
+                expected[player_id] += pot.amount * equity
+
+        for player_id in range(self.num_players):
+            self.game_statistics.all_in_adjusted_money[player_id].append(expected[player_id] - table.bets[player_id])
+
+
+    def get_best_hand(self, cards: List[int]):
+        """ 
+        Get the score of the best hand from a list of 5 to 7 cards; the two cards in the player's hand and the community cards. 
+        Higher scores are better hands.
+        """
+
+        return evaluate(cards)
+
+
+    def get_winner(self, best_hands: List[int]):
+        """ 
+        Get the indices of the best hands from a list of each player's best hand score, more than one if they tie. 
+        """
+
+        max_score = max(best_hands)
+        return [i for i, score in enumerate(best_hands) if score == max_score]
+
+
+    def get_best_hands(self, cards):
+        """
+        Get the scores of many hands at once from an (N, 7) array of cards, see batch_evaluator.py.
+        """
+
+        from .batch_evaluator import evaluate_batch
+        return evaluate_batch(cards)
+
+
+    def get_winners(self, hole_cards, boards, active=None):
+        """
+        Get the scores, winners and pot shares of many showdowns at once from (N, players, 2) hole cards and (N, 5) boards.
+        """
+
+        from .batch_evaluator import resolve_winners_batch
+        return resolve_winners_batch(hole_cards, boards, active)
 
 
     def play_round(self):
@@ -378,49 +626,52 @@ class PokerGame:
         Play a round of poker. 
         """
 
-        eliminations = sum(1 for player in self.player_states.values() if not player['is_active'])
+        self.run_steps(self.round_steps())
 
-        # Update game state description
-        self.game_state_description += f"\nA new round of poker is starting."
-        self.game_state_description += f"\n{eliminations} players have been eliminated."
-        self.game_state_description += f"\nThe small blind is {self.small_blind}."
-        self.game_state_description += f"\nThe big blind is {self.big_blind}."
-        
-        for player_id in self.get_active_players():
-            self.game_state_description += f"\nPlayer {self.player_names[player_id]} has {self.player_states[player_id]['money']} dollarsat the start of the round."
 
-        # Small blind goes first
-        self.handle_forced_bet(self.small_blind_id)
+    def round_steps(self):
+        """
+        Generator of the steps of a round of poker, see betting_round_steps.
+        """
 
-        # Big blind goes next
-        self.handle_forced_bet(self.big_blind_id)
+        # Forced bets, dealing and the pre-flop betting round, timed in wall clock time, including waiting for the models
+        with self.metrics.timer('poker_street_seconds', street='preflop'):
+            self.start_round()
+            yield from self.betting_round_steps((self.big_blind_id + 1) % self.num_players)
 
-        # Forced bets are done, now cards are dealt
-        self.deal_cards()
+        # Deal flop, turn and river, each followed by a betting round, until only one player is left
+        for num_cards, river in self.STREETS:
+            if self.table.num_active() <= 1:
+                break
+            with self.metrics.timer('poker_street_seconds', street=STREET_NAMES[len(self.table.cards) + num_cards]):
+                self.deal_community_cards(num_cards, river=river)
+                yield from self.betting_round_steps(self.small_blind_id)
 
-        # Pre-flop betting round
-        self.betting_round((self.big_blind_id + 1) % self.num_players)
+        # Showdown
+        with self.metrics.timer('poker_showdown_seconds'):
+            self.showdown()
+        self.metrics.increment('poker_hands_total')
 
-        # Deal flop
-        self.deal_community_cards(3)
 
-        # Flop betting round
-        self.betting_round(self.small_blind_id)
+    def start_round(self):
+        """ 
+        Start a round of poker by describing the table, handling the forced bets and dealing the cards. 
+        """
 
-        # Deal turn
-        self.deal_community_cards(1)
+        eliminations = self.num_players - self.table.num_active()
 
-        # Turn betting round
-        self.betting_round(self.small_blind_id)
+        # Update game state description
+        self.log_event(RoundStart(round=self.game_statistics.num_rounds, eliminations=eliminations, small_blind=self.small_blind, big_blind=self.big_blind,
+                                  money={self.player_names[player_id]: self.table.money[player_id] for player_id in self.get_active_players()}))
 
-        # Deal river
-        self.deal_community_cards(1)
+        # Small blind goes first
+        self.handle_forced_bet(self.small_blind_id)
 
-        # River betting round
-        self.betting_round(self.small_blind_id)
+        # Big blind goes next
+        self.handle_forced_bet(self.big_blind_id)
 
-        # Showdown
-        self.showdown()
+        # Forced bets are done, now cards are dealt
+        self.deal_cards()
 
 
     def handle_forced_bet(self, player_id: int):
@@ -438,22 +689,24 @@ class PokerGame:
         else:
             raise ValueError(f"Player {self.player_names[player_id]} is not the small blind or big blind and thus is not forced to bet")
 
+        # The small blind starts the hand for the opponent profiles
+        if is_small_blind and self.profile_tracker is not None:
+            self.profile_tracker.start_hand([self.player_names[active_id] for active_id in self.get_active_players()])
+
         # Check if player is all in
-        if self.player_states[player_id]['money'] <= required_bet:
-            self.player_states[player_id]['is_all_in'] = True
-            self.player_states[player_id]['bet'] = self.player_states[player_id]['money']
-            self.player_states[player_id]['money'] = 0.0
-            self.game_state['pot'] += self.player_states[player_id]['bet']
+        table = self.table
+        if table.money[player_id] <= required_bet:
+            table.set_all_in(player_id)
+            table.bets[player_id] = table.money[player_id]
+            table.money[player_id] = 0.0
+            table.pot += table.bets[player_id]
 
         else:
-            self.player_states[player_id]['bet'] = required_bet
-            self.player_states[player_id]['money'] -= required_bet
-            self.game_state['pot'] += required_bet
+            table.bets[player_id] = required_bet
+            table.money[player_id] -= required_bet
+            table.pot += required_bet
 
-        # Update game state description
-        self.game_state_description += f"\nPlayer {self.player_names[player_id]} is forced to bet {required_bet} as {'small' if is_small_blind else 'big'} blind. "
-        if self.player_states[player_id]['is_all_in']:
-            self.game_state_description += f"Player {self.player_names[player_id]} is thus all in."
+        self.record_action(player_id, 'small_blind' if is_small_blind else 'big_blind', table.bets[player_id])
 
 
     def handle_player_move(self, player_id: int, move: Move, raise_allowed: bool = True):
@@ -462,26 +715,27 @@ class PokerGame:
         Return True if the move is valid, False and error message otherwise. 
         """
 
-        call_amount = self.game_state['call_amount'] - self.player_states[player_id]['bet']
+        table = self.table
+        call_amount = table.call_amount - table.bets[player_id]
 
         if move.action == 'fold':
-            self.player_states[player_id]['is_active'] = False
+            table.fold(player_id)
+            self.record_action(player_id, 'fold', 0.0)
             return True, ""
         
         elif move.action == 'call':
-            if self.player_states[player_id]['money'] > call_amount:
-                self.player_states[player_id]['money'] -= call_amount
-                self.player_states[player_id]['bet'] += call_amount
-                self.game_state['pot'] += call_amount
-                self.game_state_description += f"\nPlayer {self.player_names[player_id]} calls by betting {call_amount}."
+            if table.money[player_id] > call_amount:
+                table.money[player_id] -= call_amount
+                table.bets[player_id] += call_amount
+                table.pot += call_amount
             else:
-                self.player_states[player_id]['is_all_in'] = True
-                call_amount = self.player_states[player_id]['money']
-                self.game_state['pot'] += call_amount
-                self.player_states[player_id]['bet'] += call_amount
-                self.player_states[player_id]['money'] = 0.0
-                self.game_state_description += f"\nPlayer {self.player_names[player_id]} calls by betting {call_amount} and is thus all in."
+                table.set_all_in(player_id)
+                call_amount = table.money[player_id]
+                table.pot += call_amount
+                table.bets[player_id] += call_amount
+                table.money[player_id] = 0.0
 
+            self.record_action(player_id, 'call', call_amount)
             return True, ""
 
         elif move.action == 'raise':
@@ -489,21 +743,24 @@ class PokerGame:
                 return False, f"You tried raising but you are not allowed to raise this round as there have already been {self.raises_per_round} raises."
 
             if move.amount > call_amount:
-                if self.player_states[player_id]['money'] < move.amount:
-                    return False, f"You tried raising but your raise amount {move.amount} is greater than the amount of money you have {self.player_states[player_id]['money']}."
+                if table.money[player_id] < move.amount:
+                    return False, f"You tried raising but your raise amount {move.amount} is greater than the amount of money you have {table.money[player_id]}."
                 else:
-                    self.player_states[player_id]['money'] -= move.amount
-                    self.player_states[player_id]['bet'] += move.amount
-                    self.game_state['pot'] += move.amount
-                    self.game_state['call_amount'] += move.amount - call_amount
-                    self.game_state_description += f"\nPlayer {self.player_names[player_id]} raises by betting {move.amount}."
+                    table.money[player_id] -= move.amount
+                    table.bets[player_id] += move.amount
+                    table.pot += move.amount
+                    table.call_amount += move.amount - call_amount
+                    # Raising all the money left is going all in
+                    if table.money[player_id] == 0:
+                        table.set_all_in(player_id)
+                    self.record_action(player_id, 'raise', move.amount)
                     return True, ""
             else:
                 return False, f"You tried raising but your raise amount {move.amount} is less than the current call amount {call_amount}."
 
         elif move.action == 'check':
-            if self.player_states[player_id]['bet'] == self.game_state['call_amount']:
-                self.game_state_description += f"\nPlayer {self.player_names[player_id]} checks."
+            if table.bets[player_id] == table.call_amount:
+                self.record_action(player_id, 'check', 0.0)
                 return True, ""
             else:
                 return False, f"You tried checking but you have not bet the current call amount {call_amount}."
@@ -511,20 +768,124 @@ class PokerGame:
         else:
             return False, "Invalid move"
 
+
+    def record_action(self, player_id: int, action: str, amount: float):
+        """ 
+        Record an action of the current round as (player id, action, amount bet) and log it as an event. 
+        """
+
+        self.table.actions.append((player_id, action, amount))
+
+        all_in = self.table.is_all_in(player_id)
+        if action in ('small_blind', 'big_blind'):
+            required_bet = self.small_blind if action == 'small_blind' else self.big_blind
+            self.log_event(ForcedBet(player=self.player_names[player_id], blind=action.split('_')[0], amount=required_bet, all_in=all_in))
+        else:
+            self.log_event(Action(player=self.player_names[player_id], action=action, amount=amount, pot=self.table.pot, all_in=all_in))
+            if self.profile_tracker is not None:
+                self.profile_tracker.action(self.player_names[player_id], action, amount, len(self.table.cards))
+
+
+    def log_event(self, event: GameEvent):
+        """ 
+        Append an event to the game's event log and send it to all event listeners. 
+        """
+
+        self.event_log.append(event)
+
+        if self.event_listeners:
+            event_dict = {**event.to_dict(), 'game_id': self.game_id, 'round': self.game_statistics.num_rounds}
+            for listener in self.event_listeners:
+                listener(event_dict)
+
+
+    @property
+    def game_state_description(self):
+        """ 
+        The text of the whole game as seen by a spectator, rendered incrementally from the event log. 
+        """
+
+        return self.description_view.text()
+
+
+    def get_hand_record(self):
+        """ 
+        Get the record of the round that just ended for the hand history store. 
+        """
+
+        from .hand_store import HandRecord
+
+        table = self.table
+        return HandRecord(
+            game_id=self.game_id,
+            hand=self.game_statistics.num_rounds,
+            model_names=[self.players_dict[i].model.name for i in range(self.num_players)],
+            hole_cards=[list(table.hands[i]) for i in range(self.num_players)],
+            board=list(table.cards),
+            pot=table.pot,
+            deltas=[self.game_statistics.money_gained[i][-1] for i in range(self.num_players)],
+            actions=list(table.actions)
+        )
+
     def play_game(self):
         """ 
         Play a game of poker. 
         """
+
+        return self.run_steps(self.game_steps())
+
+
+    def game_steps(self):
+        """
+        Generator of the steps of a game of poker, see betting_round_steps. Returns the game statistics.
+        """
+
         eliminations = self.reset_game()
 
-        while self.game_statistics.num_rounds < self.num_rounds and eliminations < self.num_eliminations:
-            self.play_round()
+        while not self.is_game_over(eliminations):
+            yield from self.round_steps()
             self.game_statistics.num_rounds += 1
+            if self.checkpointer is not None:
+                self.checkpointer.checkpoint(self)
             eliminations = self.reset_game()
 
+        self.log_game_end()
+        if self.checkpointer is not None:
+            self.checkpointer.checkpoint(self, finished=True)
         return self.game_statistics
 
 
+    def log_game_end(self):
+        self.log_event(GameEnd(money={self.player_names[i]: self.table.money[i] for i in range(self.num_players)}))
+
+
+    def is_game_over(self, eliminations: int):
+        """ 
+        Check whether the game is over, i.e. all rounds are played, enough players are eliminated 
+        (num_eliminations of 0 means no limit) or only one player is left. 
+        """
+
+        if self.game_statistics.num_rounds >= self.num_rounds or eliminations >= self.num_players - 1:
+            return True
+
+        return self.num_eliminations > 0 and eliminations >= self.num_eliminations
+
+
+    def get_game_state(self):
+        """ 
+        Get a JSON serializable summary of the game. 
+        """
+
+        table = self.table
+        return {
+            'pot': table.pot,
+            'cards': card_names(table.cards),
+            'players': {self.player_names[i]: {'money': table.money[i], 'is_active': table.is_active(i)} for i in range(self.num_players)},
+            'description': self.game_state_description,
+            'statistics': asdict(self.game_statistics)
+        }
+
+
     def get_game_statistics(self):
         return self.game_statistics
 
@@ -0,0 +1,79 @@
+from dataclasses import dataclass, field
+import math
+from typing import Dict, List, Sequence
+
+
+@dataclass
+class Pot:
+    """
+    A class to represent the main pot or a side pot: the money in it and the seats that can win it.
+    """
+
+    amount: float
+    eligible: List[int] = field(default_factory=list)
+
+
+def build_pots(contributions: Sequence[float], active: Sequence[int]) -> List[Pot]:
+    """
+    Split the money put in by each seat into the main pot and side pots.
+    Every contribution level of an active seat closes a pot which the active seats that put in at least
+    that much can win. Money of folded seats above the highest level goes to the last pot.
+    There is always at least one pot, even if nothing was bet.
+    """
+
+    levels = sorted({contributions[seat] for seat in active if contributions[seat] > 0})
+    pots = []
+    previous = 0.0
+    for level in levels:
+        amount = sum(min(contribution, level) - min(contribution, previous) for contribution in contributions)
+        eligible = [seat for seat in active if contributions[seat] >= level]
+        pots.append(Pot(amount=amount, eligible=eligible))
+        previous = level
+
+    dead_money = sum(max(0.0, contribution - previous) for contribution in contributions)
+    if not pots:
+        pots.append(Pot(amount=dead_money, eligible=list(active)))
+    elif dead_money > 0:
+        pots[-1].amount += dead_money
+
+    return pots
+
+
+def split_pot(amount: float, winners: Sequence[int], chip: float = 1.0) -> Dict[int, float]:
+    """
+    Split a pot evenly between winners in whole chips. The odd chips left over go one at a time
+    to the winners in the given order, which should start left of the button.
+    """
+
+    share = math.floor(amount / len(winners) / chip) * chip
+    payouts = {seat: share for seat in winners}
+
+    remainder = amount - share * len(winners)
+    for seat in winners:
+        if remainder <= 0:
+            break
+        extra = min(chip, remainder)
+        payouts[seat] += extra
+        remainder -= extra
+
+    return payouts
+
+
+def settle_pots(pots: List[Pot], scores: Dict[int, int], order: Sequence[int], chip: float = 1.0):
+    """
+    Award every pot to its eligible seats with the best score, splitting ties.
+    order is the seat order used for odd chips.
+    Returns the money won by each seat and, per pot, the winning seats.
+    """
+
+    position = {seat: i for i, seat in enumerate(order)}
+    payouts = {}
+    pot_winners = []
+    for pot in pots:
+        best = max(scores[seat] for seat in pot.eligible)
+        winners = sorted((seat for seat in pot.eligible if scores[seat] == best), key=position.__getitem__)
+        for seat, amount in split_pot(pot.amount, winners, chip).items():
+            payouts[seat] = payouts.get(seat, 0.0) + amount
+        pot_winners.append(winners)
+
+    return payouts, pot_winners
@@ -0,0 +1,270 @@
+"""
+Streaming opponent profiles: VPIP, PFR, 3-bet, fold to raise, showdown win rate and aggression factor
+per player and per matchup, counted in O(1) per action while the game is played.
+"""
+
+from dataclasses import asdict, dataclass, fields
+import threading
+from typing import ClassVar, Dict, Iterable, List, Optional
+
+
+def _rate(count: int, total: int) -> Optional[float]:
+    return count / total if total else None
+
+
+@dataclass
+class ProfileCounters:
+    """
+    A class to count a player's tendencies, over all hands or, for a matchup, against one opponent.
+    Raises include bets, so fold to raise counts folds when facing a bet or a raise.
+    The aggression factor counts postflop raises per postflop call of more than nothing.
+    Matchups only count hands, 3-bets against the opener, folds to the opponent's raises and showdowns, see MATCHUP_COUNTERS.
+    """
+
+    MATCHUP_COUNTERS: ClassVar[tuple] = ('hands', 'three_bet_chances', 'three_bets', 'faced_raises', 'folds_to_raise', 'showdowns', 'showdowns_won')
+    MATCHUP_RATES: ClassVar[tuple] = ('three_bet', 'fold_to_raise', 'showdown_win_rate')
+
+    hands: int = 0
+    voluntary_hands: int = 0
+    preflop_raise_hands: int = 0
+    three_bet_chances: int = 0
+    three_bets: int = 0
+    faced_raises: int = 0
+    folds_to_raise: int = 0
+    showdowns: int = 0
+    showdowns_won: int = 0
+    postflop_raises: int = 0
+    postflop_calls: int = 0
+
+    def merge(self, other: 'ProfileCounters'):
+        for counter in fields(self):
+            setattr(self, counter.name, getattr(self, counter.name) + getattr(other, counter.name))
+        return self
+
+    def rates(self) -> dict:
+        return {
+            'vpip': _rate(self.voluntary_hands, self.hands),
+            'pfr': _rate(self.preflop_raise_hands, self.hands),
+            'three_bet': _rate(self.three_bets, self.three_bet_chances),
+            'fold_to_raise': _rate(self.folds_to_raise, self.faced_raises),
+            'showdown_win_rate': _rate(self.showdowns_won, self.showdowns),
+            'aggression_factor': _rate(self.postflop_raises, self.postflop_calls)
+        }
+
+    def to_dict(self) -> dict:
+        return {**asdict(self), **self.rates()}
+
+    def matchup_dict(self) -> dict:
+        rates = self.rates()
+        return {**{name: getattr(self, name) for name in self.MATCHUP_COUNTERS}, **{name: rates[name] for name in self.MATCHUP_RATES}}
+
+
+class OpponentProfiles:
+    """
+    A class to hold the profile counters of players by name, and of matchups by player and opponent name.
+    Profiles are partial aggregates: the profiles of different tables, processes or hands combine with merge.
+    """
+
+    def __init__(self):
+        self.players: Dict[str, ProfileCounters] = {}
+        self.matchups: Dict[str, Dict[str, ProfileCounters]] = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {'players': self.players, 'matchups': self.matchups}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.players = state['players']
+        self.matchups = state['matchups']
+
+    def player(self, name: str) -> ProfileCounters:
+        counters = self.players.get(name)
+        if counters is None:
+            counters = self.players[name] = ProfileCounters()
+        return counters
+
+    def matchup(self, name: str, opponent: str) -> ProfileCounters:
+        opponents = self.matchups.get(name)
+        if opponents is None:
+            opponents = self.matchups[name] = {}
+        counters = opponents.get(opponent)
+        if counters is None:
+            counters = opponents[opponent] = ProfileCounters()
+        return counters
+
+    def merge(self, other: 'OpponentProfiles'):
+        """
+        Add the counters of other profiles to these profiles, which may be shared by several games.
+        """
+
+        with self._lock:
+            for name, counters in other.players.items():
+                self.player(name).merge(counters)
+            for name, opponents in other.matchups.items():
+                for opponent, counters in opponents.items():
+                    self.matchup(name, opponent).merge(counters)
+        return self
+
+    def renamed(self, names: Dict[str, str]) -> 'OpponentProfiles':
+        """
+        Get a copy with players renamed, e.g. from seat names to model names. Players renamed alike are merged.
+        """
+
+        profiles = OpponentProfiles()
+        for name, counters in self.players.items():
+            profiles.player(names.get(name, name)).merge(counters)
+        for name, opponents in self.matchups.items():
+            for opponent, counters in opponents.items():
+                profiles.matchup(names.get(name, name), names.get(opponent, opponent)).merge(counters)
+        return profiles
+
+    def to_dict(self, name: Optional[str] = None) -> dict:
+        """
+        Get the counters and rates of all players, or of one player, with their matchups.
+        """
+
+        names = list(self.players) if name is None else [name] if name in self.players else []
+        return {
+            'players': {name: self.players[name].to_dict() for name in names},
+            'matchups': {name: {opponent: counters.matchup_dict() for opponent, counters in self.matchups.get(name, {}).items()} for name in names}
+        }
+
+    def describe(self, viewer: str, opponents: Iterable[str], min_hands: int = 1) -> str:
+        """
+        Describe the opponents' tendencies for a viewer's prompt, including how they played against the viewer.
+        Opponents seen in fewer than min_hands hands are left out.
+        """
+
+        text = ""
+        for opponent in opponents:
+            counters = self.players.get(opponent)
+            if counters is None or counters.hands < min_hands:
+                continue
+
+            rates = counters.rates()
+            parts = [f"plays {rates['vpip']:.0%} of hands", f"raises {rates['pfr']:.0%} before the flop"]
+            if rates['three_bet'] is not None:
+                parts.append(f"re-raises {rates['three_bet']:.0%} of single raises before the flop")
+            if rates['fold_to_raise'] is not None:
+                parts.append(f"folds to {rates['fold_to_raise']:.0%} of bets and raises")
+            if rates['aggression_factor'] is not None:
+                parts.append(f"raises {rates['aggression_factor']:.1f} times per call after the flop")
+            if rates['showdown_win_rate'] is not None:
+                parts.append(f"won {counters.showdowns_won} of {counters.showdowns} showdowns")
+            text += f"\nPlayer {opponent} over {counters.hands} hands {', '.join(parts)}."
+
+            matchup = self.matchups.get(opponent, {}).get(viewer)
+            if matchup is not None and (matchup.faced_raises or matchup.showdowns):
+                parts = []
+                if matchup.faced_raises:
+                    parts.append(f"folded to {matchup.folds_to_raise} of your {matchup.faced_raises} bets and raises")
+                if matchup.showdowns:
+                    parts.append(f"won {matchup.showdowns_won} of {matchup.showdowns} showdowns against you")
+                text += f" Against you, Player {opponent} {' and '.join(parts)}."
+        return text
+
+
+class ProfileTracker:
+    """
+    A class to stream one game's actions into opponent profiles. Each hand is counted in its own partial profiles,
+    which are merged into the profiles when the hand ends, so that games on other threads can share them.
+    """
+
+    def __init__(self, profiles: OpponentProfiles):
+        self.profiles = profiles
+        self.hand = None
+
+    def start_hand(self, names: List[str]):
+        """
+        Start a hand dealt to the named players.
+        """
+
+        self.hand = OpponentProfiles()
+        for name in names:
+            self.hand.player(name).hands += 1
+            for opponent in names:
+                if opponent != name:
+                    self.hand.matchup(name, opponent).hands += 1
+
+        self.street = 0
+        self.raises = 0
+        self.raiser = None
+        self.opener = None
+        self.voluntary = set()
+        self.preflop_raisers = set()
+        self.three_bet_chances = set()
+
+    def action(self, name: str, action: str, amount: float, street: int):
+        """
+        Count a valid move of a player, street is the number of community cards.
+        """
+
+        if self.hand is None:
+            return
+        if street != self.street:
+            self.street = street
+            self.raises = 0
+            self.raiser = None
+
+        counters = self.hand.player(name)
+        raised = action == 'raise'
+
+        if self.raises and self.raiser != name:
+            matchup = self.hand.matchup(name, self.raiser)
+            counters.faced_raises += 1
+            matchup.faced_raises += 1
+            if action == 'fold':
+                counters.folds_to_raise += 1
+                matchup.folds_to_raise += 1
+
+        if street == 0:
+            # A player facing the first raise before the flop can re-raise it, a 3-bet
+            if self.raises == 1 and self.opener != name and name not in self.three_bet_chances:
+                self.three_bet_chances.add(name)
+                matchup = self.hand.matchup(name, self.opener)
+                counters.three_bet_chances += 1
+                matchup.three_bet_chances += 1
+                if raised:
+                    counters.three_bets += 1
+                    matchup.three_bets += 1
+            if (raised or (action == 'call' and amount > 0)) and name not in self.voluntary:
+                self.voluntary.add(name)
+                counters.voluntary_hands += 1
+            if raised and name not in self.preflop_raisers:
+                self.preflop_raisers.add(name)
+                counters.preflop_raise_hands += 1
+                if self.opener is None:
+                    self.opener = name
+        elif raised:
+            counters.postflop_raises += 1
+        elif action == 'call' and amount > 0:
+            # A call of nothing is a check
+            counters.postflop_calls += 1
+
+        if raised:
+            self.raises += 1
+            self.raiser = name
+
+    def end_hand(self, scores: Dict[str, int], winners: Iterable[str]):
+        """
+        End the hand with the scores of the players who showed their cards and the names of all pot winners,
+        and merge it into the profiles.
+        """
+
+        if self.hand is None:
+            return
+
+        winners = set(winners)
+        for name, score in scores.items():
+            counters = self.hand.player(name)
+            counters.showdowns += 1
+            counters.showdowns_won += name in winners
+            for opponent, opponent_score in scores.items():
+                if opponent != name:
+                    matchup = self.hand.matchup(name, opponent)
+                    matchup.showdowns += 1
+                    matchup.showdowns_won += score > opponent_score
+
+        self.profiles.merge(self.hand)
+        self.hand = None
@@ -0,0 +1,171 @@
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+import math
+from typing import List
+
+from .poker_game import GameStatistics
+
+
+# Glicko constants
+Q = math.log(10) / 400
+INITIAL_RATING = 1500.0
+INITIAL_DEVIATION = 350.0
+MIN_DEVIATION = 30.0
+# Deviation added before every game so that ratings keep adapting
+DEVIATION_DRIFT = 10.0
+
+
+def _g(deviation: float) -> float:
+    return 1 / math.sqrt(1 + 3 * (Q * deviation / math.pi) ** 2)
+
+
+def _expected_score(rating: float, opponent_rating: float, opponent_deviation: float) -> float:
+    return 1 / (1 + 10 ** (-_g(opponent_deviation) * (rating - opponent_rating) / 400))
+
+
+@dataclass
+class Rating:
+    """
+    A class to represent the rating of a model: a Glicko rating with its deviation,
+    and the running sums needed for chips won per 100 hands.
+    """
+
+    name: str
+    rating: float = INITIAL_RATING
+    deviation: float = INITIAL_DEVIATION
+    games: int = 0
+    hands: int = 0
+    chips: float = 0.0
+    chips_squared: float = 0.0
+
+    @property
+    def rating_interval(self):
+        """
+        95% confidence interval of the rating.
+        """
+
+        return (self.rating - 1.96 * self.deviation, self.rating + 1.96 * self.deviation)
+
+    @property
+    def chips_per_100(self) -> float:
+        return 100 * self.chips / self.hands if self.hands else 0.0
+
+    @property
+    def chips_per_100_interval(self):
+        """
+        95% confidence interval of the chips won per 100 hands.
+        """
+
+        if self.hands < 2:
+            return (-math.inf, math.inf)
+
+        mean = self.chips / self.hands
+        variance = max(0.0, (self.chips_squared - self.hands * mean ** 2) / (self.hands - 1))
+        margin = 1.96 * 100 * math.sqrt(variance / self.hands)
+        return (self.chips_per_100 - margin, self.chips_per_100 + margin)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'rating': round(self.rating, 1),
+            'rating_interval': [round(bound, 1) for bound in self.rating_interval],
+            'games': self.games,
+            'hands': self.hands,
+            'chips_per_100': round(self.chips_per_100, 2),
+            # JSON has no infinity, an unknown bound is None
+            'chips_per_100_interval': [round(bound, 2) if math.isfinite(bound) else None for bound in self.chips_per_100_interval]
+        }
+
+
+class Leaderboard:
+    """
+    A class to keep ratings up to date incrementally from finished games.
+    The models are kept ordered by rating, so reading the top k is O(k) no matter how many games were played.
+    """
+
+    def __init__(self):
+        self.ratings = {}
+        self._order = []
+
+    def get_rating(self, name: str) -> Rating:
+        if name not in self.ratings:
+            self.ratings[name] = Rating(name=name)
+            insort(self._order, (-INITIAL_RATING, name))
+        return self.ratings[name]
+
+    def _set_rating(self, rating: Rating, value: float):
+        # Move the model to its new position in the ordered index
+        del self._order[bisect_left(self._order, (-rating.rating, rating.name))]
+        rating.rating = value
+        insort(self._order, (-value, rating.name))
+
+    def update(self, model_names: List[str], statistics: GameStatistics):
+        """
+        Update the ratings and chip counts from a finished game whose seats were played by model_names.
+        """
+
+        self.update_ratings(model_names, [sum(statistics.money_gained[seat]) for seat in range(len(model_names))])
+
+        for seat, name in enumerate(model_names):
+            rating = self.get_rating(name)
+            for money in statistics.money_gained[seat]:
+                rating.hands += 1
+                rating.chips += money
+                rating.chips_squared += money ** 2
+
+    def update_ratings(self, model_names: List[str], results: List[float]):
+        """
+        Update the ratings from the money each seat gained over a game.
+        Every pair of seats counts as a match decided by the money they gained.
+        """
+
+        ratings = [self.get_rating(name) for name in model_names]
+
+        # Compute all updates from the ratings before the game
+        before = [(rating.rating, math.sqrt(rating.deviation ** 2 + DEVIATION_DRIFT ** 2)) for rating in ratings]
+        updates = []
+        for seat, (value, deviation) in enumerate(before):
+            variance_sum = 0.0
+            score_sum = 0.0
+            for other, (other_value, other_deviation) in enumerate(before):
+                if other == seat:
+                    continue
+                expected = _expected_score(value, other_value, other_deviation)
+                score = 1.0 if results[seat] > results[other] else 0.5 if results[seat] == results[other] else 0.0
+                variance_sum += _g(other_deviation) ** 2 * expected * (1 - expected)
+                score_sum += _g(other_deviation) * (score - expected)
+
+            if variance_sum == 0:
+                updates.append((value, deviation))
+                continue
+
+            precision = 1 / deviation ** 2 + Q ** 2 * variance_sum
+            updates.append((value + Q / precision * score_sum, math.sqrt(1 / precision)))
+
+        for seat, rating in enumerate(ratings):
+            value, deviation = updates[seat]
+            self._set_rating(rating, value)
+            rating.deviation = max(MIN_DEVIATION, min(INITIAL_DEVIATION, deviation))
+            rating.games += 1
+
+    def load_hand_store(self, store):
+        """
+        Rebuild the ratings from a HandStore: the chip counts are summed straight from its index
+        and only the per game rating updates are replayed.
+        """
+
+        for model_names, results in store.game_totals():
+            self.update_ratings(model_names, results)
+
+        for name, (hands, chips, chips_squared) in store.model_totals().items():
+            rating = self.get_rating(name)
+            rating.hands += hands
+            rating.chips += chips
+            rating.chips_squared += chips_squared
+
+    def top(self, k: int = 10):
+        """
+        Get the k best rated models, best first.
+        """
+
+        return [self.ratings[name].to_dict() for _, name in self._order[:k]]
@@ -0,0 +1,184 @@
+"""
+A registry of the models that can play, declared by name and factory and only imported and built when first used.
+Models can be warmed up on a background thread, and ready() tells whether all of those have been loaded or have failed.
+"""
+
+import asyncio
+from dataclasses import dataclass, field
+import importlib
+import json
+import threading
+import time
+from typing import Dict, List, Optional
+
+from .metrics import NULL_METRICS
+
+
+@dataclass
+class ModelSpec:
+    """
+    A class to declare a model: factory is 'module:attribute', the class or function that builds it from kwargs.
+    Modules starting with a dot are relative to this package. Models with warm_up set are loaded by warm_up.
+    """
+
+    name: str
+    factory: str
+    kwargs: dict = field(default_factory=dict)
+    warm_up: bool = False
+
+
+def load_specs(path: str) -> List[ModelSpec]:
+    """
+    Read model declarations from a JSON file: {"models": [{"name": ..., "factory": ..., "kwargs": {...}, "warm_up": ...}]}.
+    """
+
+    with open(path) as f:
+        config = json.load(f)
+    return [ModelSpec(**entry) for entry in config['models']]
+
+
+class LazyModel:
+    """
+    A stand-in for a declared model, built by the registry on the first move it is asked for.
+    """
+
+    def __init__(self, registry: 'ModelRegistry', name: str):
+        self.registry = registry
+        self.name = name
+
+    @property
+    def model(self):
+        return self.registry.get(self.name)
+
+    @property
+    def deterministic(self):
+        return getattr(self.model, 'deterministic', False)
+
+    @property
+    def reads_situation(self):
+        return getattr(self.model, 'reads_situation', False)
+
+    def get_move(self, situation_or_prompt):
+        return self.model.get_move(situation_or_prompt)
+
+    async def get_move_async(self, prompt):
+        model = self.model
+        if hasattr(model, 'get_move_async'):
+            return await model.get_move_async(prompt)
+        return await asyncio.to_thread(model.get_move, prompt)
+
+
+class ModelRegistry:
+    """
+    A class to hold the declared models. get builds a model on first use, once even if several threads ask for it,
+    and records how long importing and building it took. Models that are never used are never imported.
+    """
+
+    def __init__(self, specs: List[ModelSpec] = [], metrics=None):
+        self.specs: Dict[str, ModelSpec] = {}
+        self.loaded = {}
+        self.load_seconds = {}
+        self.errors = {}
+        self.metrics = metrics or NULL_METRICS
+        self._locks = {}
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+        for spec in specs:
+            self.declare(spec)
+
+    def declare(self, spec: ModelSpec):
+        """
+        Declare a model, replacing an earlier declaration of the same name that has not been loaded.
+        """
+
+        if spec.name in self.loaded:
+            raise ValueError(f"Model {spec.name} is already loaded and cannot be declared again")
+        self.specs[spec.name] = spec
+        self._locks[spec.name] = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self.specs)
+
+    def lazy_models(self) -> Dict[str, LazyModel]:
+        return {name: LazyModel(self, name) for name in self.specs}
+
+    def get(self, name: str):
+        model = self.loaded.get(name)
+        if model is not None:
+            return model
+        if name not in self.specs:
+            raise KeyError(f"Model {name} is not declared")
+
+        with self._locks[name]:
+            if name not in self.loaded:
+                self.loaded[name] = self._build(self.specs[name])
+        return self.loaded[name]
+
+    def _build(self, spec: ModelSpec):
+        start = time.perf_counter()
+        try:
+            module_name, attribute = spec.factory.split(':')
+            module = importlib.import_module(module_name, package=__package__)
+            model = getattr(module, attribute)(**spec.kwargs)
+        except Exception as e:
+            self.errors[spec.name] = f"{type(e).__name__}: {e}"
+            raise RuntimeError(f"Loading model {spec.name} from {spec.factory} failed") from e
+
+        seconds = time.perf_counter() - start
+        self.load_seconds[spec.name] = seconds
+        self.errors.pop(spec.name, None)
+        self.metrics.observe('poker_model_load_seconds', seconds, model=spec.name)
+        return model
+
+    def warm_up(self, names: Optional[List[str]] = None, background: bool = True):
+        """
+        Load the models declared with warm_up, or the given models, on a background thread unless background is False.
+        Failures are kept in errors and do not stop the other models from loading.
+        """
+
+        names = [name for name, spec in self.specs.items() if spec.warm_up] if names is None else names
+        if not names:
+            return
+
+        def load():
+            for name in names:
+                try:
+                    self.get(name)
+                except RuntimeError:
+                    pass
+
+        if not background:
+            load()
+            return
+        with self._lock:
+            self._warm_up_thread = threading.Thread(target=load, name='model-warm-up', daemon=True)
+            self._warm_up_thread.start()
+
+    def ready(self) -> bool:
+        """
+        Whether all models declared with warm_up are loaded or failed to load. Failed models are listed by failed()
+        and left out of the games that need them, instead of keeping the app from ever being ready.
+        """
+
+        return all(name in self.loaded or name in self.errors for name, spec in self.specs.items() if spec.warm_up)
+
+    def failed(self) -> List[str]:
+        """
+        Get the names of the models whose last load failed.
+        """
+
+        return [name for name in self.specs if name in self.errors and name not in self.loaded]
+
+    def status(self) -> dict:
+        models = {}
+        for name, spec in self.specs.items():
+            if name in self.loaded:
+                state = 'loaded'
+            elif name in self.errors:
+                state = 'failed'
+            elif self._locks[name].locked():
+                state = 'loading'
+            else:
+                state = 'declared'
+            models[name] = {'state': state, 'warm_up': spec.warm_up, 'load_seconds': self.load_seconds.get(name), 'error': self.errors.get(name)}
+        return {'ready': self.ready(), 'failed': self.failed(), 'models': models}
@@ -0,0 +1,134 @@
+from array import array
+from collections import deque
+import math
+from typing import List, Optional
+
+from .hand_store import HandRecord
+from .player import Player
+from .poker_game import Move, PokerGame
+
+
+class RecordedModel:
+    """
+    A stand-in for the model of a replayed seat, only asked for moves once the recorded hands are over.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def get_move(self, prompt):
+        raise RuntimeError(f"There are no recorded moves left for {self.name} and it cannot be called")
+
+
+class ReplayGame(PokerGame):
+    """
+    A poker game that replays recorded hands without calling any model: each hand is dealt the recorded cards
+    and the players make the recorded moves. A recorded move that the engine rejects, or that is made by
+    another player than the engine expects, raises a ValueError naming the hand where the replay diverged.
+
+    Games play len(hands) rounds by default. If num_rounds is larger, the game is fast forwarded through the
+    recorded hands and continues live with the players' models, dealing from the seed like the original game.
+    """
+
+    def __init__(self, players: List[Player], hands: List[HandRecord], *args, num_rounds: Optional[int] = None, **kwargs):
+        # The recorded hands are needed to deal the first hand during initialization
+        self.hands = hands
+        self.recorded_moves = deque()
+        self.recorded_hand = -1
+
+        super().__init__(players, *args, num_rounds=len(hands) if num_rounds is None else num_rounds, **kwargs)
+
+
+    def replaying(self):
+        return self.game_statistics.num_rounds < len(self.hands)
+
+
+    def shuffled_deck(self):
+        """
+        Stack the deck with the recorded hole cards and board, dealt seat by seat like PokerGame.deal_cards.
+        """
+
+        # Shuffle anyway, so that the live hands after the records are dealt like in the original game
+        deck = super().shuffled_deck()
+        if not self.replaying():
+            return deck
+
+        record = self.hands[self.game_statistics.num_rounds]
+        dealt = [card for cards in record.hole_cards for card in cards] + list(record.board)
+        dealt_set = set(dealt)
+        return array('B', dealt + [card for card in deck if card not in dealt_set])
+
+
+    def get_move_context(self, player_id: int):
+        # Recorded moves need no context
+        return "" if self.replaying() else super().get_move_context(player_id)
+
+
+    def request_move(self, player_id: int, context: str, errors: str):
+        """
+        Play the next recorded move of the hand instead of asking the model.
+        """
+
+        if not self.replaying():
+            return super().request_move(player_id, context, errors)
+
+        hand = self.game_statistics.num_rounds
+        if self.recorded_hand != hand:
+            self.recorded_moves = deque(action for action in self.hands[hand].actions if action[1] not in ('small_blind', 'big_blind'))
+            self.recorded_hand = hand
+
+        if errors:
+            raise ValueError(f"Replay diverged in hand {hand}: the recorded move of {self.player_names[player_id]} was rejected:{errors}")
+        if not self.recorded_moves:
+            raise ValueError(f"Replay diverged in hand {hand}: {self.player_names[player_id]} is to move but there are no recorded moves left")
+
+        seat, action, amount = self.recorded_moves.popleft()
+        if seat != player_id:
+            raise ValueError(f"Replay diverged in hand {hand}: {self.player_names[player_id]} is to move but the recorded move is by {self.player_names[seat]}")
+
+        return Move(action=action, amount=amount if action == 'raise' else 0.0)
+
+
+    def showdown(self):
+        if self.replaying() and self.recorded_moves:
+            raise ValueError(f"Replay diverged in hand {self.game_statistics.num_rounds}: the hand ended with {len(self.recorded_moves)} recorded moves left")
+        super().showdown()
+
+
+def replay_players(model_names: List[str]) -> List[Player]:
+    """
+    Create players for the seats of recorded hands, named by model and, if a model has several seats, by seat.
+    """
+
+    duplicates = len(set(model_names)) < len(model_names)
+    return [Player(name=f"{model_name} (seat {seat + 1})" if duplicates else model_name, model=RecordedModel(model_name))
+            for seat, model_name in enumerate(model_names)]
+
+
+def replay_game(hands: List[HandRecord], money: List[float] = [], players: Optional[List[Player]] = None, **game_kwargs) -> ReplayGame:
+    """
+    Replay the recorded hands of a game, started with the given money per seat, and return the finished game.
+    """
+
+    assert hands, "There must be at least one hand to replay"
+
+    if players is None:
+        players = replay_players(hands[0].model_names)
+    game = ReplayGame(players, hands, money=money, game_id=hands[0].game_id, **game_kwargs)
+    game.play_game()
+    return game
+
+
+def find_divergences(game: PokerGame, hands: List[HandRecord]) -> List[int]:
+    """
+    Get the hands whose money gained per seat differs between a replayed game and the records.
+    The hand history stores money in whole chips, so money is compared to the nearest chip.
+    """
+
+    divergences = []
+    for hand, record in enumerate(hands):
+        gained = [game.game_statistics.money_gained[seat][hand] if hand < len(game.game_statistics.money_gained[seat]) else None
+                  for seat in range(game.num_players)]
+        if any(money is None or not math.isclose(money, delta, rel_tol=0.0, abs_tol=0.5) for money, delta in zip(gained, record.deltas)):
+            divergences.append(hand)
+    return divergences
@@ -0,0 +1,116 @@
+import asyncio
+from collections import OrderedDict
+import json
+from typing import AsyncIterator, Callable, Optional
+
+from .async_poker_game import AsyncPokerGame
+
+
+class GameBroadcaster:
+    """
+    A class to fan out the events of one running game to any number of viewers.
+    Events are stored once and every viewer reads them at its own pace with its own cursor,
+    so a slow viewer never blocks the game or the other viewers, and late viewers get the game from the start.
+    If on_finish is given, it is called with the finished game before viewers get its game_end event.
+    Viewers are spectators of a live game, so the hole cards are left out of the deal events, the showdown shows them.
+    """
+
+    def __init__(self, game: AsyncPokerGame, on_finish: Optional[Callable[[AsyncPokerGame], None]] = None):
+        self.game = game
+        self.on_finish = on_finish
+        self.events = []
+        self._game_end = None
+        self.finished = False
+        self.error = None
+        self._changed = asyncio.Event()
+        self._task = None
+        game.event_listeners.append(self.publish)
+
+    def publish(self, event: dict):
+        # The game's result is recorded before viewers are told it ended, so that they see it e.g. in the standings
+        if event['type'] == 'game_end' and self.on_finish is not None and not self.finished:
+            self._game_end = event
+            return
+        if event['type'] == 'deal':
+            event = {**event, 'hands': {name: [] for name in event['hands']}}
+
+        self.events.append(event)
+
+        # Wake up the waiting viewers and give the next wait a fresh event
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def start(self):
+        """
+        Start playing the game in a background task.
+        """
+
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self._task
+
+    async def _run(self):
+        try:
+            await self.game.play_game()
+            if self.on_finish is not None:
+                self.on_finish(self.game)
+        except Exception as e:
+            self.error = repr(e)
+            self.publish({'type': 'game_error', 'game_id': self.game.game_id, 'error': self.error})
+        finally:
+            self.finished = True
+            if self._game_end is not None:
+                self.publish(self._game_end)
+            self._changed.set()
+
+    async def subscribe(self, start: int = 0) -> AsyncIterator[dict]:
+        """
+        Yield the game's events from position start until the game is finished.
+        """
+
+        cursor = start
+        while True:
+            if cursor < len(self.events):
+                event = self.events[cursor]
+                cursor += 1
+                yield event
+            elif self.finished:
+                return
+            else:
+                await self._changed.wait()
+
+
+class GameRegistry:
+    """
+    A class to keep track of the running and recently finished broadcast games.
+    """
+
+    def __init__(self, max_games: int = 100):
+        self.max_games = max_games
+        self.games = OrderedDict()
+
+    def start_game(self, game: AsyncPokerGame, on_finish: Optional[Callable[[AsyncPokerGame], None]] = None) -> GameBroadcaster:
+        broadcaster = GameBroadcaster(game, on_finish)
+        self.games[game.game_id] = broadcaster
+        broadcaster.start()
+
+        # Forget the oldest finished games
+        while len(self.games) > self.max_games:
+            oldest_id = next((game_id for game_id, other in self.games.items() if other.finished), None)
+            if oldest_id is None:
+                break
+            del self.games[oldest_id]
+
+        return broadcaster
+
+    def get(self, game_id: int) -> Optional[GameBroadcaster]:
+        return self.games.get(game_id)
+
+
+def to_server_sent_event(event: dict, event_id: Optional[int] = None) -> str:
+    """
+    Format an event for an EventSource. The id is the position to resume from after a reconnect, see Last-Event-ID.
+    """
+
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event['type']}\ndata: {json.dumps(event)}\n\n"
@@ -0,0 +1,98 @@
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import threading
+import time
+
+
+def _random_move():
+    return random.choice(['fold', 'check', 'call', 'raise'])
+
+
+class StubInferenceHandler(BaseHTTPRequestHandler):
+    """
+    Answers like a model backend with random moves after a fixed latency:
+    POST /generate with a batch of prompts (see BatchingModel) and POST /move with a single prompt (see ModelClient).
+    A share of the requests fails with 503 (error_rate) or 429 (rate_limit_rate) to exercise the clients' retries.
+    The sizes of the received batches are kept on the server.
+    """
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        self.server.requests += 1
+
+        if self.path not in ('/generate', '/move'):
+            self.reply(404, {'error': 'not found'})
+            return
+
+        failure = random.random()
+        if failure < self.server.error_rate:
+            self.reply(503, {'error': 'unavailable'})
+            return
+        if failure < self.server.error_rate + self.server.rate_limit_rate:
+            self.reply(429, {'error': 'rate limited'}, headers={'Retry-After': '0.01'})
+            return
+
+        # One forward pass serves the whole batch
+        time.sleep(self.server.latency)
+        if self.path == '/generate':
+            self.server.batch_sizes.append(len(body['prompts']))
+            self.reply(200, {'moves': [_random_move() for _ in body['prompts']]})
+        else:
+            self.reply(200, {'move': _random_move()})
+
+    def reply(self, status: int, content: dict, headers: dict = {}):
+        data = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def create_stub_server(port: int = 0, latency: float = 0.05, error_rate: float = 0.0, rate_limit_rate: float = 0.0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubInferenceHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.error_rate = error_rate
+    server.rate_limit_rate = rate_limit_rate
+    server.requests = 0
+    server.batch_sizes = []
+    return server
+
+
+def start_stub_server(port: int = 0, latency: float = 0.05, error_rate: float = 0.0, rate_limit_rate: float = 0.0):
+    """
+    Start a stub inference server in a background thread, port 0 picks a free port.
+    Returns the server and its url, stop it with server.shutdown().
+    """
+
+    server = create_stub_server(port, latency, error_rate, rate_limit_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a stub model backend that answers with random moves.")
+    parser.add_argument('--port', type=int, default=8001)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per batch")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help="share of requests answered with 429")
+    args = parser.parse_args()
+
+    server = create_stub_server(args.port, args.latency, args.error_rate, args.rate_limit_rate)
+    print(f"Stub inference server listening on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+from array import array
+from typing import List, Tuple
+
+
+# Active seats in playing order, by (number of seats, seat bitmask, first seat)
+_SEAT_ORDERS = {}
+
+
+def seat_order(num_players: int, mask: int, start: int = 0) -> Tuple[int, ...]:
+    """
+    Get the seats set in mask, in playing order starting from seat start.
+    """
+
+    key = (num_players, mask, start)
+    order = _SEAT_ORDERS.get(key)
+    if order is None:
+        order = tuple(seat % num_players for seat in range(start, start + num_players) if mask >> (seat % num_players) & 1)
+        _SEAT_ORDERS[key] = order
+    return order
+
+
+class TableState:
+    """
+    A class to hold the state of a table compactly: money, bets and hole cards as parallel lists indexed by seat,
+    the active and all in seats as bitmasks, and the round's preshuffled deck read through a cursor.
+    """
+
+    __slots__ = ('num_players', 'money', 'bets', 'hands', 'active', 'all_in',
+                 'deck', 'deck_position', 'pot', 'cards', 'call_amount', 'all_in_cards', 'actions')
+
+    def __init__(self, money: List[float]):
+        self.num_players = len(money)
+        self.money = list(money)
+        self.bets = [0.0] * self.num_players
+        self.hands = [[] for _ in range(self.num_players)]
+        self.active = (1 << self.num_players) - 1
+        self.all_in = 0
+
+        self.deck = array('B')
+        self.deck_position = 0
+        self.pot = 0
+        self.cards = []
+        self.call_amount = 0
+        # Number of community cards out when all but one active player were all in, None while betting goes on
+        self.all_in_cards = None
+        # (seat, action, amount) of the current round
+        self.actions = []
+
+    def reset(self, deck: array, call_amount: float) -> int:
+        """
+        Start a new round with a shuffled deck. Players without money are no longer active.
+        Returns the number of eliminated players.
+        """
+
+        self.deck = deck
+        self.deck_position = 0
+        self.pot = 0
+        self.cards = []
+        self.call_amount = call_amount
+        self.all_in_cards = None
+        self.actions = []
+
+        self.active = 0
+        self.all_in = 0
+        for seat in range(self.num_players):
+            self.bets[seat] = 0.0
+            self.hands[seat] = []
+            if self.money[seat] > 0:
+                self.active |= 1 << seat
+
+        return self.num_players - self.num_active()
+
+    def draw(self) -> int:
+        card = self.deck[self.deck_position]
+        self.deck_position += 1
+        return card
+
+    def is_active(self, seat: int) -> bool:
+        return self.active >> seat & 1 == 1
+
+    def is_all_in(self, seat: int) -> bool:
+        return self.all_in >> seat & 1 == 1
+
+    def fold(self, seat: int):
+        self.active &= ~(1 << seat)
+
+    def set_all_in(self, seat: int):
+        self.all_in |= 1 << seat
+
+    def active_seats(self, start: int = 0) -> Tuple[int, ...]:
+        return seat_order(self.num_players, self.active, start)
+
+    def num_active(self) -> int:
+        return bin(self.active).count('1')
@@ -0,0 +1,186 @@
+"""
+Headless multi-table tournament runner.
+
+Run from the backend directory with: python -m models.tournament --tables 100 --seats 6 --rounds 50 --workers 4
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+import json
+import os
+import random
+import time
+from typing import List, Optional
+
+from .model_handler import ModelHandler
+from .player import Player
+from .poker_game import GameStatistics, PokerGame
+from .profiles import OpponentProfiles
+
+
+@dataclass
+class TournamentResults:
+    """
+    A class to represent the aggregated results of many tables, keyed by model name.
+    """
+
+    num_tables: int = 0
+    num_rounds: int = 0
+    hands_played: dict[str, int] = field(default_factory=dict)
+    wins: dict[str, int] = field(default_factory=dict)
+    money_gained: dict[str, float] = field(default_factory=dict)
+    all_in_adjusted_money: dict[str, float] = field(default_factory=dict)
+    profiles: OpponentProfiles = field(default_factory=OpponentProfiles)
+
+    def add_game(self, model_names: List[str], statistics: GameStatistics):
+        """
+        Add the statistics of one table whose seats are played by model_names.
+        """
+
+        self.num_tables += 1
+        self.num_rounds += statistics.num_rounds
+
+        for seat, model_name in enumerate(model_names):
+            self.hands_played[model_name] = self.hands_played.get(model_name, 0) + len(statistics.money_gained[seat])
+            self.money_gained[model_name] = self.money_gained.get(model_name, 0.0) + sum(statistics.money_gained[seat])
+            self.all_in_adjusted_money[model_name] = self.all_in_adjusted_money.get(model_name, 0.0) + sum(statistics.all_in_adjusted_money[seat])
+            self.wins.setdefault(model_name, 0)
+
+        for winner in statistics.winners:
+            self.wins[model_names[winner]] += 1
+
+    def merge(self, other: 'TournamentResults'):
+        """
+        Merge the results of another shard into these results.
+        """
+
+        self.num_tables += other.num_tables
+        self.num_rounds += other.num_rounds
+        for totals, other_totals in [(self.hands_played, other.hands_played), (self.wins, other.wins),
+                                     (self.money_gained, other.money_gained), (self.all_in_adjusted_money, other.all_in_adjusted_money)]:
+            for model_name, value in other_totals.items():
+                totals[model_name] = totals.get(model_name, 0) + value
+        self.profiles.merge(other.profiles)
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            'num_tables': self.num_tables,
+            'num_rounds': self.num_rounds,
+            'hands_played': self.hands_played,
+            'wins': self.wins,
+            'money_gained': self.money_gained,
+            'all_in_adjusted_money': self.all_in_adjusted_money,
+            'profiles': self.profiles.to_dict()
+        }
+
+
+def table_seed(seed: int, table_id: int) -> int:
+    """
+    Derive the seed of a table from the tournament seed, independent of how tables are sharded.
+    """
+
+    return random.Random(f"{seed}-{table_id}").getrandbits(64)
+
+
+def create_table(table_id: int, models: dict, num_seats: int, seed: int, **game_kwargs):
+    """
+    Seat num_seats players drawn from the model roster at a table and return the game and the model name of each seat.
+    """
+
+    rng = random.Random(table_seed(seed, table_id))
+    names = list(models)
+    if num_seats <= len(names):
+        model_names = rng.sample(names, num_seats)
+    else:
+        model_names = [rng.choice(names) for _ in range(num_seats)]
+
+    # Players are named by seat so that a model can sit at a table more than once
+    players = [Player(name=f"{model_name} (seat {seat + 1})", model=models[model_name]) for seat, model_name in enumerate(model_names)]
+    game = PokerGame(players, seed=rng.getrandbits(64), **game_kwargs)
+    return game, model_names
+
+
+def play_shard(table_ids: List[int], num_seats: int, seed: int, game_kwargs: dict) -> TournamentResults:
+    """
+    Play a shard of tables one after another in a single process.
+    """
+
+    models = ModelHandler().models
+    results = TournamentResults()
+
+    for table_id in table_ids:
+        profiles = OpponentProfiles()
+        game, model_names = create_table(table_id, models, num_seats, seed, profiles=profiles, **game_kwargs)
+
+        # Stub models draw from the global random module, seed it so the table is reproducible
+        random.seed(table_seed(seed, table_id))
+        results.add_game(model_names, game.play_game())
+
+        # Seats are profiled by player name, the results by model
+        results.profiles.merge(profiles.renamed({game.player_names[seat]: model_name for seat, model_name in enumerate(model_names)}))
+
+    return results
+
+
+def run_tournament(num_tables: int,
+                   num_seats: int = 6,
+                   num_rounds: int = 10,
+                   seed: int = 0,
+                   num_workers: Optional[int] = None,
+                   shard_size: Optional[int] = None,
+                   **game_kwargs
+    ) -> TournamentResults:
+    """
+    Play num_tables independent tables of num_seats seats for up to num_rounds rounds each,
+    sharded over a pool of num_workers processes (in process if num_workers is 1).
+    The results only depend on the seed, not on the number of workers or the sharding.
+    """
+
+    game_kwargs = dict(game_kwargs, num_rounds=num_rounds)
+    table_ids = list(range(num_tables))
+
+    if num_workers == 1:
+        return play_shard(table_ids, num_seats, seed, game_kwargs)
+
+    num_workers = num_workers or os.cpu_count() or 1
+
+    # A few shards per worker keeps the workers busy when tables take different amounts of time
+    shard_size = shard_size or max(1, num_tables // (4 * num_workers))
+
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        shards = [table_ids[i:i + shard_size] for i in range(0, num_tables, shard_size)]
+        futures = [executor.submit(play_shard, shard, num_seats, seed, game_kwargs) for shard in shards]
+
+        results = TournamentResults()
+        for future in futures:
+            results.merge(future.result())
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a headless multi-table poker tournament.")
+    parser.add_argument('--tables', type=int, default=100, help="Number of tables")
+    parser.add_argument('--seats', type=int, default=6, help="Number of seats per table")
+    parser.add_argument('--rounds', type=int, default=10, help="Maximum number of rounds per table")
+    parser.add_argument('--seed', type=int, default=0, help="Tournament seed")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes, defaults to the number of cores")
+    parser.add_argument('--output', type=str, default=None, help="Write the results as JSON to this file")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = run_tournament(args.tables, args.seats, args.rounds, seed=args.seed, num_workers=args.workers)
+    elapsed = time.perf_counter() - start
+
+    summary = dict(results.to_dict(), seconds=elapsed, rounds_per_second=results.num_rounds / elapsed)
+    print(json.dumps(summary, indent=2))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
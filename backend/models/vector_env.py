@@ -0,0 +1,363 @@
+from typing import List, Optional
+
+import numpy as np
+
+from .batch_evaluator import evaluate_batch
+
+
+class VectorPokerEnv:
+    """
+    A class to play many tables of texas holdem in lockstep, with the rules of PokerGame: fixed small and big blind
+    seats, at most raises_per_round raises per betting round, preflop betting starting left of the big blind and later
+    streets starting at the small blind, side pots and odd chips split in seat order from the small blind.
+
+    Every table plays single hands from the starting money, and starts the next hand as soon as one ends.
+    step takes one action per table for the player to act and returns the observations, the money won or lost
+    by each seat in the hands that ended and which tables ended a hand. Actions that are not legal count as folds.
+    """
+
+    # Actions, a raise puts in the call plus half the pot, the pot or all the money left, at least the big blind
+    FOLD, CHECK_CALL, RAISE_HALF_POT, RAISE_POT, ALL_IN = range(5)
+    NUM_ACTIONS = 5
+    RAISE_FRACTIONS = {RAISE_HALF_POT: 0.5, RAISE_POT: 1.0}
+
+    # Moves applied, as reported by step
+    MOVE_FOLD, MOVE_CHECK, MOVE_CALL, MOVE_RAISE = range(4)
+
+    # Community cards by street
+    BOARD_SIZES = np.array([0, 3, 4, 5])
+
+    def __init__(self,
+                 num_tables: int,
+                 num_players: int = 6,
+                 money: float = 1000.0,
+                 small_blind: int = 10,
+                 big_blind: int = 20,
+                 raises_per_round: int = 3,
+                 chip: float = 1.0,
+                 seed: Optional[int] = None
+    ):
+        assert num_players >= 2, "There must be at least 2 players to play poker"
+        assert money > big_blind, "The starting money must be more than the big blind, so that every hand has a decision"
+
+        self.num_tables = num_tables
+        self.num_players = num_players
+        self.starting_money = float(money)
+        self.small_blind = small_blind
+        self.big_blind = big_blind
+        self.raises_per_round = raises_per_round
+        self.chip = chip
+        self.rng = np.random.default_rng(seed)
+
+        # Seats of the blinds, as in PokerGame
+        self.small_blind_id = 0
+        self.big_blind_id = 1
+
+        shape = (num_tables, num_players)
+        self.money = np.zeros(shape)
+        self.bets = np.zeros(shape)
+        self.active = np.zeros(shape, dtype=bool)
+        self.all_in = np.zeros(shape, dtype=bool)
+        # Seats still to act in the betting round, in seat order from pointer
+        self.pending = np.zeros(shape, dtype=bool)
+        self.pointer = np.zeros(num_tables, dtype=np.int64)
+        self.actor = np.full(num_tables, -1, dtype=np.int64)
+        self.street = np.zeros(num_tables, dtype=np.int64)
+        self.pot = np.zeros(num_tables)
+        self.call_amount = np.zeros(num_tables)
+        self.raise_count = np.zeros(num_tables, dtype=np.int64)
+        self.decks = np.zeros((num_tables, 52), dtype=np.int64)
+        self.hands_played = 0
+
+        self._rows = np.arange(num_tables)
+        self._seats = np.arange(num_players)
+
+    def reset(self):
+        """
+        Start a new hand on every table and return the observations.
+        """
+
+        rewards = np.zeros((self.num_tables, self.num_players))
+        dones = np.zeros(self.num_tables, dtype=bool)
+        self._start_hands(np.ones(self.num_tables, dtype=bool))
+        self._advance(rewards, dones)
+        return self.observe()
+
+    def _start_hands(self, tables: np.ndarray):
+        """
+        Shuffle, post the blinds and deal a new hand on the given tables.
+        """
+
+        count = int(tables.sum())
+        self.decks[tables] = np.argsort(self.rng.random((count, 52)), axis=1)
+        self.money[tables] = self.starting_money
+        self.bets[tables] = 0.0
+        self.active[tables] = True
+        self.all_in[tables] = False
+
+        # A player with no more than the blind is all in
+        for seat, blind in ((self.small_blind_id, self.small_blind), (self.big_blind_id, self.big_blind)):
+            money = self.money[tables, seat]
+            bet = np.minimum(money, blind)
+            self.all_in[tables, seat] = money <= blind
+            self.bets[tables, seat] = bet
+            self.money[tables, seat] = money - bet
+
+        self.pot[tables] = self.bets[tables].sum(axis=1)
+        self.call_amount[tables] = self.big_blind
+        self.street[tables] = 0
+        self.raise_count[tables] = 0
+        self.pending[tables] = self.active[tables]
+        self.pointer[tables] = (self.big_blind_id + 1) % self.num_players
+        self.actor[tables] = -1
+        self.hands_played += count
+
+    def raise_amounts(self) -> np.ndarray:
+        """
+        Get the money the player to act would put in with each raise action, as a (tables, 5) array.
+        """
+
+        rows, actor = self._rows, self.actor
+        to_call = self.call_amount - self.bets[rows, actor]
+        amounts = np.zeros((self.num_tables, self.NUM_ACTIONS))
+        for action, fraction in self.RAISE_FRACTIONS.items():
+            amounts[:, action] = to_call + np.maximum(self.big_blind, np.round(self.pot * fraction))
+        amounts[:, self.ALL_IN] = self.money[rows, actor]
+        return amounts
+
+    def legal_actions(self) -> np.ndarray:
+        """
+        Get a (tables, 5) mask of the legal actions of the player to act.
+        """
+
+        rows, actor = self._rows, self.actor
+        to_call = self.call_amount - self.bets[rows, actor]
+        money = self.money[rows, actor]
+        raise_allowed = (self.raise_count < self.raises_per_round) & (money > to_call)
+
+        legal = np.zeros((self.num_tables, self.NUM_ACTIONS), dtype=bool)
+        legal[:, self.FOLD] = True
+        legal[:, self.CHECK_CALL] = True
+        amounts = self.raise_amounts()
+        for action in self.RAISE_FRACTIONS:
+            legal[:, action] = raise_allowed & (amounts[:, action] <= money)
+        legal[:, self.ALL_IN] = raise_allowed
+        return legal
+
+    def observe(self) -> dict:
+        """
+        Get the observations of the players to act: their seat and hole cards, the dealt community cards (-1 if not dealt),
+        the street, the pot, the money still to call and the money, bets and flags of all seats, plus the legal actions.
+        """
+
+        rows, actor = self._rows, self.actor
+        board_size = self.BOARD_SIZES[self.street]
+        board = self.decks[:, 2 * self.num_players:2 * self.num_players + 5]
+        hole_cards = np.take_along_axis(self.decks, np.stack([2 * actor, 2 * actor + 1], axis=1), axis=1)
+        return {
+            'player': actor.copy(),
+            'hole_cards': hole_cards,
+            'board': np.where(np.arange(5) < board_size[:, None], board, -1),
+            'street': self.street.copy(),
+            'pot': self.pot.copy(),
+            'to_call': self.call_amount - self.bets[rows, actor],
+            'money': self.money.copy(),
+            'bets': self.bets.copy(),
+            'active': self.active.copy(),
+            'all_in': self.all_in.copy(),
+            'legal': self.legal_actions()
+        }
+
+    def step(self, actions):
+        """
+        Apply one action per table for the player to act and play on until every table has a player to act again.
+        Returns the observations, a (tables, players) array of money won or lost in the hands that ended, a mask of the
+        tables whose hand ended, and the moves applied: the seat, move (MOVE_FOLD, ...) and money put in per table.
+        """
+
+        actions = np.asarray(actions, dtype=np.int64)
+        rows, actor = self._rows, self.actor
+
+        legal = self.legal_actions()
+        amounts = self.raise_amounts()
+        actions = np.where(legal[rows, actions], actions, self.FOLD)
+
+        to_call = self.call_amount - self.bets[rows, actor]
+        money = self.money[rows, actor]
+        folds = actions == self.FOLD
+        calls = actions == self.CHECK_CALL
+        raises = actions >= self.RAISE_HALF_POT
+
+        # Calls of all the money left or more are all in
+        paid = np.where(calls, np.where(money > to_call, to_call, money), 0.0)
+        paid = np.where(raises, amounts[rows, actions], paid)
+        self.money[rows, actor] = money - paid
+        self.bets[rows, actor] += paid
+        self.pot += paid
+        self.all_in[rows, actor] |= (calls & (money <= to_call)) | (raises & (money - paid == 0))
+        self.active[rows[folds], actor[folds]] = False
+
+        # A raise makes every other active player act again
+        self.call_amount = np.where(raises, self.call_amount + paid - to_call, self.call_amount)
+        self.raise_count += raises
+        self.pending[raises] = self.active[raises]
+        self.pending[rows, actor] = False
+        self.pointer = (actor + 1) % self.num_players
+
+        moves = np.where(folds, self.MOVE_FOLD, np.where(raises, self.MOVE_RAISE, np.where(to_call > 0, self.MOVE_CALL, self.MOVE_CHECK)))
+        info = {'player': actor.copy(), 'move': moves, 'amount': paid}
+
+        rewards = np.zeros((self.num_tables, self.num_players))
+        dones = np.zeros(self.num_tables, dtype=bool)
+        self.actor = np.full(self.num_tables, -1, dtype=np.int64)
+        self._advance(rewards, dones)
+        return self.observe(), rewards, dones, info
+
+    def _advance(self, rewards: np.ndarray, dones: np.ndarray):
+        """
+        Find the next player to act on every table without one, dealing the next streets and settling and restarting
+        the hands that end on the way.
+        """
+
+        while True:
+            waiting = self.actor < 0
+            if not waiting.any():
+                return
+
+            # Next pending player in seat order from the pointer, all in players are skipped
+            candidates = self.pending & self.active & ~self.all_in
+            order = (self.pointer[:, None] + self._seats) % self.num_players
+            candidates = np.take_along_axis(candidates, order, axis=1)
+            found = candidates.any(axis=1)
+            seat = order[self._rows, candidates.argmax(axis=1)]
+
+            folded_out = waiting & (self.active.sum(axis=1) <= 1)
+            acting = waiting & ~folded_out & found
+            self.actor[acting] = seat[acting]
+
+            round_over = waiting & ~folded_out & ~found
+            finished = folded_out | (round_over & (self.street == 3))
+            next_street = round_over & (self.street < 3)
+
+            self.street[next_street] += 1
+            self.pending[next_street] = self.active[next_street]
+            self.pointer[next_street] = self.small_blind_id
+            self.raise_count[next_street] = 0
+
+            if finished.any():
+                rewards[finished] += self._settle(finished)
+                dones |= finished
+                self._start_hands(finished)
+
+    def _settle(self, tables: np.ndarray) -> np.ndarray:
+        """
+        Split the bets of the given tables into the main pot and side pots like pots.build_pots,
+        award each pot to its best eligible hands like pots.settle_pots and return each seat's net result.
+        """
+
+        bets = self.bets[tables]
+        active = self.active[tables]
+        decks = self.decks[tables]
+        count, num_players = bets.shape
+
+        board = decks[:, 2 * num_players:2 * num_players + 5]
+        cards = np.concatenate([decks[:, :2 * num_players].reshape(count, num_players, 2),
+                                np.broadcast_to(board[:, None, :], (count, num_players, 5))], axis=2)
+        scores = np.where(active, evaluate_batch(cards.reshape(-1, 7)).reshape(count, num_players), -1)
+
+        # Contribution levels of the active seats, the highest one takes the money of folded seats above it
+        levels = np.sort(np.where(active & (bets > 0), bets, np.inf), axis=1)
+        top = np.where(np.isfinite(levels), levels, -np.inf).max(axis=1)
+        dead_money = np.where(np.isfinite(top)[:, None], np.maximum(0.0, bets - top[:, None]), bets).sum(axis=1)
+
+        payouts = np.zeros((count, num_players))
+        previous = np.zeros(count)
+        for j in range(num_players + 1):
+            if j < num_players:
+                level = levels[:, j]
+                pot = np.isfinite(level) & (level > previous)
+                amount = (np.minimum(bets, level[:, None]) - np.minimum(bets, previous[:, None])).sum(axis=1)
+                amount = np.where(level == top, amount + dead_money, amount)
+                eligible = active & (bets >= level[:, None])
+            else:
+                # Nothing was bet by the active seats, all the money is one pot
+                pot = ~np.isfinite(top)
+                amount = dead_money
+                eligible = active
+
+            if not pot.any():
+                continue
+
+            best = np.where(eligible, scores, -2).max(axis=1)
+            winners = eligible & (scores == best[:, None]) & pot[:, None]
+            num_winners = np.maximum(winners.sum(axis=1), 1)
+            share = np.floor(amount / num_winners / self.chip) * self.chip
+
+            # Odd chips go one at a time to the winners in seat order from the small blind
+            remainder = amount - share * num_winners
+            rank = np.cumsum(np.roll(winners, -self.small_blind_id, axis=1), axis=1) - 1
+            rank = np.roll(rank, self.small_blind_id, axis=1)
+            extra = np.clip(remainder[:, None] - rank * self.chip, 0.0, self.chip)
+            payouts += np.where(winners, share[:, None] + extra, 0.0)
+
+            if j < num_players:
+                previous = np.where(pot, level, previous)
+
+        return payouts - bets
+
+
+MOVE_NAMES = {VectorPokerEnv.MOVE_FOLD: 'fold', VectorPokerEnv.MOVE_CHECK: 'check',
+              VectorPokerEnv.MOVE_CALL: 'call', VectorPokerEnv.MOVE_RAISE: 'raise'}
+
+
+def random_actions(observations: dict, rng: np.random.Generator, fold_weight: float = 0.3) -> np.ndarray:
+    """
+    Pick a uniformly random legal action per table, folding less often than the other actions.
+    """
+
+    weights = observations['legal'] * rng.random(observations['legal'].shape)
+    weights[:, VectorPokerEnv.FOLD] *= fold_weight
+    return weights.argmax(axis=1)
+
+
+def cross_check(env: VectorPokerEnv, num_hands: int, seed: int = 0) -> List[str]:
+    """
+    Play num_hands hands with random legal actions and replay each one through PokerGame with the same cards and moves.
+    Returns a description of every hand that ended with different money or that PokerGame rejected, none if all agree.
+    """
+
+    # The scalar engine is only needed to check against
+    from .hand_store import HandRecord
+    from .replay import find_divergences, replay_game
+
+    rng = np.random.default_rng(seed)
+    model_names = [f"Seat {seat + 1}" for seat in range(env.num_players)]
+    num_players = env.num_players
+    observations = env.reset()
+    actions = [[] for _ in range(env.num_tables)]
+    records = []
+
+    while len(records) < num_hands:
+        decks = env.decks.copy()
+        observations, rewards, dones, info = env.step(random_actions(observations, rng))
+        for table in range(env.num_tables):
+            actions[table].append((int(info['player'][table]), MOVE_NAMES[int(info['move'][table])], float(info['amount'][table])))
+            if dones[table]:
+                deck = decks[table].tolist()
+                records.append(HandRecord(game_id=table, hand=len(records), model_names=model_names,
+                                          hole_cards=[deck[2 * seat:2 * seat + 2] for seat in range(num_players)],
+                                          board=deck[2 * num_players:2 * num_players + 5], pot=0.0,
+                                          deltas=rewards[table].tolist(), actions=actions[table]))
+                actions[table] = []
+
+    mismatches = []
+    for record in records[:num_hands]:
+        try:
+            game = replay_game([record], money=[env.starting_money] * num_players, small_blind=env.small_blind,
+                               big_blind=env.big_blind, raises_per_round=env.raises_per_round)
+            if find_divergences(game, [record]):
+                gained = [(game.game_statistics.money_gained[seat] or [None])[0] for seat in range(num_players)]
+                mismatches.append(f"Hand {record.hand} of table {record.game_id}: money {record.deltas}, PokerGame {gained}")
+        except ValueError as e:
+            mismatches.append(f"Hand {record.hand} of table {record.game_id}: {e}")
+    return mismatches
@@ -0,0 +1,49 @@
+"""
+Stub models for the tests.
+"""
+
+import random
+
+
+class RandomModel:
+    """
+    A stub model playing random moves from a list, by default with shoves so that short stacks make side pots.
+    """
+
+    MOVES = ['fold', 'check', 'call', 'call', 'raise 25', 'raise 77', 'all in']
+
+    def __init__(self, name: str, seed: int, moves=None):
+        self.name = name
+        self.rng = random.Random(seed)
+        self.moves = moves or self.MOVES
+
+    def get_move(self, prompt):
+        return self.rng.choice(self.moves)
+
+
+class CountingModel:
+    """
+    A stub model answering 'call' and keeping the prompts it was asked with.
+    """
+
+    deterministic = True
+
+    def __init__(self, name: str = 'counting'):
+        self.name = name
+        self.prompts = []
+
+    def get_move(self, prompt):
+        self.prompts.append(prompt)
+        return 'call'
+
+
+class SituationModel(CountingModel):
+    """
+    A stub rule based model answering 'check' and keeping the situations it was asked with.
+    """
+
+    reads_situation = True
+
+    def get_move(self, situation):
+        self.prompts.append(situation)
+        return 'check'
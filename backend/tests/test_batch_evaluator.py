@@ -0,0 +1,38 @@
+import numpy as np
+
+from models.batch_evaluator import evaluate_batch, resolve_winners_batch
+from models.evaluator import evaluate
+
+
+def random_deals(num_hands: int, num_players: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    deals = np.argsort(rng.random((num_hands, 52)), axis=1)[:, :5 + 2 * num_players]
+    return deals[:, 5:].reshape(num_hands, num_players, 2), deals[:, :5]
+
+
+def test_evaluate_batch_matches_evaluate():
+    cards = np.argsort(np.random.default_rng(1).random((2000, 52)), axis=1)[:, :7]
+    assert evaluate_batch(cards).tolist() == [evaluate(hand) for hand in cards.tolist()]
+
+
+def test_resolve_winners():
+    hole_cards, boards = random_deals(500, 4)
+    active = np.random.default_rng(2).random((500, 4)) < 0.7
+    scores, winners, shares = resolve_winners_batch(hole_cards, boards, active)
+
+    for hand in range(500):
+        best = max((scores[hand, seat] for seat in range(4) if active[hand, seat]), default=None)
+        expected = [bool(active[hand, seat] and scores[hand, seat] == best) for seat in range(4)]
+        assert winners[hand].tolist() == expected
+    assert np.allclose(shares.sum(axis=1), winners.any(axis=1))
+
+
+def test_no_active_players_have_no_winners():
+    hole_cards, boards = random_deals(3, 3)
+    active = np.array([[False, False, False], [True, False, False], [False, True, True]])
+    _, winners, shares = resolve_winners_batch(hole_cards, boards, active)
+
+    assert not winners[0].any()
+    assert shares[0].tolist() == [0.0, 0.0, 0.0]
+    assert winners[1].tolist() == [True, False, False]
+    assert not np.isnan(shares).any()
@@ -0,0 +1,55 @@
+import asyncio
+
+from models.batching import BatchingModel
+
+
+class EchoBatchingModel(BatchingModel):
+    """
+    A batching model answering every prompt with itself instead of calling an inference server.
+    """
+
+    def __init__(self, *args, fail: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fail = fail
+        self.batches = []
+
+    def generate(self, prompts):
+        self.batches.append(list(prompts))
+        if self.fail:
+            raise RuntimeError("server down")
+        return [f"call {prompt}" for prompt in prompts]
+
+
+def test_batches_are_kept_until_answered():
+    async def play():
+        model = EchoBatchingModel('echo', 'http://localhost:1', max_batch_size=2, max_wait=0.001)
+        moves = await asyncio.gather(*(model.get_move_async(str(i)) for i in range(5)))
+        await model.close()
+        return model, moves
+
+    model, moves = asyncio.run(play())
+    assert moves == [f"call {i}" for i in range(5)]
+    assert sorted(len(batch) for batch in model.batches) == [1, 2, 2]
+    assert not model._tasks
+
+
+def test_close_sends_waiting_prompts():
+    async def play():
+        model = EchoBatchingModel('echo', 'http://localhost:1', max_batch_size=8, max_wait=60.0)
+        move = asyncio.ensure_future(model.get_move_async('1'))
+        await asyncio.sleep(0)
+        await model.close()
+        return model, move.result()
+
+    model, move = asyncio.run(play())
+    assert move == "call 1"
+    assert model.batches == [['1']]
+
+
+def test_errors_reach_the_callers():
+    async def play():
+        model = EchoBatchingModel('echo', 'http://localhost:1', max_batch_size=2, fail=True)
+        return await asyncio.gather(model.get_move_async('1'), model.get_move_async('2'), return_exceptions=True)
+
+    for result in asyncio.run(play()):
+        assert isinstance(result, RuntimeError)
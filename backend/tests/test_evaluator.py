@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from models.evaluator import evaluate, evaluate_slow, full_deck
+
+
+@pytest.mark.parametrize('num_cards', [5, 6, 7])
+def test_evaluate_matches_slow_evaluator(num_cards):
+    rng = random.Random(num_cards)
+    deck = full_deck()
+    for _ in range(3000):
+        cards = rng.sample(deck, num_cards)
+        assert evaluate(cards) == evaluate_slow(cards), cards
+
+
+def test_evaluate_ranks_categories():
+    # Royal flush > four of a kind > full house > flush > straight > pair > high card
+    hands = [
+        [48, 44, 40, 36, 32],
+        [0, 1, 2, 3, 4],
+        [0, 1, 2, 4, 5],
+        [0, 8, 16, 24, 36],
+        [0, 5, 10, 15, 16],
+        [0, 1, 10, 15, 20],
+        [0, 9, 14, 23, 28]
+    ]
+    scores = [evaluate(hand) for hand in hands]
+    assert scores == sorted(scores, reverse=True)
@@ -0,0 +1,38 @@
+from models.hand_store import HandRecord, HandStore
+
+
+def record(game_id: int, hand: int, deltas, pot: float) -> HandRecord:
+    return HandRecord(game_id=game_id, hand=hand, model_names=['A', 'B'], hole_cards=[[0, 1], [2, 3]],
+                      board=[4, 5, 6, 7, 8], pot=pot, deltas=deltas,
+                      actions=[(0, 'small_blind', 10.0), (1, 'raise', pot / 2), (0, 'call', pot / 2 - 10)])
+
+
+def test_large_deltas_are_exact(tmp_path):
+    # Deltas above 2 ** 24 chips are not exact as 32 bit floats
+    big = 2 ** 24 + 1
+    store = HandStore(str(tmp_path), batch_size=2)
+    store.append(record(1, 0, [big, -big], 2 * big))
+    store.append(record(1, 1, [-3.0, 3.0], 6.0))
+    store.append(record(2, 0, [7.0, -7.0], 14.0))
+    store.flush()
+
+    hands = list(store.read(range(3)))
+    assert [hand.deltas for hand in hands] == [[big, -big], [-3, 3], [7, -7]]
+    assert hands[0].pot == 2 * big
+    assert hands[0].actions == [(0, 'small_blind', 10), (1, 'raise', big), (0, 'call', big - 10)]
+
+    assert store.model_totals() == {'A': (3, big + 4.0, big ** 2 + 58.0), 'B': (3, -big - 4.0, big ** 2 + 58.0)}
+    assert store.game_totals() == [(['A', 'B'], [big - 3.0, -big + 3.0]), (['A', 'B'], [7.0, -7.0])]
+
+
+def test_queries(tmp_path):
+    store = HandStore(str(tmp_path))
+    for hand in range(4):
+        store.append(record(hand % 2, hand, [1.0, -1.0], 2.0))
+    store.close()
+
+    store = HandStore(str(tmp_path))
+    assert store.query(game_id=1).tolist() == [1, 3]
+    assert store.query(model='A').tolist() == [0, 1, 2, 3]
+    assert store.query(model='C').tolist() == []
+    assert [hand.hand for hand in store.last_hands('B', 2)] == [2, 3]
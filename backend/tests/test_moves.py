@@ -0,0 +1,38 @@
+import pytest
+
+from models.poker_game import LegalActions, Move
+
+
+@pytest.mark.parametrize('reply', ["allin", "all-in", "all_in", "all in", "I'm going ALL-IN", '{"action": "allin"}', '{"action": "all_in"}'])
+def test_parse_all_in(reply):
+    assert Move.parse(reply) == Move(action='raise', amount=float('inf'))
+
+
+@pytest.mark.parametrize('reply, move', [
+    ("raise 40", Move(action='raise', amount=40.0)),
+    ("I will raise to $40", Move(action='raise', amount=40.0)),
+    ("bet 25.5", Move(action='raise', amount=25.5)),
+    ('{"action": "call", "amount": 20}', Move(action='call', amount=0.0)),
+    ("check", Move(action='check', amount=0.0)),
+])
+def test_parse(reply, move):
+    assert Move.parse(reply) == move
+
+
+@pytest.mark.parametrize('reply', ["", "maybe later", '{"action": "dance"}', '{"action": "raise", "amount": "lots"}'])
+def test_parse_rejects(reply):
+    with pytest.raises(ValueError):
+        Move.parse(reply)
+
+
+def test_negative_amount_is_clamped():
+    move = Move.parse('{"action": "raise", "amount": -40}')
+    assert move == Move(action='raise', amount=0.0)
+
+    legal_actions = LegalActions(actions=['fold', 'call', 'raise'], call_amount=20.0, min_raise=21.0, max_raise=500.0)
+    assert legal_actions.correct(move) == (Move(action='raise', amount=21.0), 'raise_below_min')
+
+
+def test_all_in_is_clamped_to_money():
+    legal_actions = LegalActions(actions=['fold', 'call', 'raise'], call_amount=20.0, min_raise=21.0, max_raise=500.0)
+    assert legal_actions.correct(Move.parse("allin")) == (Move(action='raise', amount=500.0), 'raise_above_max')
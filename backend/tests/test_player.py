@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+
+from models.decision_cache import DecisionCache
+from models.player import Player
+from tests.stubs import CountingModel, SituationModel
+
+
+def make_move(player: Player, use_async: bool, **kwargs):
+    if use_async:
+        return asyncio.run(player.make_move_async("state", " context", **kwargs))
+    return player.make_move("state", " context", **kwargs)
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_replies_are_cached_by_situation(use_async):
+    model = CountingModel()
+    player = Player('A', model, decision_cache=DecisionCache())
+
+    assert make_move(player, use_async, situation={'street': 'flop'}) == 'call'
+    assert make_move(player, use_async, situation={'street': 'flop'}) == 'call'
+    assert make_move(player, use_async, situation={'street': 'turn'}) == 'call'
+
+    assert len(model.prompts) == 2
+    assert model.prompts[0] == player.base_prompt + "state context"
+    assert player.context == "state context"
+    assert player.history == ['call'] * 3
+
+
+@pytest.mark.parametrize('use_async', [False, True])
+def test_rule_based_models_get_the_situation(use_async):
+    model = SituationModel()
+    player = Player('A', model, decision_cache=DecisionCache())
+
+    assert make_move(player, use_async, situation={'street': 'flop'}) == 'check'
+    assert model.prompts == [{'street': 'flop'}]
+    assert player.context == ""
+    assert player.uses_situation()
+
+
+def test_models_without_cache_do_not_use_the_situation():
+    assert not Player('A', CountingModel()).uses_situation()
@@ -0,0 +1,99 @@
+import random
+
+import pytest
+
+from models.player import Player
+from models.poker_game import PokerGame
+from models.pots import Pot, build_pots, settle_pots, split_pot
+from tests.stubs import RandomModel
+
+
+def settle(contributions, active, scores, order=None, chip=1):
+    """
+    Build and settle the pots of a showdown, checking the properties every settlement must have:
+    the pots and the payouts add up to the money put in, and only the best eligible seats win a pot.
+    """
+
+    order = active if order is None else order
+    pots = build_pots(contributions, active)
+    assert sum(pot.amount for pot in pots) == sum(contributions)
+    assert all(pot.eligible and set(pot.eligible) <= set(active) for pot in pots)
+
+    payouts, pot_winners = settle_pots(pots, scores, order, chip=chip)
+    assert sum(payouts.values()) == sum(contributions)
+    assert set(payouts) <= set(active)
+    for pot, winners in zip(pots, pot_winners):
+        assert all(scores[seat] == max(scores[other] for other in pot.eligible) for seat in winners)
+    return pots, payouts
+
+
+def test_all_in_side_pot():
+    # Seat 0 is all in for 50, seats 1 and 2 play on for 200 each
+    pots, payouts = settle([50.0, 200.0, 200.0], [0, 1, 2], {0: 3, 1: 2, 2: 1})
+
+    assert pots == [Pot(amount=150.0, eligible=[0, 1, 2]), Pot(amount=300.0, eligible=[1, 2])]
+    assert payouts == {0: 150.0, 1: 300.0}
+
+
+def test_odd_chip_split():
+    # Two winners split 45, the odd chip goes to the first of them in order
+    pots, payouts = settle([15.0, 15.0, 15.0], [0, 1, 2], {0: 1, 1: 5, 2: 5}, order=[2, 0, 1])
+
+    assert pots == [Pot(amount=45.0, eligible=[0, 1, 2])]
+    assert payouts == {2: 23.0, 1: 22.0}
+
+
+def test_folded_contribution():
+    # Seat 1 folded after putting in 80, more than the all in seat 0, and can win nothing
+    pots, payouts = settle([40.0, 80.0, 100.0], [0, 2], {0: 7, 2: 3})
+
+    assert pots == [Pot(amount=120.0, eligible=[0, 2]), Pot(amount=100.0, eligible=[2])]
+    assert payouts == {0: 120.0, 2: 100.0}
+
+
+def test_everyone_else_folded():
+    pots, payouts = settle([10.0, 20.0, 0.0], [1], {1: 0})
+
+    assert pots == [Pot(amount=30.0, eligible=[1])]
+    assert payouts == {1: 30.0}
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_random_showdowns_conserve_chips(seed):
+    # Whole chip contributions, folds and scores with many ties
+    rng = random.Random(seed)
+    for _ in range(500):
+        num_seats = rng.randint(2, 10)
+        contributions = [float(rng.choice([0, rng.randint(1, 50), rng.randint(1, 500)])) for _ in range(num_seats)]
+        active = sorted(rng.sample(range(num_seats), rng.randint(1, num_seats)))
+        scores = {seat: rng.randint(0, 2) for seat in active}
+        start = rng.randrange(len(active))
+        settle(contributions, active, scores, order=active[start:] + active[:start])
+
+
+@pytest.mark.parametrize('chip', [1, 5])
+def test_split_pot_odd_chips(chip):
+    rng = random.Random(chip)
+    for _ in range(1000):
+        winners = rng.sample(range(10), rng.randint(1, 10))
+        amount = float(rng.randint(0, 1000))
+        payouts = split_pot(amount, winners, chip)
+        assert sum(payouts.values()) == amount
+        # Shares differ by at most one chip and the odd chips go to the first winners
+        shares = [payouts[seat] for seat in winners]
+        assert max(shares) - min(shares) <= chip
+        assert shares == sorted(shares, reverse=True)
+
+
+@pytest.mark.parametrize('num_seats', range(2, 11))
+def test_games_conserve_chips(num_seats):
+    rng = random.Random(num_seats)
+    for game_seed in range(5):
+        money = [float(rng.randint(15, 400)) for _ in range(num_seats)]
+        players = [Player(name=f"Seat {seat + 1}", model=RandomModel(f"Seat {seat + 1}", game_seed * 100 + seat)) for seat in range(num_seats)]
+        game = PokerGame(players, money=money, small_blind=5, big_blind=10, num_rounds=30, seed=game_seed)
+        statistics = game.play_game()
+
+        assert sum(game.table.money) == sum(money)
+        for hand in range(statistics.num_rounds):
+            assert sum(statistics.money_gained[seat][hand] for seat in range(num_seats)) == 0
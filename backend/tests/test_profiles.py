@@ -0,0 +1,40 @@
+from models.profiles import OpponentProfiles, ProfileTracker
+
+
+def play_hand(profiles, actions, scores=None, winners=()):
+    tracker = ProfileTracker(profiles)
+    tracker.start_hand(['A', 'B'])
+    for name, action, amount, street in actions:
+        tracker.action(name, action, amount, street)
+    tracker.end_hand(scores or {}, winners)
+
+
+def test_call_of_nothing_is_not_a_postflop_call():
+    profiles = OpponentProfiles()
+    play_hand(profiles, [('A', 'call', 10.0, 0), ('B', 'check', 0.0, 0),
+                         ('B', 'call', 0.0, 3), ('A', 'raise', 40.0, 3), ('B', 'call', 40.0, 3)])
+
+    assert profiles.players['B'].postflop_calls == 1
+    assert profiles.players['A'].postflop_raises == 1
+    assert profiles.players['B'].rates()['aggression_factor'] == 0.0
+
+
+def test_preflop_and_matchup_counters():
+    profiles = OpponentProfiles()
+    play_hand(profiles, [('A', 'raise', 40.0, 0), ('B', 'raise', 120.0, 0), ('A', 'fold', 0.0, 0)], winners=['B'])
+
+    a, b = profiles.players['A'], profiles.players['B']
+    assert (a.hands, a.voluntary_hands, a.preflop_raise_hands) == (1, 1, 1)
+    assert (b.three_bet_chances, b.three_bets) == (1, 1)
+    assert (a.faced_raises, a.folds_to_raise) == (1, 1)
+    assert profiles.matchups['A']['B'].folds_to_raise == 1
+    assert profiles.to_dict('B')['matchups']['B']['A']['three_bet'] == 1.0
+
+
+def test_showdowns():
+    profiles = OpponentProfiles()
+    play_hand(profiles, [('A', 'call', 10.0, 0), ('B', 'check', 0.0, 0)], scores={'A': 5, 'B': 3}, winners=['A'])
+
+    assert (profiles.players['A'].showdowns, profiles.players['A'].showdowns_won) == (1, 1)
+    assert (profiles.players['B'].showdowns, profiles.players['B'].showdowns_won) == (1, 0)
+    assert profiles.matchups['B']['A'].showdowns_won == 0
@@ -0,0 +1,26 @@
+import pytest
+
+from models.registry import ModelRegistry, ModelSpec
+
+
+def test_failed_warm_up_models_do_not_block_readiness():
+    registry = ModelRegistry([ModelSpec('good', 'tests.stubs:CountingModel', {'name': 'good'}, warm_up=True),
+                              ModelSpec('bad', 'tests.stubs:MissingModel', warm_up=True),
+                              ModelSpec('lazy', 'tests.stubs:CountingModel')])
+    assert not registry.ready()
+
+    registry.warm_up(background=False)
+    status = registry.status()
+    assert registry.ready() and status['ready']
+    assert status['failed'] == ['bad']
+    assert status['models']['bad']['state'] == 'failed'
+    assert 'MissingModel' in status['models']['bad']['error']
+    assert status['models']['good']['state'] == 'loaded'
+    assert status['models']['lazy']['state'] == 'declared'
+
+
+def test_failed_models_raise_when_used():
+    registry = ModelRegistry([ModelSpec('bad', 'tests.stubs:MissingModel')])
+    with pytest.raises(RuntimeError):
+        registry.get('bad')
+    assert registry.failed() == ['bad']
@@ -0,0 +1,25 @@
+import json
+
+from models.poker_game import GameStatistics
+from models.tournament import TournamentResults
+
+
+def statistics() -> GameStatistics:
+    return GameStatistics(player_names={0: 'A', 1: 'B'}, num_rounds=2, winners=[0, 1],
+                          money_gained={0: [10.0, -5.0], 1: [-10.0, 5.0]}, all_in_adjusted_money={0: [8.0, -5.0], 1: [-8.0, 5.0]})
+
+
+def test_results_merge_and_serialize():
+    results = TournamentResults()
+    results.add_game(['A', 'B'], statistics())
+    other = TournamentResults()
+    other.add_game(['B', 'A'], statistics())
+    results.merge(other)
+
+    data = json.loads(json.dumps(results.to_dict()))
+    assert data['num_tables'] == 2 and data['num_rounds'] == 4
+    assert data['hands_played'] == {'A': 4, 'B': 4}
+    assert data['wins'] == {'A': 2, 'B': 2}
+    assert data['money_gained'] == {'A': 0.0, 'B': 0.0}
+    assert data['all_in_adjusted_money'] == {'A': 0.0, 'B': 0.0}
+    assert data['profiles'] == {'players': {}, 'matchups': {}}
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+
+from models.vector_env import VectorPokerEnv, cross_check
+
+
+@pytest.mark.parametrize('num_players', [2, 3, 9])
+@pytest.mark.parametrize('money', [1000.0, 60.0])
+def test_matches_scalar_engine(num_players, money):
+    # Every hand is replayed through PokerGame with the same cards and moves, short stacks make side pots
+    env = VectorPokerEnv(32, num_players=num_players, money=money, seed=num_players)
+    assert cross_check(env, 300, seed=num_players) == []
+
+
+def test_rewards_are_zero_sum():
+    env = VectorPokerEnv(64, num_players=6, money=100.0, seed=0)
+    rng = np.random.default_rng(0)
+    observations = env.reset()
+    for _ in range(50):
+        legal = observations['legal']
+        actions = (legal * rng.random(legal.shape)).argmax(axis=1)
+        observations, rewards, dones, _ = env.step(actions)
+        assert np.all(rewards.sum(axis=1) == 0)
+        assert np.all(rewards[~dones] == 0)
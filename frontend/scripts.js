@@ -1,6 +1,6 @@
 document.addEventListener('DOMContentLoaded', () => {
     fetchStandings();
-    fetchRandomGame();
+    watchLiveGame();
 });
 
 function fetchStandings() {
@@ -11,20 +11,67 @@ function fetchStandings() {
             standingsList.innerHTML = '';
             for (const [model, score] of Object.entries(data)) {
                 const listItem = document.createElement('li');
-                listItem.textContent = `${model}: ${score}`;
+                listItem.textContent = `${model}: ${score.rating} (${score.rating_interval.join(" - ")}), ${score.chips_per_100} chips/100 hands`;
                 standingsList.appendChild(listItem);
             }
         })
         .catch(error => console.error('Error fetching standings:', error));
 }
 
-function fetchRandomGame() {
-    fetch('https://your-backend-domain.com/random_game')
+function watchLiveGame() {
+    fetch('https://your-backend-domain.com/games', { method: 'POST' })
         .then(response => response.json())
         .then(data => {
             const gameAnimation = document.getElementById('game-animation');
-            gameAnimation.textContent = `Game State: Pot - ${data.pot}`;
-            // Implement animation based on game_state
+            gameAnimation.innerHTML = '';
+
+            // Events arrive one by one while the game is running on the server
+            const events = new EventSource(`https://your-backend-domain.com/games/${data.game_id}/events`);
+            const showEvent = event => {
+                const gameEvent = JSON.parse(event.data);
+                const line = document.createElement('div');
+                line.textContent = describeEvent(gameEvent);
+                gameAnimation.appendChild(line);
+                if (gameEvent.type === 'game_end' || gameEvent.type === 'game_error') {
+                    events.close();
+                    fetchStandings();
+                }
+            };
+            ['round_start', 'forced_bet', 'deal', 'action', 'community_cards', 'showdown', 'note', 'game_end', 'game_error'].forEach(type => events.addEventListener(type, showEvent));
+            // Connection errors are not game events: the browser reconnects and the server resumes after the last event
+            events.onerror = () => {
+                if (events.readyState === EventSource.CLOSED) {
+                    console.error('Lost the connection to the game');
+                }
+            };
         })
-        .catch(error => console.error('Error fetching game:', error));
-}
\ No newline at end of file
+        .catch(error => console.error('Error watching game:', error));
+}
+
+function describeEvent(gameEvent) {
+    switch (gameEvent.type) {
+        case 'round_start':
+            return `Round ${gameEvent.round + 1} starts, blinds ${gameEvent.small_blind}/${gameEvent.big_blind}`;
+        case 'forced_bet':
+            return `${gameEvent.player}: ${gameEvent.blind} blind ${gameEvent.amount}`;
+        case 'deal':
+            return 'Cards are dealt';
+        case 'action':
+            return `${gameEvent.player}: ${gameEvent.action} ${gameEvent.amount || ''} (pot ${gameEvent.pot})`;
+        case 'community_cards':
+            return `${gameEvent.street}: ${gameEvent.cards.join(', ')}`;
+        case 'showdown': {
+            // Hole cards are only shown at the showdown
+            const shown = Object.entries(gameEvent.hands || {}).map(([player, cards]) => `${player} shows ${cards.join(', ')}`);
+            return `${shown.length ? shown.join('; ') + '. ' : ''}${gameEvent.winners.join(' and ')} ${gameEvent.winners.length > 1 ? 'split' : 'wins'} ${gameEvent.side_pot ? 'side pot ' + gameEvent.side_pot + ' of ' : ''}${gameEvent.pot}${gameEvent.hand ? ' with ' + gameEvent.hand : ''}`;
+        }
+        case 'note':
+            return gameEvent.text;
+        case 'game_end':
+            return 'Game over';
+        case 'game_error':
+            return `Error: ${gameEvent.error}`;
+        default:
+            return '';
+    }
+}